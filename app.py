@@ -1,26 +1,91 @@
-from datetime import datetime, timedelta
-from llama_index.core import VectorStoreIndex, SimpleDirectoryReader, Settings
-from llama_index.vector_stores.qdrant import QdrantVectorStore
-from llama_index.embeddings.langchain import LangchainEmbedding
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from fastapi import FastAPI, HTTPException
+from datetime import datetime, timedelta, timezone
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.datastructures import MutableHeaders
 from pydantic import BaseModel
 from urllib.parse import quote, unquote
-import requests
+from contextlib import asynccontextmanager
+import httpx
 import arxiv
 import os
 import yaml
-import qdrant_client
-from tqdm import tqdm
-from typing import List, Optional, Dict
+from typing import List, Literal, Optional, Dict, Tuple, Union
 import asyncio
 import time
 from concurrent.futures import ThreadPoolExecutor
-from functools import lru_cache
+import base64
+import functools
 import hashlib
+import itertools
+import logging
+import zlib
+from rag.answer_cache import SemanticAnswerCache
+from rag.cache import make_cache
+from rag.chat_sessions import ChatSession, ChatSessions, SharedChatSessions
+from rag.downloader import RateLimiter, paper_record
+from rag.llm_scheduler import PRIORITIES, LLMScheduler, SchedulerError
+from rag.metrics import REGISTRY, STAGE_SECONDS, StageTimer
+from rag.ollama_client import OllamaClient, OllamaError
+from rag.paper_records import Paper, PaperRecords
+from rag.paper_store import PaperStore, to_timestamp
+from rag.retriever import ContextRetriever, pack_sources
+from rag.serialization import dumps, ndjson_line
+from rag.summaries import Summarizer
+from rag.singleflight import SingleFlight
 
-app = FastAPI(title="Research Assistant API")
+logger = logging.getLogger("research_assistant")
+
+CHAT_CANCELLED = REGISTRY.counter(
+    "research_assistant_chat_cancelled_total",
+    "Generations stopped because the client disconnected",
+    ["mode"]
+)
+CHAT_TURNS = REGISTRY.counter(
+    "research_assistant_chat_turns_total",
+    "Chat turns by how the prompt was built: first question, follow-up on "
+    "Ollama's context, or follow-up rebuilt as text",
+    ["kind"]
+)
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "research_assistant_http_request_seconds",
+    "Time until the response headers are sent, by route",
+    ["method", "route", "status"]
+)
+
+OLLAMA_OPTIONS = {
+    "temperature": 0.7,
+    "num_predict": 2048,  # Increased for longer responses
+    "num_ctx": 4096,      # Increased context window
+    "stop": ["User:", "Human:", "<|im_end|>"]  # Better stop tokens
+}
+
+CONFIG_FILE = os.environ.get("RESEARCH_ASSISTANT_CONFIG", "config.yml")
+
+# Built by create_services() when the server starts rather than at import,
+# so importing app (uvicorn workers, --reload) stays cheap
+fetcher: Optional["ResearchPaperFetcher"] = None
+ollama: Optional[OllamaClient] = None
+retriever: Optional[ContextRetriever] = None
+answer_cache: Optional[SemanticAnswerCache] = None
+chat_sessions: Optional[Union[ChatSessions, SharedChatSessions]] = None
+summarizer: Optional[Summarizer] = None
+
+# Liveness only needs the event loop; readiness waits for the warm-up
+startup = {"ready": False, "warmup": {}}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    create_services(CONFIG_FILE)
+    warmup = asyncio.create_task(warm_up(fetcher.config.get("warmup", {})))
+    yield
+    warmup.cancel()
+    summarizer.close()
+    await ollama.aclose()
+    fetcher._arxiv_executor.shutdown(wait=False, cancel_futures=True)
+
+app = FastAPI(title="Research Assistant API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -30,13 +95,119 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class RequestTimer:
+    # Plain ASGI rather than @app.middleware("http"): that wrapper sits
+    # between streaming responses and the client and hides disconnects
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+
+        async def timed_send(message):
+            if message["type"] == "http.response.start":
+                HTTP_REQUEST_SECONDS.observe(
+                    time.perf_counter() - start,
+                    method=scope["method"],
+                    route=getattr(scope.get("route"), "path", "unmatched"),
+                    status=message["status"]
+                )
+            await send(message)
+
+        await self.app(scope, receive, timed_send)
+
+app.add_middleware(RequestTimer)
+
+class CompressResponses:
+    # gzip for JSON and NDJSON. Streams are flushed after every chunk
+    # (Z_SYNC_FLUSH) so compression never holds back a paper or a token;
+    # Starlette's GZipMiddleware buffers them
+    COMPRESSED_TYPES = ("application/json", "application/x-ndjson")
+
+    def __init__(self, app, minimum_size: int = 1024, level: int = 6):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        accept = dict(scope["headers"]).get(b"accept-encoding", b"")
+        if b"gzip" not in accept:
+            return await self.app(scope, receive, send)
+        start = None
+        compressor = None
+
+        def encode(message):
+            more = message.get("more_body", False)
+            body = compressor.compress(message.get("body", b""))
+            body += compressor.flush(zlib.Z_SYNC_FLUSH if more else zlib.Z_FINISH)
+            return {**message, "body": body}
+
+        async def compressed_send(message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is not None:
+                headers = MutableHeaders(raw=start["headers"])
+                media_type = headers.get("content-type", "").partition(";")[0].strip()
+                more = message.get("more_body", False)
+                if (message["type"] == "http.response.body" and media_type in self.COMPRESSED_TYPES
+                        and "content-encoding" not in headers
+                        and (more or len(message.get("body", b"")) >= self.minimum_size)):
+                    compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)  # 31: gzip framing
+                    headers["Content-Encoding"] = "gzip"
+                    headers.add_vary_header("Accept-Encoding")
+                    if "content-length" in headers:
+                        del headers["content-length"]
+                    message = encode(message)
+                    if not more:
+                        headers["Content-Length"] = str(len(message["body"]))
+                await send(start)
+                start = None
+            elif compressor is not None and message["type"] == "http.response.body":
+                message = encode(message)
+            await send(message)
+
+        await self.app(scope, receive, compressed_send)
+
+app.add_middleware(CompressResponses)
+
+class FastJSONResponse(JSONResponse):
+    # Encodes with orjson when it is installed; see rag/serialization.py
+    def render(self, content) -> bytes:
+        return dumps(content)
+
 class SearchRequest(BaseModel):
     topic: str
     max_results: Optional[int] = 10
     years: Optional[int] = 5
+    stream: Optional[bool] = False  # NDJSON, one paper per line as soon as it is known
+    cursor: Optional[str] = None  # next_cursor of the previous page
+
+class BatchTopic(BaseModel):
+    topic: str
+    years: Optional[int] = 5
+    max_results: Optional[int] = 10
+
+class BatchSearchRequest(BaseModel):
+    topics: List[BatchTopic]
+    stream: Optional[bool] = True  # NDJSON, one line per topic as it completes
+
+class SummaryRequest(BaseModel):
+    years: Optional[int] = 5
+    max_papers: Optional[int] = None  # default: summaries.max_papers
 
 class ChatRequest(BaseModel):
     message: str
+    stream: Optional[bool] = False
+    years: Optional[int] = None  # only use papers from the last N years
+    session_id: Optional[str] = None  # continue the conversation this id belongs to
+    priority: Literal["high", "normal", "low"] = "normal"  # order in the model's queue
+    deadline_seconds: Optional[float] = None  # give up if not answered within this (capped by config)
 
 class PaperResponse(BaseModel):
     title: str
@@ -45,102 +216,637 @@ class PaperResponse(BaseModel):
     url: str
     abstract: Optional[str] = None
 
+def paper_cursor(paper: Paper) -> Tuple[int, str]:
+    # Papers are listed newest first, ties broken by id
+    return paper.published_ts, paper.arxiv_id
+
+def encode_cursor(paper: Paper) -> str:
+    published, arxiv_id = paper_cursor(paper)
+    return base64.urlsafe_b64encode(f"{published}:{arxiv_id}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    try:
+        published, _, arxiv_id = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().partition(":")
+        return int(published), arxiv_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@functools.lru_cache(maxsize=4096)
+def iso_day(day: int) -> str:
+    return datetime.fromtimestamp(day * 86400, tz=timezone.utc).date().isoformat()
+
+def paper_json(paper: Paper) -> Dict:
+    return {
+        "title": paper.title,
+        "authors": paper.authors,
+        "published": iso_day(paper.published_ts // 86400),
+        "url": paper.url,
+        "abstract": paper.abstract or ""
+    }
+
 class ResearchPaperFetcher:
     def __init__(self, config_file):
         with open(config_file, "r") as conf:
             self.config = yaml.safe_load(conf)
+        logging.basicConfig(
+            level=self.config.get("log_level", "INFO"),
+            format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+        )
+        # One line per upstream HTTP call drowns out the app's own logging
+        logging.getLogger("httpx").setLevel(logging.WARNING)
         self._create_data_folder()
-        self.client = arxiv.Client(
-            page_size=100,  # Increased from 5
-            delay_seconds=1,
-            num_retries=5    # Increased retries
+        # Streamed searches ask arXiv for a small first page so the first
+        # papers arrive sooner, then for the rest in one request
+        self.first_page_size = self.config.get("search", {}).get("first_page_size", 5)
+        # arxiv.Client is synchronous, so searches run on a bounded pool sized
+        # by rate_limit.max_concurrent instead of blocking the event loop
+        self._arxiv_executor = ThreadPoolExecutor(
+            max_workers=self.config["rate_limit"]["max_concurrent"],
+            thread_name_prefix="arxiv"
         )
-        self._papers_cache = {}
-        self._context_cache = {}
+        # arxiv.Client only spaces the requests of one instance, and a client
+        # is made per page size, so every page of every search waits its turn here
+        self.arxiv_delay = self.config["rate_limit"]["delay_seconds"]
+        self._arxiv_limiter = RateLimiter(self.arxiv_delay)
+        # Topic caches hold tuples of arXiv IDs; the papers themselves are
+        # kept once, in self.records. Chat context is built from them on use
+        self._papers_cache = make_cache(self.config, "paper_ids")
+        self._inflight = SingleFlight()
+        # With a shared cache backend, workers also take a lease on a search
+        # before asking arXiv, so a miss is fetched once, not once per worker
+        self.locks = make_cache(self.config, "locks")
+        self.lease_seconds = self.config.get("cache", {}).get("lease_seconds", 60)
+        self.store = PaperStore(self.config["paper_store"]["path"])
+        self.records = PaperRecords(self.store, self.config["paper_store"].get("max_cached_papers", 20000))
         
     def _create_data_folder(self):
         if not os.path.exists(self.config["data_path"]):
             os.makedirs(self.config["data_path"])
-            print("Data folder created")
+            logger.info("Data folder created")
 
-    @lru_cache(maxsize=100)
-    def _get_cache_key(self, topic: str) -> str:
-        return hashlib.md5(topic.encode()).hexdigest()
+    @staticmethod
+    def _get_cache_key(topic: str, max_results: int, years: int) -> str:
+        return hashlib.md5(f"{topic}|{max_results}|{years}".encode()).hexdigest()
 
-    async def fetch_papers(self, topic: str, max_results: int = 10, years: int = 5):
-        try:
-            cache_key = self._get_cache_key(topic)
-            if cache_key in self._papers_cache:
-                cached_papers = self._papers_cache[cache_key]
-                print(f"Found {len(cached_papers)} papers in cache")
-                return cached_papers
-
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=years*365)
-            
-            date_filter = f"submittedDate:[{start_date.strftime('%Y%m%d')}* TO {end_date.strftime('%Y%m%d')}*]"
-            query = f"{topic} AND {date_filter}"
-            
-            print(f"Fetching up to {max_results} papers for query: {query}")
-            
-            search = arxiv.Search(
-                query=query,
-                max_results=max_results * 2,  # Request more to ensure we get enough
-                sort_by=arxiv.SortCriterion.SubmittedDate,
-                sort_order=arxiv.SortOrder.Descending
-            )
+    def _arxiv_client(self, page_size: int) -> arxiv.Client:
+        # The page size is fixed per client, and arXiv returns (and we parse)
+        # a full page even when fewer results are wanted
+        client = arxiv.Client(page_size=page_size, delay_seconds=self.arxiv_delay, num_retries=5)
+        client.query_url_format = self.config.get("arxiv_url", "https://export.arxiv.org/api/query") + "?{}"
+        return client
+
+    def _page_sizes(self, limit: int, streamed: bool) -> List[int]:
+        sizes = []
+        if streamed and limit > self.first_page_size:
+            sizes.append(self.first_page_size)
+        while sum(sizes) < limit:
+            sizes.append(min(limit - sum(sizes), 100))
+        return sizes
 
-            papers = []
-            paper_results = list(self.client.results(search))
-            print(f"arXiv returned {len(paper_results)} papers")
-            
-            for paper in paper_results:
+    def _search_arxiv(self, search: arxiv.Search, page_sizes: List[int], on_page=None) -> List[Dict]:
+        papers = []
+        for page_size in page_sizes:
+            page = []
+            self._arxiv_limiter.wait()
+            results = self._arxiv_client(page_size).results(search, offset=len(papers))
+            for paper in itertools.islice(results, page_size):
                 try:
-                    paper_info = {
-                        'title': paper.title,
-                        'authors': [str(author) for author in paper.authors],
-                        'published': paper.published,
-                        'url': paper.pdf_url,
-                        'abstract': paper.summary
-                    }
-                    papers.append(paper_info)
+                    page.append(paper_record(paper))
                 except Exception as e:
-                    print(f"Error processing paper: {str(e)}")
-                    continue
+                    logger.warning("Error processing paper: %s", e)
+            if on_page is not None and page:
+                on_page(page)
+            papers += page
+            if len(page) < page_size:
+                break
+        logger.info("arXiv returned %d papers", len(papers))
+        return papers
+
+    async def fetch_papers(self, topic: str, max_results: int = 10, years: int = 5,
+                           before: Optional[Tuple[int, str]] = None, on_page=None):
+        """The newest ``max_results`` papers on ``topic`` (older than ``before``, for later pages).
+
+        ``on_page`` is called with each batch of papers as soon as it is
+        known (arXiv page or local store), so a streamed response can send
+        them before the whole list is ready.
+        """
+        try:
+            cache_key = self._get_cache_key(topic, max_results, years)
+            if before is None:
+                with STAGE_SECONDS.time(stage="cache_lookup"):
+                    cached_ids = await self._papers_cache.aget(cache_key)
+                    cached_papers = await self.records.aresolve(cached_ids) if cached_ids is not None else None
+                if cached_papers is not None:
+                    logger.debug("Found %d papers in cache", len(cached_papers))
+                    return cached_papers
+            else:
+                cache_key += f"|{before[0]}|{before[1]}"
+
+            # Concurrent misses for the same key share a single arXiv query;
+            # only the caller that starts it sees the pages as they arrive
+            return await self._inflight.do(
+                cache_key,
+                lambda: self._fetch_leased(cache_key, topic, max_results, years, before, on_page)
+            )
 
-            print(f"Successfully processed {len(papers)} papers")
-            self._papers_cache[cache_key] = papers[:max_results]
-            return papers[:max_results]
-            
         except Exception as e:
-            print(f"Error in fetch_papers: {str(e)}")
+            logger.error("Error in fetch_papers: %s", e)
             return []
 
-    async def get_chat_context(self, topic: str) -> str:
+    async def fetch_many(self, searches: List[Tuple[str, int, int]]):
+        """Yield ``(index, papers, cached)`` for each (topic, max_results, years), as each completes.
+
+        Cached searches come first. The misses are grouped by topic: one
+        fetch for the longest window and largest count serves all of them,
+        since the newest papers of a shorter window are a prefix of it.
+        Topics are fetched concurrently, bounded by the arXiv pool.
+        """
+        groups: Dict[str, List[int]] = {}
+        for index, (topic, max_results, years) in enumerate(searches):
+            cached = await self._papers_cache.aget(self._get_cache_key(topic, max_results, years))
+            if cached is not None:
+                yield index, await self.records.aresolve(cached), True
+            else:
+                groups.setdefault(topic, []).append(index)
+
+        async def fetch_group(topic: str, indexes: List[int]) -> List[Tuple[int, List[Dict]]]:
+            papers = await self.fetch_papers(
+                topic,
+                max_results=max(searches[i][1] for i in indexes),
+                years=max(searches[i][2] for i in indexes)
+            )
+            now = datetime.now(timezone.utc)
+            results = []
+            for i in indexes:
+                _, max_results, years = searches[i]
+                cutoff = to_timestamp(now - timedelta(days=years*365))
+                selected = [paper for paper in papers if paper.published_ts >= cutoff][:max_results]
+                # Nothing came back (fetch_papers returns [] when the fetch
+                # failed): leave it uncached so the next search retries
+                if papers:
+                    await self._papers_cache.aset(self._get_cache_key(topic, max_results, years),
+                                                  tuple(paper.arxiv_id for paper in selected))
+                results.append((i, selected))
+            return results
+
+        tasks = [asyncio.ensure_future(fetch_group(topic, indexes)) for topic, indexes in groups.items()]
         try:
-            cache_key = self._get_cache_key(topic)
-            
-            if cache_key in self._context_cache:
-                print("Using cached context")
-                return self._context_cache[cache_key]
+            for done in asyncio.as_completed(tasks):
+                for index, papers in await done:
+                    yield index, papers, False
+        finally:
+            # The client went away: the arXiv fetches are shielded and still
+            # fill the cache, only the grouping work is dropped
+            for task in tasks:
+                task.cancel()
+
+    async def _query_arxiv(self, topic: str, start: datetime, end: datetime, limit: int,
+                           on_page=None) -> List[Dict]:
+        """Fetch the newest ``limit`` matches submitted in [start, end] into the store."""
+        date_filter = f"submittedDate:[{start.strftime('%Y%m%d%H%M')} TO {end.strftime('%Y%m%d%H%M')}]"
+        query = f"{topic} AND {date_filter}"
+        
+        logger.info("Fetching up to %d papers for query: %s", limit, query)
+        
+        search = arxiv.Search(
+            query=query,
+            max_results=limit,
+            sort_by=arxiv.SortCriterion.SubmittedDate,
+            sort_order=arxiv.SortOrder.Descending
+        )
+
+        loop = asyncio.get_running_loop()
+        page_sizes = self._page_sizes(limit, streamed=on_page is not None)
+        if on_page is not None:
+            # Pages arrive on the arXiv thread; hand them to the event loop
+            on_page = functools.partial(loop.call_soon_threadsafe, on_page)
+        with STAGE_SECONDS.time(stage="arxiv_query"):
+            papers = await loop.run_in_executor(self._arxiv_executor, self._search_arxiv, search, page_sizes, on_page)
+        logger.info("Successfully processed %d papers", len(papers))
+
+        # If arXiv had more matches than we asked for, only the range back to
+        # the oldest paper we got is known to be complete
+        covered_from = start if len(papers) < limit else min(p["published"] for p in papers)
+        await asyncio.to_thread(self.store.upsert_papers, papers, topic)
+        await asyncio.to_thread(self.store.add_coverage, topic, to_timestamp(covered_from), to_timestamp(end))
+        return papers
+
+    async def _fetch_leased(self, cache_key: str, topic: str, max_results: int, years: int,
+                            before: Optional[Tuple[int, str]] = None, on_page=None):
+        if before is not None or not self._papers_cache.shared:
+            return await self._fetch_papers(cache_key, topic, max_results, years, before, on_page)
+        lease = f"fetch:{cache_key}"
+        while not await self.locks.aadd(lease, os.getpid(), ttl_seconds=self.lease_seconds):
+            # Another worker is fetching this search: wait until it is done
+            # (or its lease expires), then use what it cached
+            while await self.locks.aget(lease) is not None:
+                await asyncio.sleep(0.1)
+        try:
+            cached_ids = await self._papers_cache.aget(cache_key)
+            if cached_ids is None:
+                return await self._fetch_papers(cache_key, topic, max_results, years, before, on_page)
+            papers = await self.records.aresolve(cached_ids)
+            if on_page is not None and papers:
+                on_page(papers)
+            return papers
+        finally:
+            await asyncio.shield(self.locks.adelete(lease))
+
+    async def _fetch_papers(self, cache_key: str, topic: str, max_results: int, years: int,
+                            before: Optional[Tuple[int, str]] = None, on_page=None):
+        end_date = datetime.now(timezone.utc)
+        start_date = end_date - timedelta(days=years*365)
+        start_ts, end_ts = to_timestamp(start_date), to_timestamp(end_date)
+        fresh_after = end_ts - self.config["paper_store"]["freshness_hours"] * 3600
+
+        # Papers are collected newest first: arXiv's newer-than-stored ones,
+        # then the local store, then an arXiv backfill of older ones
+        papers, seen = [], set()
+
+        def add(batch: List[Dict]):
+            fresh = []
+            for paper in self.records.add(batch):
+                if len(papers) + len(fresh) >= max_results:
+                    break
+                if paper["arxiv_id"] in seen or (before is not None and paper_cursor(paper) >= before):
+                    continue
+                seen.add(paper["arxiv_id"])
+                fresh.append(paper)
+            papers.extend(fresh)
+            if fresh and on_page is not None:
+                on_page(fresh)
+
+        async def query(start: datetime, end: datetime, limit: int):
+            # Streamed: pages are added as they arrive (repeats are skipped)
+            add(await self._query_arxiv(topic, start, end, limit, add if on_page is not None else None))
+
+        coverage = await asyncio.to_thread(self.store.coverage, topic)
+        if before is not None:
+            pass  # a later page: the newest papers were fetched for the first one
+        elif coverage is None or coverage[1] < start_ts:
+            await query(start_date, end_date, max_results)
+        elif coverage[1] < fresh_after:
+            # Only ask arXiv for what was submitted since the last fetch
+            since = datetime.fromtimestamp(coverage[1], tz=timezone.utc)
+            await query(since, end_date, max_results)
+        else:
+            logger.debug("Answering %r from the local paper store", topic)
+
+        if len(papers) < max_results:
+            add(await asyncio.to_thread(self.store.topic_papers, topic, start_ts, end_ts, max_results, before))
+        coverage = await asyncio.to_thread(self.store.coverage, topic)
+        if len(papers) < max_results and coverage and coverage[0] > start_ts:
+            # Not enough local papers and the older part of the window was
+            # never fetched: request just that range. arXiv's date filter
+            # includes the whole minute of ``until``, so the stored papers of
+            # that minute come back too and are asked for on top
+            until = datetime.fromtimestamp(coverage[0], tz=timezone.utc)
+            minute = coverage[0] - coverage[0] % 60
+            repeats = await asyncio.to_thread(self.store.topic_papers, topic, minute, minute + 59, max_results)
+            await query(start_date, until, max_results - len(papers) + len(repeats))
+
+        if before is None:
+            await self._papers_cache.aset(cache_key, tuple(paper.arxiv_id for paper in papers))
+        return papers
+
+    async def has_more(self, topic: str, years: int, last: Paper) -> bool:
+        """Whether the window holds papers older than ``last``: stored ones, or a range never fetched from arXiv."""
+        start_ts = to_timestamp(datetime.now(timezone.utc) - timedelta(days=years*365))
+        coverage = await asyncio.to_thread(self.store.coverage, topic)
+        if coverage is None or coverage[0] > start_ts:
+            return True
+        older = await asyncio.to_thread(self.store.topic_papers, topic, start_ts, last.published_ts, 1, paper_cursor(last))
+        return bool(older)
+
+    async def get_chat_context(self, topic: str, max_results: int = 10, years: int = 5) -> Tuple[str, List[Dict]]:
+        try:
+            # Not cached: it is a few string joins over records already in memory
+            papers = await self.fetch_papers(topic, max_results=max_results, years=years)
+            logger.debug("Building context from %d papers", len(papers))
+
+            sources = [
+                {
+                    "title": paper.title,
+                    "url": paper.url,
+                    "section": "abstract",
+                    "text": f"Authors: {', '.join(paper.authors)}\nAbstract: {paper.abstract}"
+                }
+                for paper in papers
+            ]
+            token_budget = self.config.get("retrieval", {}).get("token_budget", 1500)
+            return pack_sources(sources, token_budget)
+
+        except Exception as e:
+            logger.error("Error getting chat context: %s", e)
+            return "", []
+
+def load_embedder():
+    # Imported here: rag.embeddings pulls in llama_index, and sentence_transformers torch
+    from rag.embeddings import get_embedding_service
+    return get_embedding_service(fetcher.config)
 
-            papers = await self.fetch_papers(topic, max_results=10)  # Increased from 5
-            print(f"Building context from {len(papers)} papers")
+def embed_question(text: str):
+    return load_embedder().embed([text])[0]
+
+def create_services(config_file: str):
+    global fetcher, ollama, retriever, answer_cache, chat_sessions, summarizer
+    fetcher = ResearchPaperFetcher(config_file)
+    scheduler_config = fetcher.config.get("llm_scheduler", {})
+    ollama = OllamaClient(
+        fetcher.config["llm_url"],
+        fetcher.config["llm_name"],
+        timeout=scheduler_config.get("deadline_seconds", 240),
+        keep_alive=fetcher.config.get("warmup", {}).get("ollama_keep_alive"),
+        scheduler=LLMScheduler(
+            max_concurrent=scheduler_config.get("max_concurrent", fetcher.config["rate_limit"]["max_concurrent"]),
+            max_queue=scheduler_config.get("max_queue", 16)
+        )
+    )
+    retriever = ContextRetriever(fetcher.config)
 
-            context = "Available research papers:\n\n"
-            for paper in papers:
-                context += f"Title: {paper['title']}\n"
-                context += f"Authors: {', '.join(paper['authors'])}\n"
-                context += f"Abstract: {paper['abstract']}\n\n"
+    answer_cache_config = fetcher.config.get("answer_cache", {})
+    answer_cache = SemanticAnswerCache(
+        embed_question,
+        threshold=answer_cache_config.get("similarity_threshold", 0.92),
+        ttl_seconds=answer_cache_config.get("ttl_seconds", 3600),
+        max_topics=answer_cache_config.get("max_topics", 256),
+        max_entries_per_topic=answer_cache_config.get("max_entries_per_topic", 64)
+    )
+    answer_cache.enabled = answer_cache_config.get("enabled", True)
+
+    sessions_config = fetcher.config.get("chat_sessions", {})
+    if fetcher.locks.shared and sessions_config.get("shared", True):
+        # Kept in the cache backend so a follow-up can go to any worker
+        chat_sessions = SharedChatSessions(
+            make_cache(fetcher.config, "chat_sessions",
+                       max_entries=sessions_config.get("max_sessions", 1000),
+                       ttl_seconds=sessions_config.get("idle_seconds", 1800)),
+            fetcher.locks,
+            max_sessions=sessions_config.get("max_sessions", 1000)
+        )
+    else:
+        chat_sessions = ChatSessions(
+            max_sessions=sessions_config.get("max_sessions", 1000),
+            idle_seconds=sessions_config.get("idle_seconds", 1800)
+        )
+    chat_sessions.enabled = sessions_config.get("enabled", True)
 
-            self._context_cache[cache_key] = context
-            return context
+    summaries_config = fetcher.config.get("summaries", {})
+    summarizer = Summarizer(
+        ollama,
+        fetcher.store,
+        fetcher.fetch_papers,
+        OLLAMA_OPTIONS,
+        map_concurrency=summaries_config.get("map_concurrency", 2),
+        token_budget=summaries_config.get("token_budget", 2500),
+        summary_tokens=summaries_config.get("summary_tokens", 256),
+        final_tokens=summaries_config.get("final_tokens", 1200),
+        max_jobs=summaries_config.get("max_jobs", 100),
+        job_store=make_cache(fetcher.config, "summary_jobs", max_entries=summaries_config.get("max_jobs", 100))
+        if fetcher.locks.shared else None
+    )
+    summarizer.enabled = summaries_config.get("enabled", True)
 
+async def prefill_topic(topic: str):
+    await fetcher.fetch_papers(topic)
+    await fetcher.get_chat_context(topic)
+
+async def warm_up(config: Dict):
+    """Run the warm-up steps from the warmup section of config.yml, then
+    report the app as ready.
+
+    Steps run concurrently. A failing step is logged and shown under
+    /health, but doesn't hold back readiness: the first request that needs
+    it just pays the cost instead.
+    """
+    steps = {}
+    if config.get("enabled", True):
+        if config.get("embedder") and (answer_cache.enabled or retriever.enabled):
+            steps["embedder"] = asyncio.to_thread(load_embedder)
+        if config.get("vector_index"):
+            steps["vector_index"] = retriever.warm_up()
+        if config.get("ollama_keep_alive"):
+            steps["ollama"] = ollama.load()
+        for topic in config.get("hot_topics") or []:
+            steps[f"topic:{topic}"] = prefill_topic(topic)
+
+    async def run(name, step):
+        start = time.perf_counter()
+        try:
+            await step
+            startup["warmup"][name] = {"status": "ok"}
         except Exception as e:
-            print(f"Error getting chat context: {str(e)}")
-            return ""
+            logger.warning("Warm-up step %s failed: %s", name, e)
+            startup["warmup"][name] = {"status": "failed", "error": str(e)}
+        startup["warmup"][name]["seconds"] = round(time.perf_counter() - start, 3)
+
+    await asyncio.gather(*(run(name, step) for name, step in steps.items()))
+    startup["ready"] = True
+    if steps:
+        logger.info("Warm-up finished: %s", ", ".join(
+            f"{name} {result['status']} in {result['seconds']}s" for name, result in startup["warmup"].items()
+        ))
+
+async def topic_fingerprint(topic: str, years: Optional[int] = None) -> str:
+    # Answers are only reusable while the topic's paper set, and the chunks
+    # ingested for retrieval, are the same
+    papers = await fetcher.fetch_papers(topic, years=years or 5)
+    key = "|".join(sorted(p["arxiv_id"] for p in papers)) + "|" + retriever.index_version()
+    return hashlib.md5(key.encode()).hexdigest()
+
+async def build_chat_context(topic: str, message: str, years: Optional[int] = None) -> Tuple[str, List[Dict]]:
+    # Prefer the most relevant chunks of the topic's papers from the vector
+    # index; fall back to their abstracts when none of them was ingested
+    start = int((datetime.now() - timedelta(days=years * 365)).strftime("%Y%m%d")) if years else None
+    papers = await fetcher.fetch_papers(topic, years=years or 5)
+    with STAGE_SECONDS.time(stage="retrieval"):
+        chunks = await retriever.retrieve(f"{topic}: {message}", start=start,
+                                          arxiv_ids=[paper.arxiv_id for paper in papers])
+    if chunks:
+        logger.debug("Retrieved %d chunks from the vector store", len(chunks))
+        return pack_sources(chunks, retriever.token_budget)
+    return await fetcher.get_chat_context(topic, years=years or 5)
+
+def build_prompt(context: str, message: str, history: str = "") -> str:
+    conversation = f"Conversation so far:\n\n{history}\n\n" if history else ""
+    return f"""You are a research assistant. Based on the following papers:
+
+{context}
+
+{conversation}User question: {message}
+
+Please provide a detailed and specific response focusing on the content of these papers. If summarizing advancements, list them point by point with specific details from the papers. Cite the papers you use by their bracketed numbers, e.g. [2]."""
+
+FOLLOW_UP_PROMPT = """Follow-up question: {message}
+
+Answer from the same papers and keep citing them by their bracketed numbers."""
+
+async def follow_up_prompt(session: ChatSession, message: str) -> Tuple[str, Optional[List[int]]]:
+    # With Ollama's context from the last turn the papers and earlier turns
+    # are already in its KV cache, so only the new question is prefilled.
+    # Without one (the last answer came from the answer cache) or once it
+    # leaves too little room for the answer, the conversation is rebuilt as text
+    sessions_config = fetcher.config.get("chat_sessions", {})
+    if session.context is not None and len(session.context) <= sessions_config.get("max_context_tokens", 3072):
+        CHAT_TURNS.inc(kind="reused_context")
+        return FOLLOW_UP_PROMPT.format(message=message), session.context_tokens()
+    if session.papers is None:
+        session.papers, session.sources = await build_chat_context(session.topic, message, session.years)
+    CHAT_TURNS.inc(kind="rebuilt_prompt")
+    history = session.history_text(sessions_config.get("history_tokens", 1000))
+    return build_prompt(session.papers, message, history), None
+
+async def stream_chat(prompt: str, sources: List[Dict], on_complete=None, timer: Optional[StageTimer] = None,
+                      context: Optional[List[int]] = None, session_id: Optional[str] = None,
+                      priority: int = PRIORITIES["normal"], deadline: Optional[float] = None):
+    # One NDJSON object per line: {"token": ...} while generating, then a
+    # final {"done": true, "sources": [...]} (or {"error": ...} if the
+    # generation fails midway)
+    timer = timer or StageTimer()
+    tokens, final = [], {}
+    try:
+        with timer.stage("ollama"):
+            async for chunk in ollama.stream(prompt, OLLAMA_OPTIONS, context, priority, deadline):
+                if chunk.get("response"):
+                    tokens.append(chunk["response"])
+                    yield ndjson_line({"token": chunk["response"]})
+                if chunk.get("done"):
+                    final = chunk
+                    break
+        if on_complete is not None and "".join(tokens).strip():
+            on_complete("".join(tokens).strip(), final)
+        logger.info("Streamed chat answer: %s", timer.summary())
+        done = {"done": True, "sources": sources}
+        if session_id is not None:
+            done["session_id"] = session_id
+        yield ndjson_line(done)
+    except (asyncio.CancelledError, GeneratorExit):
+        # The client went away; leaving the loop closed the upstream stream
+        CHAT_CANCELLED.inc(mode="stream")
+        raise
+    except SchedulerError as e:
+        yield ndjson_line({"error": e.detail})
+    except (httpx.TimeoutException, TimeoutError):
+        yield ndjson_line({"error": "The model is taking too long to respond. Please try again."})
+    except httpx.ConnectError:
+        yield ndjson_line({"error": "Unable to connect to the AI model service. Please check if Ollama is running."})
+    except Exception as e:
+        logger.error("Streaming error from Ollama: %s", e)
+        yield ndjson_line({"error": "An error occurred while processing your request."})
 
-fetcher = ResearchPaperFetcher("config.yml")
+async def replay_answer(cached: Dict, session_id: Optional[str] = None):
+    yield ndjson_line({"token": cached["response"]})
+    done = {"done": True, "sources": cached["sources"], "cached": True}
+    if session_id is not None:
+        done["session_id"] = session_id
+    yield ndjson_line(done)
+
+class ClientDisconnected(Exception):
+    pass
+
+async def until_disconnected(http_request: Request, awaitable, poll_seconds: float = 0.5):
+    """Await ``awaitable``, cancelling it if the client disconnects first."""
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_seconds)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
+def scheduler_http_error(e: SchedulerError) -> HTTPException:
+    return HTTPException(status_code=e.status_code, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
+
+async def sessions_call(method, *args):
+    # A shared session store does file or network I/O: run it in a thread,
+    # shielded so a turn still ends when the request is cancelled
+    if not chat_sessions.shared:
+        return method(*args)
+    return await asyncio.shield(asyncio.to_thread(method, *args))
+
+async def end_turn_after(lines, session: ChatSession):
+    try:
+        async for line in lines:
+            yield line
+    finally:
+        await sessions_call(chat_sessions.end_turn, session)
+
+async def stream_papers(topic: str, max_results: int, years: int, before: Optional[Tuple[int, str]]):
+    # One NDJSON object per line: {"paper": {...}} as each arXiv page or
+    # store lookup comes in, then {"done": true, "total_papers": n, "next_cursor": ...}
+    pages: asyncio.Queue = asyncio.Queue()
+    fetch = asyncio.ensure_future(
+        fetcher.fetch_papers(topic, max_results=max_results, years=years, before=before, on_page=pages.put_nowait)
+    )
+    fetch.add_done_callback(lambda _: pages.put_nowait(None))
+    sent = set()
+    try:
+        while (page := await pages.get()) is not None:
+            for paper in page:
+                sent.add(paper["arxiv_id"])
+                yield ndjson_line({"paper": paper_json(paper)})
+        # A cached result, or one fetched by a concurrent request, comes
+        # back whole without any pages
+        papers = fetch.result()
+        for paper in papers:
+            if paper["arxiv_id"] not in sent:
+                yield ndjson_line({"paper": paper_json(paper)})
+        more = papers and await fetcher.has_more(topic, years, papers[-1])
+        next_cursor = encode_cursor(papers[-1]) if more else None
+        yield ndjson_line({"done": True, "total_papers": len(papers), "next_cursor": next_cursor})
+    finally:
+        # The fetch itself is shielded and still fills the cache
+        fetch.cancel()
+
+@app.post("/api/research")
+async def search_many(request: BatchSearchRequest):
+    try:
+        max_topics = fetcher.config.get("search", {}).get("max_batch_topics", 50)
+        if len(request.topics) > max_topics:
+            raise HTTPException(status_code=400, detail=f"At most {max_topics} topics per request")
+        # Same defaults and limits as a single search; an explicit null gets
+        # the default too
+        searches = [
+            (item.topic.strip(),
+             max(min(10 if item.max_results is None else item.max_results, 20), 10),
+             min(5 if item.years is None else item.years, 10))
+            for item in request.topics
+        ]
+
+        async def results():
+            async for index, papers, cached in fetcher.fetch_many(searches):
+                topic, max_results, years = searches[index]
+                yield index, {
+                    "index": index,
+                    "topic": topic,
+                    "years": years,
+                    "papers": [paper_json(paper) for paper in papers],
+                    "total_papers": len(papers),
+                    "cached": cached
+                }
+
+        if not request.stream:
+            by_index = dict([item async for item in results()])
+            return FastJSONResponse({"status": "success", "results": [by_index[i] for i in range(len(searches))]})
+
+        async def lines():
+            # One NDJSON object per topic in completion order (cached first),
+            # then {"done": true, "topics": n}
+            async for _, result in results():
+                yield ndjson_line(result)
+            yield ndjson_line({"done": True, "topics": len(searches)})
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Batch search error: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/research/{topic}")
 async def search_papers(topic: str, request: SearchRequest):
@@ -148,149 +854,359 @@ async def search_papers(topic: str, request: SearchRequest):
         decoded_topic = unquote(topic)
         max_results = max(min(request.max_results, 20), 10)  # At least 10, max 20
         years = min(request.years, 10)
-        
-        print(f"Requesting {max_results} papers for topic: {decoded_topic}")
+        before = decode_cursor(request.cursor) if request.cursor else None
+
+        logger.info("Requesting %d papers for topic: %s", max_results, decoded_topic)
+        if request.stream:
+            return StreamingResponse(stream_papers(decoded_topic, max_results, years, before),
+                                     media_type="application/x-ndjson")
+
         papers = await fetcher.fetch_papers(
             decoded_topic,
             max_results=max_results,
-            years=years
+            years=years,
+            before=before
+        )
+
+        logger.info("Final response contains %d papers", len(papers))
+        more = papers and await fetcher.has_more(decoded_topic, years, papers[-1])
+        return FastJSONResponse({
+            "status": "success",
+            "papers": [paper_json(paper) for paper in papers],
+            "total_papers": len(papers),
+            "next_cursor": encode_cursor(papers[-1]) if more else None
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Search error: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/chat/{topic}")
+async def chat_about_papers(topic: str, request: ChatRequest, http_request: Request):
+    try:
+        decoded_topic = unquote(topic)
+        logger.info("Processing chat for topic: %s", decoded_topic)
+        timer = StageTimer()
+
+        session = None
+        if request.session_id is not None:
+            session = await sessions_call(chat_sessions.get, request.session_id) if chat_sessions.enabled else None
+            if session is None or session.topic != decoded_topic:
+                raise HTTPException(status_code=404, detail="Chat session not found or expired. Start a new one without session_id.")
+        elif chat_sessions.enabled:
+            session = await sessions_call(chat_sessions.create, decoded_topic, request.years)
+        if session is not None and not await sessions_call(chat_sessions.begin_turn, session):
+            raise HTTPException(status_code=409, detail="The previous message in this session is still being answered.")
+
+        streaming = False
+        try:
+            response = await answer_chat(decoded_topic, request, session, timer, http_request)
+            streaming = isinstance(response, StreamingResponse)
+            return response
+        finally:
+            if session is not None and not streaming:
+                await sessions_call(chat_sessions.end_turn, session)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Chat error: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def answer_chat(topic: str, request: ChatRequest, session: Optional[ChatSession], timer: StageTimer,
+                      http_request: Request):
+    session_id = session.id if session is not None else None
+    max_deadline = fetcher.config.get("llm_scheduler", {}).get("deadline_seconds", 240)
+    deadline = time.monotonic() + min(request.deadline_seconds or max_deadline, max_deadline)
+    priority = PRIORITIES[request.priority]
+    follow_up = session is not None and bool(session.history)
+
+    vector = None
+    if not follow_up:
+        # Follow-ups depend on the conversation, so only first questions
+        # are answered from (and stored in) the answer cache
+        answer_topic = topic if request.years is None else f"{topic}|{request.years}"
+        with timer.stage("answer_cache"):
+            vector = await answer_cache.embed_question(request.message)
+            cached = None
+            if vector is not None:
+                fingerprint = await topic_fingerprint(topic, request.years)
+                cached = answer_cache.lookup(answer_topic, fingerprint, vector)
+        if cached is not None:
+            logger.info("Answer cache hit (similarity %s): %s", cached["similarity"], cached["question"])
+            if session is not None:
+                session.record_turn(request.message, cached["response"], None)
+            if request.stream:
+                lines = replay_answer(cached, session_id)
+                if session is not None:
+                    lines = end_turn_after(lines, session)
+                return StreamingResponse(lines, media_type="application/x-ndjson")
+            response = {
+                "status": "success",
+                "response": cached["response"],
+                "sources": cached["sources"],
+                "cached": True
+            }
+            if session_id is not None:
+                response["session_id"] = session_id
+            return response
+
+    with timer.stage("context"):
+        if follow_up:
+            prompt, context_tokens = await follow_up_prompt(session, request.message)
+            sources = session.sources
+        else:
+            context, sources = await build_chat_context(topic, request.message, request.years)
+            prompt, context_tokens = build_prompt(context, request.message), None
+            CHAT_TURNS.inc(kind="first")
+            if session is not None:
+                session.papers, session.sources = context, sources
+
+    def complete(response_text: str, final: Dict):
+        if vector is not None:
+            answer_cache.store(answer_topic, fingerprint, vector, request.message, response_text, sources)
+        if session is not None:
+            session.record_turn(request.message, response_text, final.get("context"))
+
+    if request.stream:
+        # Turn the request away with a status code while that is still
+        # possible; once streaming, errors can only be reported in the body
+        try:
+            ollama.scheduler.admit(priority, deadline)
+        except SchedulerError as e:
+            raise scheduler_http_error(e)
+        lines = stream_chat(prompt, sources, complete, timer, context_tokens, session_id, priority, deadline)
+        if session is not None:
+            lines = end_turn_after(lines, session)
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
+    try:
+        with timer.stage("ollama"):
+            data = await until_disconnected(
+                http_request, ollama.generate(prompt, OLLAMA_OPTIONS, context_tokens, priority, deadline)
+            )
+        logger.info("Chat answer: %s", timer.summary())
+        response_text = data.get("response", "")
+
+        # Clean up and format the response
+        response_text = response_text.strip()
+        if not response_text:
+            return {
+                "status": "error",
+                "response": "I apologize, but I couldn't generate a proper response based on the papers."
+            }
+
+        # Format enumerated lists properly
+        if response_text.startswith("1."):
+            response_text = "\n" + response_text
+
+        complete(response_text, data)
+
+        response = {
+            "status": "success",
+            "response": response_text,
+            "sources": sources
+        }
+        if session_id is not None:
+            response["session_id"] = session_id
+        return response
+
+    except ClientDisconnected:
+        logger.info("Client disconnected, generation cancelled")
+        CHAT_CANCELLED.inc(mode="generate")
+        raise HTTPException(status_code=499, detail="Client closed request")
+    except SchedulerError as e:
+        raise scheduler_http_error(e)
+    except OllamaError as e:
+        logger.error("Error from Ollama: %s", e.detail)
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=f"Ollama error: {e.detail}"
+        )
+    except (httpx.TimeoutException, TimeoutError):
+        raise HTTPException(
+            status_code=504, 
+            detail="The model is taking too long to respond. Please try again."
+        )
+    except httpx.ConnectError:
+        raise HTTPException(
+            status_code=503, 
+            detail="Unable to connect to the AI model service. Please check if Ollama is running."
+        )
+    except Exception as e:
+        logger.error("Unexpected error when calling Ollama: %s", e)
+        raise HTTPException(
+            status_code=500, 
+            detail="An error occurred while processing your request."
+        )
+
+@app.get("/api/chat/sessions/{session_id}")
+async def get_chat_session(session_id: str):
+    session = await sessions_call(chat_sessions.get, session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Chat session not found or expired")
+    return session.summary()
+
+@app.delete("/api/chat/sessions/{session_id}")
+async def delete_chat_session(session_id: str):
+    if not await sessions_call(chat_sessions.delete, session_id):
+        raise HTTPException(status_code=404, detail="Chat session not found or expired")
+    return {"status": "deleted"}
+
+@app.post("/api/summaries/{topic}", status_code=202)
+async def start_summary(topic: str, request: SummaryRequest):
+    # Runs in the background; poll /api/summaries/jobs/{job_id} for the result
+    if not summarizer.enabled:
+        raise HTTPException(status_code=404, detail="Topic summaries are disabled")
+    summaries_config = fetcher.config.get("summaries", {})
+    max_papers = min(request.max_papers or summaries_config.get("max_papers", 50),
+                     summaries_config.get("max_papers_limit", 200))
+    job = await summarizer.start(unquote(topic), min(request.years, 10), max(max_papers, 1))
+    return job.to_dict()
+
+@app.get("/api/summaries/jobs/{job_id}")
+async def get_summary(job_id: str):
+    job = await summarizer.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Summary job not found")
+    return FastJSONResponse(job)
+
+@app.get("/api/papers/search")
+async def search_local_papers(q: str, years: Optional[int] = None, author: Optional[str] = None, limit: int = 20):
+    try:
+        start = None
+        if years:
+            start = to_timestamp(datetime.now(timezone.utc) - timedelta(days=years*365))
+        papers = await asyncio.to_thread(
+            fetcher.store.search, q, start=start, author=author, limit=min(limit, 100)
         )
-        print(f"Retrieved {len(papers)} papers")
-        
         response = [
             {
+                "arxiv_id": paper["arxiv_id"],
                 "title": paper["title"],
                 "authors": paper["authors"],
                 "published": paper["published"].strftime("%Y-%m-%d"),
                 "url": paper["url"],
-                "abstract": paper.get("abstract", "")
+                "abstract": paper["abstract"]
             }
             for paper in papers
         ]
-        
-        print(f"Final response contains {len(response)} papers")
         return {
             "status": "success",
             "papers": response,
             "total_papers": len(response)
         }
-    
+
     except Exception as e:
-        print(f"Search error: {str(e)}")
+        logger.error("Local search error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/chat/{topic}")
-async def chat_about_papers(topic: str, request: ChatRequest):
-    try:
-        decoded_topic = unquote(topic)
-        print(f"Processing chat for topic: {decoded_topic}")
-        
-        # Get context from cached papers
-        context = await fetcher.get_chat_context(decoded_topic)
-        
-        # Enhanced prompt structure
-        prompt = f"""You are a research assistant. Based on the following papers:
+async def caches_stats() -> Dict[str, Dict]:
+    return {
+        "papers": await fetcher._papers_cache.astats(),
+        "paper_records": fetcher.records.stats(),
+        "answers": answer_cache.stats()
+    }
 
-{context}
+@app.get("/api/cache/stats")
+async def cache_stats():
+    return {
+        **await caches_stats(),
+        "arxiv_requests": fetcher._inflight.stats(),
+        "chat_sessions": await sessions_call(chat_sessions.stats),
+        "llm_queue": ollama.scheduler.stats(),
+        "summaries": summarizer.stats()
+    }
 
-User question: {request.message}
+# Gauges are read at scrape time from the objects that already keep the counts.
+# Stats of a shared cache backend are I/O (a COUNT or SCAN), so /metrics
+# gathers those off the event loop first and the gauges read this snapshot
+scraped = {"caches": {}, "chat_sessions": 0}
 
-Please provide a detailed and specific response focusing on the content of these papers. If summarizing advancements, list them point by point with specific details from the papers."""
+for field, documentation in (("size", "Entries held by each cache"),
+                             ("hits", "Lookups answered by each cache"),
+                             ("misses", "Lookups each cache could not answer"),
+                             ("hit_rate", "Fraction of lookups answered by each cache")):
+    REGISTRY.gauge(
+        f"research_assistant_cache_{'entries' if field == 'size' else field}",
+        documentation,
+        ["cache"],
+        callback=lambda field=field: {(name,): stats[field] for name, stats in scraped["caches"].items()}
+    )
+REGISTRY.gauge(
+    "research_assistant_chat_sessions",
+    "Open chat sessions",
+    callback=lambda: {(): scraped["chat_sessions"]}
+)
+REGISTRY.gauge(
+    "research_assistant_upstream_in_flight",
+    "Requests currently being served by each upstream",
+    ["upstream"],
+    callback=lambda: {("arxiv",): fetcher._inflight.stats()["in_flight"], ("ollama",): ollama.scheduler.in_flight}
+)
+REGISTRY.gauge(
+    "research_assistant_upstream_waiting",
+    "Requests waiting for a free upstream slot",
+    ["upstream"],
+    callback=lambda: {("ollama",): ollama.scheduler.queued}
+)
+REGISTRY.gauge(
+    "research_assistant_llm_queue_depth",
+    "Generations waiting for a model slot, by priority",
+    ["priority"],
+    callback=lambda: {(name,): depth for name, depth in ollama.scheduler.queue_depth().items()}
+)
+REGISTRY.gauge(
+    "research_assistant_upstream_limit",
+    "Maximum concurrent requests to each upstream",
+    ["upstream"],
+    callback=lambda: {("arxiv",): fetcher._arxiv_executor._max_workers, ("ollama",): ollama.scheduler.max_concurrent}
+)
 
-        try:
-            # Modified Ollama request
-            response = requests.post(
-                "http://localhost:11434/api/generate",
-                json={
-                    "model": "research_assistant:latest",
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.7,
-                        "num_predict": 2048,  # Increased for longer responses
-                        "num_ctx": 4096,      # Increased context window
-                        "stop": ["User:", "Human:", "<|im_end|>"]  # Better stop tokens
-                    }
-                },
-                timeout=240
-            )
-            
-            print(f"Ollama response status: {response.status_code}")
-            
-            if response.status_code == 200:
-                data = response.json()
-                response_text = data.get("response", "")
-                
-                # Clean up and format the response
-                response_text = response_text.strip()
-                if not response_text:
-                    return {
-                        "status": "error",
-                        "response": "I apologize, but I couldn't generate a proper response based on the papers."
-                    }
-                
-                # Format enumerated lists properly
-                if response_text.startswith("1."):
-                    response_text = "\n" + response_text
-                
-                return {
-                    "status": "success",
-                    "response": response_text
-                }
-            else:
-                print(f"Error from Ollama: {response.text}")
-                raise HTTPException(
-                    status_code=response.status_code, 
-                    detail=f"Ollama error: {response.text}"
-                )
-                
-        except requests.exceptions.Timeout:
-            raise HTTPException(
-                status_code=504, 
-                detail="The model is taking too long to respond. Please try again."
-            )
-        except requests.exceptions.ConnectionError:
-            raise HTTPException(
-                status_code=503, 
-                detail="Unable to connect to the AI model service. Please check if Ollama is running."
-            )
-        except Exception as e:
-            print(f"Unexpected error when calling Ollama: {str(e)}")
-            raise HTTPException(
-                status_code=500, 
-                detail="An error occurred while processing your request."
-            )
-            
-    except Exception as e:
-        print(f"Chat error: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+@app.get("/metrics")
+async def metrics():
+    scraped["caches"] = await caches_stats()
+    scraped["chat_sessions"] = (await sessions_call(chat_sessions.stats))["size"]
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/health/live")
+async def liveness():
+    # Answered straight from the event loop; no upstream is consulted
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    if not startup["ready"]:
+        return JSONResponse({"status": "starting", "warmup": startup["warmup"]}, status_code=503)
+    return {"status": "ready", "warmup": startup["warmup"]}
 
 @app.get("/health")
 async def health_check():
+    probes = {"live": True, "ready": startup["ready"], "warmup": startup["warmup"]}
     try:
-        response = await asyncio.to_thread(
-            requests.get,
-            "http://localhost:11434/api/tags",
-            timeout=5
-        )
-        if response.status_code == 200:
-            data = response.json()
-            models = data.get("models", [])
-            has_model = any(model["name"].startswith("research_assistant") for model in models)
-            return {
-                "status": "healthy",
-                "services": {
-                    "ollama": "running",
-                    "model_loaded": has_model
-                }
+        data = await ollama.tags()
+        models = data.get("models", [])
+        has_model = any(model["name"].startswith(ollama.model) for model in models)
+        return {
+            "status": "healthy",
+            **probes,
+            "services": {
+                "ollama": "running",
+                "model_loaded": has_model
             }
+        }
+    except OllamaError:
         return {
             "status": "unhealthy",
+            **probes,
             "error": "Ollama service not responding correctly"
         }
     except Exception as e:
         return {
             "status": "unhealthy",
+            **probes,
             "error": str(e)
         }
 
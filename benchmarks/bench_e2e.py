@@ -0,0 +1,273 @@
+"""End-to-end latency and throughput of the API and the ingestion path.
+
+Runs app.py under uvicorn against the fake arXiv/Ollama servers and drives
+concurrent load through these phases:
+
+    research_cold  /api/research for topics not seen before (arXiv round trip)
+    research_warm  the same searches again (served from cache)
+    research_stream streamed /api/research for new topics: time to the
+                   first paper and to the full list
+    research_batch one POST /api/research with the cached topics, new ones
+                   and a second window of each new one: time to the first
+                   topic and to the last
+    chat           non-streaming /api/chat
+    chat_stream    streaming /api/chat: time to first token and full answer
+    chat_follow_up a second question in each chat's session, sent with the
+                   context Ollama returned (set --prefill-tokens-per-second
+                   to make the fake model charge for prompt tokens)
+    ingest         rag/data.py download of fake PDFs, then embedding into
+                   the memmap vector store (needs the embedding model)
+
+The answer cache and vector retrieval are off so every chat reaches the
+model. Results go to benchmarks/results/e2e-<commit>.json; --compare
+prints the change against an earlier run.
+
+    python benchmarks/bench_e2e.py --concurrency 8 --requests 64
+    python benchmarks/bench_e2e.py --compare benchmarks/results/e2e-1a2b3c4.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import httpx
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_upstreams import FakeUpstreams, UpstreamSettings
+from harness import save_results, start_server, summarize, write_config
+
+
+async def drive(send, n_requests, concurrency):
+    """Run ``send(i)`` for i in range(n_requests), ``concurrency`` at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await send(i)
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n_requests)))
+    wall = time.perf_counter() - start
+    return {
+        **(summarize(latencies) if latencies else {"count": 0}),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 2)
+    }
+
+
+async def run_api(args, base_url):
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, timeout=600) as client:
+        async def research(i):
+            response = await client.post(f"/api/research/benchmark topic {i}", json={"topic": f"benchmark topic {i}"})
+            response.raise_for_status()
+
+        results["research_cold"] = await drive(research, args.requests, args.concurrency)
+        results["research_warm"] = await drive(research, args.requests, args.concurrency)
+
+        first_paper = []
+
+        async def research_stream(i):
+            # Trees without streamed search send one JSON body: its first
+            # line is then the whole response
+            start = time.perf_counter()
+            async with client.stream("POST", f"/api/research/stream topic {i}",
+                                     json={"topic": f"stream topic {i}", "stream": True}) as response:
+                response.raise_for_status()
+                first = None
+                async for line in response.aiter_lines():
+                    first = first or (line and time.perf_counter())
+            first_paper.append(first - start)
+
+        results["research_stream"] = await drive(research_stream, args.requests, args.concurrency)
+        if first_paper:
+            results["research_stream"]["time_to_first_paper"] = summarize(first_paper)
+
+        first_topic = []
+
+        async def research_batch(i):
+            # The cached topics from research_warm plus as many new ones,
+            # each also asked for with a shorter window
+            topics = [{"topic": f"benchmark topic {n}"} for n in range(args.requests)]
+            topics += [{"topic": f"batch topic {i} {n}", "years": years}
+                       for n in range(args.requests) for years in (5, 2)]
+            start = time.perf_counter()
+            first = None
+            async with client.stream("POST", "/api/research", json={"topics": topics}) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    first = first or (line and time.perf_counter())
+            first_topic.append(first - start)
+
+        results["research_batch"] = await drive(research_batch, max(args.requests // 8, 1), 1)
+        if first_topic:
+            results["research_batch"]["time_to_first_topic"] = summarize(first_topic)
+
+        sessions = {}
+
+        async def chat(i):
+            response = await client.post(f"/api/chat/benchmark topic {i % args.requests}",
+                                         json={"message": f"Summarize the advances ({i})"})
+            response.raise_for_status()
+            sessions[i] = response.json().get("session_id")
+
+        results["chat"] = await drive(chat, args.chats, args.concurrency)
+
+        async def follow_up(i):
+            response = await client.post(f"/api/chat/benchmark topic {i % args.requests}",
+                                         json={"message": f"Which of these is most practical? ({i})",
+                                               "session_id": sessions[i]})
+            response.raise_for_status()
+
+        results["chat_follow_up"] = await drive(follow_up, args.chats, args.concurrency)
+
+        first_token, token_rates = [], []
+
+        async def chat_stream(i):
+            start = time.perf_counter()
+            first, tokens = None, 0
+            async with client.stream("POST", f"/api/chat/benchmark topic {i % args.requests}",
+                                     json={"message": f"List the key results ({i})", "stream": True}) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if "error" in chunk:
+                        raise RuntimeError(chunk["error"])
+                    if "token" in chunk:
+                        tokens += 1
+                        first = first or time.perf_counter()
+            if first is None:
+                raise RuntimeError("no tokens streamed")
+            first_token.append(first - start)
+            if tokens > 1:
+                token_rates.append(tokens / (time.perf_counter() - first))
+
+        results["chat_stream"] = await drive(chat_stream, args.chats, args.concurrency)
+        if first_token:
+            results["chat_stream"]["time_to_first_token"] = summarize(first_token)
+            results["chat_stream"]["tokens_per_second"] = round(sum(token_rates) / max(len(token_rates), 1), 2)
+    return results
+
+
+def run_ingest(args, config_path):
+    """Download ``args.papers`` fake PDFs and embed them the way rag/data.py does."""
+    from rag.data import RAG
+
+    with open(config_path) as f:
+        config = yaml.safe_load(f)
+    rag = RAG(config, llm=None)
+    download = rag.download_papers("ingest benchmark", config["data_path"], max_results=args.papers)
+    try:
+        stats = rag.ingest()
+    except ImportError as e:
+        return {"download": download, "error": f"embedding model unavailable: {e}"}
+    download.pop("papers", None)
+    return {
+        "download": download,
+        "ingest": stats,
+        "chunks_per_second": round(stats["chunks"] / stats["seconds"], 2) if stats["seconds"] else 0.0,
+        # Peak of this process (parser workers not included); should not grow with --papers
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nChange vs {baseline['commit']} ({baseline_path}):")
+    for phase, stats in current.items():
+        before = baseline["results"].get(phase)
+        if not isinstance(stats, dict) or not isinstance(before, dict):
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+            if metric in stats and before.get(metric):
+                change = (stats[metric] - before[metric]) / before[metric] * 100
+                print(f"  {phase:<14} {metric:<15} {before[metric]:>10} -> {stats[metric]:>10} ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight")
+    parser.add_argument("--requests", type=int, default=64, help="Searches per research phase")
+    parser.add_argument("--chats", type=int, default=16, help="Requests per chat phase")
+    parser.add_argument("--papers", type=int, default=20, help="PDFs downloaded and ingested")
+    parser.add_argument("--no-ingest", action="store_true", help="Skip the ingestion phase")
+    parser.add_argument("--arxiv-latency", type=float, default=0.5, help="Seconds per fake arXiv query")
+    parser.add_argument("--arxiv-seconds-per-result", type=float, default=0.01,
+                        help="Extra fake arXiv time per result asked for (page size)")
+    parser.add_argument("--ttft", type=float, default=1.0, help="Fake model time to first token (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=50, help="Fake model decode rate")
+    parser.add_argument("--prefill-tokens-per-second", type=float, default=0,
+                        help="Fake model prompt processing rate; 0 = only the fixed --ttft")
+    parser.add_argument("--response-tokens", type=int, default=100, help="Tokens per fake answer")
+    parser.add_argument("--output", type=str, help="Results file (default: benchmarks/results/e2e-<commit>.json)")
+    parser.add_argument("--compare", type=str, help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    settings = UpstreamSettings(arxiv_latency=args.arxiv_latency, prefill_latency=args.ttft,
+                                arxiv_seconds_per_result=args.arxiv_seconds_per_result,
+                                tokens_per_second=args.tokens_per_second,
+                                response_tokens=args.response_tokens,
+                                prefill_tokens_per_second=args.prefill_tokens_per_second)
+    with FakeUpstreams(settings) as upstreams, tempfile.TemporaryDirectory() as tmp:
+        config_path = write_config(upstreams.url, tmp, {
+            "answer_cache": {"enabled": False},
+            "retrieval": {"enabled": False},
+            "vector_store": {"backend": "memmap"},
+            "rate_limit": {"delay_seconds": 0},
+            # research_batch sends each research phase's topics three times over
+            "search": {"max_batch_topics": 3 * args.requests}
+        })
+        os.environ["RESEARCH_ASSISTANT_CONFIG"] = config_path
+        import app
+        server, base_url = start_server(app.app)
+        try:
+            results = asyncio.run(run_api(args, base_url))
+        finally:
+            server.should_exit = True
+        if not args.no_ingest:
+            results["ingest"] = run_ingest(args, config_path)
+        results["upstream_calls"] = dict(settings.counters)
+
+    results["settings"] = vars(args)
+    for phase in ("research_cold", "research_warm", "research_stream", "research_batch", "chat", "chat_follow_up", "chat_stream"):
+        stats = results[phase]
+        print(f"{phase:<14} p50={stats.get('p50_ms')}ms p95={stats.get('p95_ms')}ms p99={stats.get('p99_ms')}ms "
+              f"{stats['throughput_rps']} req/s, {stats['errors']} errors")
+    if "time_to_first_paper" in results["research_stream"]:
+        ttfp = results["research_stream"]["time_to_first_paper"]
+        print(f"{'':<14} time to first paper p50={ttfp['p50_ms']}ms p99={ttfp['p99_ms']}ms")
+    if "time_to_first_topic" in results["research_batch"]:
+        ttft = results["research_batch"]["time_to_first_topic"]
+        print(f"{'':<14} time to first topic p50={ttft['p50_ms']}ms")
+    if "time_to_first_token" in results["chat_stream"]:
+        ttft = results["chat_stream"]["time_to_first_token"]
+        print(f"{'':<14} time to first token p50={ttft['p50_ms']}ms p99={ttft['p99_ms']}ms, "
+              f"{results['chat_stream']['tokens_per_second']} tokens/s")
+    if "ingest" in results:
+        ingest = results["ingest"]
+        print(f"{'ingest':<14} {ingest['download']['papers_per_second']} papers/s downloaded, "
+              + (f"{ingest['chunks_per_second']} chunks/s embedded, peak rss {ingest['max_rss_mb']}MB" if "ingest" in ingest else ingest["error"]))
+    print(f"Results written to {save_results('e2e', results, args.output)}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
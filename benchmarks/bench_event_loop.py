@@ -0,0 +1,82 @@
+"""Check that slow upstream calls don't stall the event loop.
+
+Runs app.py under uvicorn against fake arXiv/Ollama servers, then measures
+/health and a cached /api/research search twice: once while idle and once
+while several chats (and uncached searches) are in flight.
+
+    python benchmarks/bench_event_loop.py --chats 8 --probes 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_upstreams import FakeUpstreams, UpstreamSettings
+from harness import save_results, start_server, summarize, write_config
+
+
+async def probe(client, n_probes):
+    latencies = {"health": [], "cached_search": []}
+    for _ in range(n_probes):
+        start = time.perf_counter()
+        await client.get("/health")
+        latencies["health"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await client.post("/api/research/warm topic", json={"topic": "warm topic"})
+        latencies["cached_search"].append(time.perf_counter() - start)
+    return {name: summarize(values) for name, values in latencies.items()}
+
+
+async def run(args, base_url):
+    async with httpx.AsyncClient(base_url=base_url, timeout=600) as client:
+        await client.post("/api/research/warm topic", json={"topic": "warm topic"})
+        idle = await probe(client, args.probes)
+
+        background = [
+            client.post(f"/api/chat/topic {i}", json={"message": "Summarize recent advances"})
+            for i in range(args.chats)
+        ] + [
+            client.post(f"/api/research/cold topic {i}", json={"topic": f"cold topic {i}"})
+            for i in range(args.chats)
+        ]
+        load_task = asyncio.gather(*background)
+        await asyncio.sleep(0.2)
+        loaded = await probe(client, args.probes)
+        await load_task
+    return {"idle": idle, "under_load": loaded}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chats", type=int, default=8, help="Concurrent chat requests in flight")
+    parser.add_argument("--probes", type=int, default=200, help="Probe requests per phase")
+    parser.add_argument("--output", type=str, help="Results file (default: benchmarks/results/event_loop-<commit>.json)")
+    args = parser.parse_args()
+
+    settings = UpstreamSettings(arxiv_latency=1.0, prefill_latency=2.0,
+                                tokens_per_second=20, response_tokens=100)
+    with FakeUpstreams(settings) as upstreams, tempfile.TemporaryDirectory() as tmp:
+        os.environ["RESEARCH_ASSISTANT_CONFIG"] = write_config(upstreams.url, tmp)
+        import app
+        server, base_url = start_server(app.app)
+        try:
+            results = asyncio.run(run(args, base_url))
+        finally:
+            server.should_exit = True
+
+    for phase, probes in results.items():
+        for name, stats in probes.items():
+            print(f"{phase:>11} {name:<14} p50={stats['p50_ms']:>8}ms "
+                  f"p95={stats['p95_ms']:>8}ms p99={stats['p99_ms']:>8}ms")
+    print(f"Results written to {save_results('event_loop', results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
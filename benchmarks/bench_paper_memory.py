@@ -0,0 +1,102 @@
+"""Memory held per cached topic by the paper and chat-context caches.
+
+Fills the caches of app.py's fetcher with ``--topics`` topics against the
+fake arXiv, where each topic's papers overlap with those of its neighbours
+(``--spread``: the smaller, the more topics a paper shows up in). Every
+topic is searched for 20 papers, as the research page does, and chatted
+about with the default 10, as /api/chat does. Reports the Python heap
+growth (tracemalloc) per topic, and how long the same lookups take once
+everything is cached.
+
+Run it on two commits to compare; results go to
+benchmarks/results/paper-memory-<commit>.json.
+
+    python benchmarks/bench_paper_memory.py --topics 500 --spread 1000
+"""
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from fake_upstreams import FakeUpstreams, UpstreamSettings
+from harness import ROOT, save_results, summarize, write_config
+
+
+async def fill(fetcher, topics):
+    listed = []
+    for topic in topics:
+        papers = await fetcher.fetch_papers(topic, max_results=20, years=5)
+        await fetcher.get_chat_context(topic)
+        listed += [paper["arxiv_id"] for paper in papers]
+    return listed
+
+
+async def lookups(fetcher, topics):
+    latencies = []
+    for topic in topics:
+        start = time.perf_counter()
+        await fetcher.fetch_papers(topic, max_results=20, years=5)
+        await fetcher.get_chat_context(topic)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--topics", type=int, default=300, help="Topics cached")
+    parser.add_argument("--spread", type=int, default=600,
+                        help="Papers over which topics' results are spread (smaller = more overlap)")
+    parser.add_argument("--output", type=str, help="Results file (default: benchmarks/results/paper-memory-<commit>.json)")
+    args = parser.parse_args()
+
+    settings = UpstreamSettings(arxiv_latency=0, arxiv_total=10 ** 6, arxiv_topic_spread=args.spread)
+    with FakeUpstreams(settings) as upstreams, tempfile.TemporaryDirectory() as tmp:
+        os.environ["RESEARCH_ASSISTANT_CONFIG"] = write_config(upstreams.url, tmp, {
+            "cache": {"backend": "memory", "max_entries": 4 * args.topics},
+            "rate_limit": {"delay_seconds": 0},
+            "warmup": {"enabled": False}
+        })
+        sys.path.insert(0, ROOT)
+        import app
+
+        app.create_services(os.environ["RESEARCH_ASSISTANT_CONFIG"])
+        topics = [f"memory topic {n}" for n in range(args.topics)]
+
+        async def run():
+            # One topic first so lazy imports and pools don't count
+            await fill(app.fetcher, ["warm-up topic"])
+            gc.collect()
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            listed = await fill(app.fetcher, topics)
+            gc.collect()
+            held = tracemalloc.get_traced_memory()[0] - before
+            tracemalloc.stop()
+            return listed, held, await lookups(app.fetcher, topics)
+
+        listed, held, latencies = asyncio.run(run())
+
+    results = {
+        "topics": args.topics,
+        "papers_listed": len(listed),
+        "distinct_papers": len(set(listed)),
+        "topics_per_paper": round(len(listed) / max(len(set(listed)), 1), 2),
+        "heap_mb": round(held / 2 ** 20, 2),
+        "bytes_per_topic": round(held / args.topics),
+        "cached_lookup": summarize(latencies),
+        "settings": vars(args)
+    }
+    print(f"{args.topics} topics, {results['distinct_papers']} distinct papers "
+          f"(each in {results['topics_per_paper']} topics on average)")
+    print(f"heap held by the caches: {results['heap_mb']}MB, {results['bytes_per_topic']} bytes per topic")
+    print(f"cached search + chat context p50={results['cached_lookup']['p50_ms']}ms "
+          f"p99={results['cached_lookup']['p99_ms']}ms")
+    print(f"Results written to {save_results('paper-memory', results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
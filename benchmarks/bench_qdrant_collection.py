@@ -0,0 +1,130 @@
+"""Compare Qdrant collection layouts: memory per million chunks and query latency.
+
+Each profile builds a collection through rag.qdrant_collection with random
+unit vectors carrying the payload the ingestor writes (published, arxiv_id,
+topic), then times unfiltered and date-filtered searches.
+
+By default this runs against Qdrant's local in-memory mode, which ignores
+quantization and on-disk settings; its RSS delta is reported as measured,
+while the server-side figure is estimated from the collection settings.
+Point --url at a running Qdrant to time the real thing.
+
+    python benchmarks/bench_qdrant_collection.py --chunks 20000 --dim 384
+    python benchmarks/bench_qdrant_collection.py --url http://localhost:6333
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import qdrant_client
+from qdrant_client.http import models as rest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from harness import save_results, summarize
+from rag.qdrant_collection import QdrantCollection, collection_info
+
+PROFILES = {
+    "float32_in_ram": {"quantization": "none", "vectors_on_disk": False, "payload_on_disk": False},
+    "int8_on_disk": {"quantization": "int8", "vectors_on_disk": True, "payload_on_disk": True},
+    "binary_on_disk": {"quantization": "binary", "vectors_on_disk": True, "payload_on_disk": True},
+}
+
+
+def rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def estimated_mb_per_million(settings, dim, hnsw_m=16):
+    # Vector bytes that have to stay in RAM, plus the HNSW links, with the
+    # ~1.5x overhead Qdrant's capacity planning guide uses
+    quantized = {"int8": dim, "binary": dim / 8}.get(settings["quantization"], 0)
+    originals = 0 if settings["vectors_on_disk"] else dim * 4
+    links = hnsw_m * 2 * 4
+    return round(1.5 * (quantized + originals + links) * 1e6 / 2 ** 20, 1)
+
+
+def build(client, name, settings, vectors, batch_size=1024):
+    config = {"collection_name": name, "qdrant": settings}
+    if collection_info(client, name) is not None:
+        client.delete_collection(name)
+    QdrantCollection(client, config).ensure(vectors.shape[1])
+
+    rng = np.random.default_rng(1)
+    published = rng.integers(2015, 2025, len(vectors)) * 10000 + 101
+    for start in range(0, len(vectors), batch_size):
+        client.upsert(collection_name=name, points=[
+            rest.PointStruct(id=i, vector=vectors[i].tolist(), payload={
+                "published": int(published[i]),
+                "arxiv_id": f"{2000 + i // 1000}.{i % 100000:05d}",
+                "topic": [f"topic {i % 20}"]
+            })
+            for i in range(start, min(start + batch_size, len(vectors)))
+        ])
+
+
+def time_queries(client, name, queries, top_k, query_filter=None):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        client.search(
+            collection_name=name, query_vector=query.tolist(), limit=top_k,
+            query_filter=query_filter,
+            search_params=rest.SearchParams(
+                hnsw_ef=128, quantization=rest.QuantizationSearchParams(rescore=True, oversampling=2.0)
+            )
+        )
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=20000, help="Points per collection")
+    parser.add_argument("--dim", type=int, default=384, help="Vector dimension (384 = all-MiniLM-L6-v2)")
+    parser.add_argument("--queries", type=int, default=200, help="Searches per measurement")
+    parser.add_argument("--top-k", type=int, default=8)
+    parser.add_argument("--url", type=str, help="Qdrant server; local in-memory mode if omitted")
+    parser.add_argument("--output", type=str, help="Results file (default: benchmarks/results/<name>-<commit>.json)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.chunks, args.dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = vectors[rng.integers(0, args.chunks, args.queries)] + 0.05 * rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    recent = rest.Filter(must=[rest.FieldCondition(key="published", range=rest.Range(gte=20220101))])
+
+    results = {"chunks": args.chunks, "dim": args.dim, "mode": args.url or "local in-memory", "profiles": {}}
+    for name, settings in PROFILES.items():
+        client = qdrant_client.QdrantClient(url=args.url) if args.url else qdrant_client.QdrantClient(location=":memory:")
+        collection = f"bench_{name}"
+        before = rss_bytes()
+        start = time.perf_counter()
+        build(client, collection, settings, vectors)
+        build_seconds = time.perf_counter() - start
+        profile = {
+            "build_seconds": round(build_seconds, 2),
+            "estimated_server_mb_per_million": estimated_mb_per_million(settings, args.dim),
+            "search": time_queries(client, collection, queries, args.top_k),
+            "search_since_2022": time_queries(client, collection, queries, args.top_k, recent),
+        }
+        if not args.url:
+            profile["measured_local_mb_per_million"] = round((rss_bytes() - before) / args.chunks * 1e6 / 2 ** 20, 1)
+        results["profiles"][name] = profile
+        client.delete_collection(collection)
+        client.close()
+
+    for name, profile in results["profiles"].items():
+        print(f"{name:<15} ~{profile['estimated_server_mb_per_million']:>7} MB/1M chunks (server, est.)"
+              + (f" {profile['measured_local_mb_per_million']:>7} MB/1M (local, measured)" if not args.url else "")
+              + f"  search p50={profile['search']['p50_ms']}ms p99={profile['search']['p99_ms']}ms"
+              + f"  filtered p50={profile['search_since_2022']['p50_ms']}ms p99={profile['search_since_2022']['p99_ms']}ms")
+    print(f"Results written to {save_results('qdrant_collection', results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
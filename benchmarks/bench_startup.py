@@ -0,0 +1,145 @@
+"""Startup cost of app.py: import time and memory, and time until the server is live and ready.
+
+    import   ``import app`` in a fresh interpreter, repeated; also lists which
+             heavy libraries (torch, llama_index, qdrant_client, ...) it pulled in
+    server   uvicorn serving app:app against the fake upstreams: seconds until
+             /health/live answers, until /health/ready does (warm-up done),
+             and the server's RSS at that point
+
+Run it on two commits to compare; results go to
+benchmarks/results/startup-<commit>.json.
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from fake_upstreams import FakeUpstreams, UpstreamSettings
+from harness import ROOT, save_results, summarize, write_config
+
+HEAVY_MODULES = ("torch", "sentence_transformers", "langchain_community", "llama_index.core",
+                 "qdrant_client", "transformers", "tqdm")
+
+IMPORT_PROBE = f"""
+import json, sys, time
+def rss_mb():
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) / 1024 for line in f if line.startswith("VmRSS"))
+before = rss_mb()
+start = time.perf_counter()
+import app
+print(json.dumps({{
+    "seconds": time.perf_counter() - start,
+    "rss_mb": rss_mb(),
+    "rss_delta_mb": rss_mb() - before,
+    "modules": len(sys.modules),
+    "heavy": [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+}}))
+"""
+
+
+def process_rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        return next(int(line.split()[1]) / 1024 for line in f if line.startswith("VmRSS"))
+
+
+def measure_import(runs, env):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=ROOT, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "seconds": summarize([sample["seconds"] for sample in samples]),
+        "rss_mb": round(sorted(sample["rss_mb"] for sample in samples)[len(samples) // 2], 1),
+        "rss_delta_mb": round(sorted(sample["rss_delta_mb"] for sample in samples)[len(samples) // 2], 1),
+        "modules": samples[-1]["modules"],
+        "heavy_modules": samples[-1]["heavy"]
+    }
+
+
+def wait_for(url, deadline, ok=(200,)):
+    while time.perf_counter() < deadline:
+        try:
+            response = httpx.get(url, timeout=1)
+            if response.status_code in ok:
+                return response
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(url)
+
+
+def measure_server(env, timeout):
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    base_url = f"http://127.0.0.1:{port}"
+
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = start + timeout
+        # Older trees have no /health/live; fall back to /health
+        live = wait_for(f"{base_url}/health/live", deadline, ok=(200, 404))
+        if live.status_code == 404:
+            wait_for(f"{base_url}/health", deadline)
+            live_seconds = ready_seconds = time.perf_counter() - start
+            warmup = None
+        else:
+            live_seconds = time.perf_counter() - start
+            ready = wait_for(f"{base_url}/health/ready", deadline)
+            ready_seconds = time.perf_counter() - start
+            warmup = ready.json().get("warmup")
+        return {
+            "live_seconds": round(live_seconds, 3),
+            "ready_seconds": round(ready_seconds, 3),
+            "rss_mb": round(process_rss_mb(server.pid), 1),
+            "warmup": warmup
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters / server starts to time")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds to wait for the server")
+    parser.add_argument("--output", type=str, help="Results file (default: benchmarks/results/startup-<commit>.json)")
+    args = parser.parse_args()
+
+    with FakeUpstreams(UpstreamSettings(arxiv_latency=0.5)) as upstreams, tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "RESEARCH_ASSISTANT_CONFIG": write_config(upstreams.url, tmp)}
+        results = {"import": measure_import(args.runs, env)}
+        servers = [measure_server(env, args.timeout) for _ in range(args.runs)]
+        results["server"] = {
+            "live": summarize([run["live_seconds"] for run in servers]),
+            "ready": summarize([run["ready_seconds"] for run in servers]),
+            "rss_mb": round(sorted(run["rss_mb"] for run in servers)[len(servers) // 2], 1),
+            "warmup": servers[-1]["warmup"]
+        }
+
+    imported, server = results["import"], results["server"]
+    print(f"import app     p50={imported['seconds']['p50_ms']}ms  rss={imported['rss_mb']}MB "
+          f"(+{imported['rss_delta_mb']}MB)  {imported['modules']} modules  "
+          f"heavy: {', '.join(imported['heavy_modules']) or 'none'}")
+    print(f"server         live p50={server['live']['p50_ms']}ms  ready p50={server['ready']['p50_ms']}ms  "
+          f"rss={server['rss_mb']}MB")
+    print(f"Results written to {save_results('startup', results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Compare the embedded memmap vector index with Qdrant: recall@k and latency.
+
+For each size, clustered random unit vectors (a stand-in for chunk
+embeddings) are loaded into the memmap index, searched exactly and with
+IVF, and into Qdrant. Recall is measured against brute-force numpy results.
+
+Qdrant runs in local in-memory mode unless --url points at a server; local
+mode is a pure-Python fallback, so it is skipped above --qdrant-max.
+
+    python benchmarks/bench_vector_store.py --sizes 10000,100000
+    python benchmarks/bench_vector_store.py --sizes 10000,100000,1000000 --url http://localhost:6333
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import qdrant_client
+from qdrant_client.http import models as rest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from harness import save_results, summarize
+from rag.memmap_index import MemmapIndex
+from rag.qdrant_collection import collection_info
+
+
+def make_vectors(n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(n // 500, 10), dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), n)] + 0.6 * rng.standard_normal((n, dim), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def ground_truth(vectors, queries, top_k):
+    truth = []
+    for query in queries:
+        scores = vectors @ query
+        truth.append(set(np.argpartition(-scores, top_k)[:top_k].tolist()))
+    return truth
+
+
+def measure(search, queries, truth, top_k):
+    latencies, recall = [], 0.0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = search(query)
+        latencies.append(time.perf_counter() - start)
+        recall += len(set(found[:top_k]) & expected) / top_k
+    return {"recall": round(recall / len(queries), 4), **summarize(latencies)}
+
+
+def bench_memmap(vectors, queries, truth, args, ivf_lists):
+    with tempfile.TemporaryDirectory() as path:
+        index = MemmapIndex(path, vectors.shape[1], ivf_lists=ivf_lists, ivf_probes=args.probes)
+        start = time.perf_counter()
+        for i in range(0, len(vectors), 10000):
+            index.add([{"id": str(j), "vector": vectors[j], "payload": "{}"}
+                       for j in range(i, min(i + 10000, len(vectors)))])
+        if ivf_lists:
+            index.train()
+        build_seconds = time.perf_counter() - start
+
+        # A second handle is what a freshly started worker sees
+        start = time.perf_counter()
+        reader = MemmapIndex(path, vectors.shape[1], ivf_lists=ivf_lists, ivf_probes=args.probes)
+        reader.search(queries[0], args.top_k)
+        open_ms = (time.perf_counter() - start) * 1000
+
+        result = measure(lambda q: [int(hit[0]) for hit in reader.search(q, args.top_k)], queries, truth, args.top_k)
+        return {"build_seconds": round(build_seconds, 2), "open_and_first_query_ms": round(open_ms, 2), **result}
+
+
+def bench_qdrant(vectors, queries, truth, args):
+    client = qdrant_client.QdrantClient(url=args.url) if args.url else qdrant_client.QdrantClient(location=":memory:")
+    name = "bench_vector_store"
+    if collection_info(client, name) is not None:
+        client.delete_collection(name)
+    client.create_collection(name, vectors_config=rest.VectorParams(size=vectors.shape[1], distance=rest.Distance.COSINE))
+    start = time.perf_counter()
+    for i in range(0, len(vectors), 1000):
+        client.upsert(name, points=[rest.PointStruct(id=j, vector=vectors[j].tolist())
+                                    for j in range(i, min(i + 1000, len(vectors)))])
+    build_seconds = time.perf_counter() - start
+
+    def search(query):
+        hits = client.search(name, query_vector=query.tolist(), limit=args.top_k,
+                             search_params=rest.SearchParams(hnsw_ef=128))
+        return [hit.id for hit in hits]
+
+    result = measure(search, queries, truth, args.top_k)
+    client.delete_collection(name)
+    client.close()
+    return {"build_seconds": round(build_seconds, 2), **result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=str, default="10000,100000", help="Comma-separated chunk counts")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--probes", type=int, default=8, help="IVF clusters scanned per query")
+    parser.add_argument("--url", type=str, help="Qdrant server; local in-memory mode if omitted")
+    parser.add_argument("--qdrant-max", type=int, default=100000, help="Largest size to run on local-mode Qdrant")
+    parser.add_argument("--output", type=str, help="Results file (default: benchmarks/results/<name>-<commit>.json)")
+    args = parser.parse_args()
+
+    results = {}
+    for size in [int(s) for s in args.sizes.split(",")]:
+        vectors = make_vectors(size, args.dim)
+        queries = make_vectors(args.queries, args.dim, seed=1)
+        truth = ground_truth(vectors, queries, args.top_k)
+        ivf_lists = max(int(np.sqrt(size)), 16)
+        results[size] = {
+            "memmap_exact": bench_memmap(vectors, queries, truth, args, ivf_lists=0),
+            f"memmap_ivf{ivf_lists}_probe{args.probes}": bench_memmap(vectors, queries, truth, args, ivf_lists),
+        }
+        if args.url or size <= args.qdrant_max:
+            results[size]["qdrant"] = bench_qdrant(vectors, queries, truth, args)
+
+        for backend, stats in results[size].items():
+            print(f"{size:>8} {backend:<24} recall@{args.top_k}={stats['recall']:<6} "
+                  f"p50={stats['p50_ms']:>8}ms p99={stats['p99_ms']:>8}ms build={stats['build_seconds']}s")
+
+    print(f"Results written to {save_results('vector_store', results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
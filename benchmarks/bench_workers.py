@@ -0,0 +1,169 @@
+"""Searches and chat sessions across several uvicorn workers, per cache backend.
+
+Starts ``uvicorn app:app --workers N`` against the fake upstreams once for
+each backend in ``--backends`` (memory: every worker on its own; sqlite:
+one WAL file; redis: the fake Redis server), each with empty stores, and
+sends every request on a new connection so they spread over the workers:
+
+    search   --requests searches over --topics topics, --concurrency at a
+             time: throughput, latency and how many arXiv queries they cost
+    chat     --sessions conversations of --turns messages each, every
+             follow-up sent with the session_id of the first answer: how
+             many found their session (the rest got 404 from a worker that
+             never saw it)
+
+The redis backend needs the redis package. Results go to
+benchmarks/results/workers-<commit>.json.
+
+    python benchmarks/bench_workers.py --workers 4 --backends memory sqlite redis
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from fake_upstreams import FakeRedis, FakeUpstreams, UpstreamSettings
+from harness import ROOT, save_results, summarize, write_config
+
+
+def free_port():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def start_workers(config_path, workers, timeout=120):
+    port = free_port()
+    env = {**os.environ, "RESEARCH_ASSISTANT_CONFIG": config_path}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    # Ready once several requests in a row (likely different workers) succeed
+    ready = 0
+    while ready < 4 * workers:
+        if time.monotonic() > deadline:
+            server.terminate()
+            raise TimeoutError(base_url)
+        try:
+            ready = ready + 1 if httpx.get(f"{base_url}/health/ready", timeout=1).status_code == 200 else 0
+        except httpx.HTTPError:
+            ready = 0
+            time.sleep(0.1)
+    return server, base_url
+
+
+def new_connection(base_url):
+    # No keep-alive: each request is accepted by whichever worker is free
+    return httpx.AsyncClient(base_url=base_url, timeout=60, limits=httpx.Limits(max_keepalive_connections=0))
+
+
+async def run_searches(args, base_url):
+    rng = random.Random(0)
+    topics = [rng.randrange(args.topics) for _ in range(args.requests)]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies, errors = [], 0
+
+    async def search(client, topic):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(f"/api/research/workers topic {topic}",
+                                         json={"topic": f"workers topic {topic}", "max_results": 10, "years": 5})
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200 or not response.json()["papers"]:
+                errors += 1
+
+    async with new_connection(base_url) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(search(client, topic) for topic in topics))
+        elapsed = time.perf_counter() - start
+    return {
+        "requests_per_second": round(args.requests / elapsed, 1),
+        "latency": summarize(latencies),
+        "errors": errors
+    }
+
+
+async def run_chats(args, base_url):
+    async def conversation(client, n):
+        topic = f"workers topic {n % args.topics}"
+        response = await client.post(f"/api/chat/{topic}", json={"message": "What is new?"})
+        session_id = response.json().get("session_id")
+        found = 0
+        for turn in range(args.turns - 1):
+            response = await client.post(f"/api/chat/{topic}",
+                                         json={"message": f"Follow-up {turn}", "session_id": session_id})
+            found += response.status_code != 404
+        return found
+
+    async with new_connection(base_url) as client:
+        found = await asyncio.gather(*(conversation(client, n) for n in range(args.sessions)))
+    follow_ups = args.sessions * (args.turns - 1)
+    return {"follow_ups": follow_ups, "session_found": sum(found),
+            "session_found_rate": round(sum(found) / follow_ups, 4) if follow_ups else 0.0}
+
+
+def run_backend(args, backend, redis_url):
+    settings = UpstreamSettings(arxiv_latency=args.arxiv_latency, prefill_latency=0.05,
+                                tokens_per_second=1000, response_tokens=20)
+    with FakeUpstreams(settings) as upstreams, tempfile.TemporaryDirectory() as tmp:
+        config_path = write_config(upstreams.url, tmp, {
+            "cache": {"backend": backend, "redis_url": redis_url},
+            "answer_cache": {"enabled": False},
+            "retrieval": {"enabled": False},
+            "rate_limit": {"delay_seconds": 0},
+            "warmup": {"enabled": False}
+        })
+        server, base_url = start_workers(config_path, args.workers)
+        try:
+            results = {"search": asyncio.run(run_searches(args, base_url))}
+            results["search"]["arxiv_queries"] = settings.counters["arxiv_queries"]
+            results["chat"] = asyncio.run(run_chats(args, base_url))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4, help="uvicorn worker processes")
+    parser.add_argument("--backends", nargs="+", default=["memory", "sqlite", "redis"],
+                        choices=["memory", "sqlite", "redis"])
+    parser.add_argument("--topics", type=int, default=20, help="Distinct topics searched")
+    parser.add_argument("--requests", type=int, default=400, help="Searches sent")
+    parser.add_argument("--concurrency", type=int, default=32, help="Searches in flight at once")
+    parser.add_argument("--sessions", type=int, default=16, help="Chat conversations at once")
+    parser.add_argument("--turns", type=int, default=4, help="Messages per conversation")
+    parser.add_argument("--arxiv-latency", type=float, default=0.5, help="Seconds per fake arXiv query")
+    parser.add_argument("--output", type=str, help="Results file (default: benchmarks/results/workers-<commit>.json)")
+    args = parser.parse_args()
+
+    results = {"settings": vars(args), "backends": {}}
+    with FakeRedis() as fake_redis:
+        for backend in args.backends:
+            results["backends"][backend] = result = run_backend(args, backend, fake_redis.url)
+            search, chat = result["search"], result["chat"]
+            print(f"{backend:7s} {search['requests_per_second']:7.1f} searches/s  "
+                  f"p50={search['latency']['p50_ms']}ms p99={search['latency']['p99_ms']}ms  "
+                  f"arXiv queries={search['arxiv_queries']} for {args.topics} topics  "
+                  f"errors={search['errors']}  "
+                  f"follow-ups with their session={chat['session_found']}/{chat['follow_ups']}")
+    print(f"Results written to {save_results('workers', results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
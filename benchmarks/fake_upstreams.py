@@ -0,0 +1,356 @@
+"""Local stand-ins for the arXiv export API, arXiv PDFs, the Ollama HTTP API
+and a Redis server.
+
+They run in a background thread on a free localhost port so benchmarks can
+point config.yml at them and measure the app without touching the network.
+"""
+import fnmatch
+import hashlib
+import json
+import socketserver
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+ATOM_HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/" xmlns:arxiv="http://arxiv.org/schemas/atom">
+  <title>fake arXiv query</title>
+  <opensearch:totalResults>{total}</opensearch:totalResults>
+  <opensearch:startIndex>{start}</opensearch:startIndex>
+  <opensearch:itemsPerPage>{count}</opensearch:itemsPerPage>
+"""
+
+ATOM_ENTRY = """  <entry>
+    <id>http://arxiv.org/abs/{arxiv_id}v1</id>
+    <updated>{date}</updated>
+    <published>{date}</published>
+    <title>{title}</title>
+    <summary>{summary}</summary>
+    <author><name>Author {n} A</name></author>
+    <author><name>Author {n} B</name></author>
+    <link href="http://arxiv.org/abs/{arxiv_id}v1" rel="alternate" type="text/html"/>
+    <link title="pdf" href="{pdf_base}/{arxiv_id}v1" rel="related" type="application/pdf"/>
+    <arxiv:primary_category term="cs.CL" scheme="http://arxiv.org/schemas/atom"/>
+    <category term="cs.CL" scheme="http://arxiv.org/schemas/atom"/>
+  </entry>
+"""
+
+
+class UpstreamSettings:
+    """Latencies and rates of the fakes.
+
+    ``prefill_latency`` is the model's time to first token and
+    ``tokens_per_second`` its decode rate. With ``prefill_tokens_per_second``
+    set, prompt tokens add to the time to first token, except those passed
+    back as ``context`` (already in the model's KV cache). ``pdf_pages`` sets
+    how much text each fake paper holds. ``arxiv_seconds_per_result`` makes
+    a query cost more the more results it asks for, as arXiv's does. With
+    ``arxiv_topic_spread`` set, each topic's results start at a different
+    paper (within that many), so topics share some papers, not all.
+    """
+
+    def __init__(self, arxiv_latency=0.5, arxiv_total=200, prefill_latency=2.0,
+                 tokens_per_second=20.0, response_tokens=100, pdf_latency=0.1, pdf_pages=8,
+                 prefill_tokens_per_second=0, arxiv_seconds_per_result=0.0, arxiv_topic_spread=0):
+        self.arxiv_latency = arxiv_latency
+        self.arxiv_seconds_per_result = arxiv_seconds_per_result
+        self.arxiv_topic_spread = arxiv_topic_spread
+        self.arxiv_total = arxiv_total
+        self.prefill_latency = prefill_latency
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.pdf_latency = pdf_latency
+        self.pdf_pages = pdf_pages
+        self.pdf_base = "http://arxiv.org/pdf"
+        self.counters = {"arxiv_queries": 0, "ollama_generations": 0, "ollama_abandoned": 0, "pdf_downloads": 0}
+        self._lock = threading.Lock()
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+
+def make_pdf(pages):
+    """A minimal valid PDF with one line of text per page, parseable by pypdf."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        content = f"BT /F1 10 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+                       b"/Resources << /Font << /F1 3 0 R >> >> >>" % len(objects))
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+    out, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return out
+
+
+def _topic_offset(query, spread):
+    # Same topic, same papers, whatever the date filter
+    topic = query.split(" AND submittedDate:")[0]
+    return int(hashlib.md5(topic.encode()).hexdigest(), 16) % spread if spread else 0
+
+
+def _date_range(query):
+    # submittedDate:[YYYYMMDDHHMM TO YYYYMMDDHHMM], both minutes included
+    if "submittedDate:[" not in query:
+        return None
+    low, high = query.split("submittedDate:[")[1].split("]")[0].split(" TO ")
+    return (datetime.strptime(low, "%Y%m%d%H%M"),
+            datetime.strptime(high, "%Y%m%d%H%M") + timedelta(seconds=59))
+
+
+def _atom_feed(query, start, max_results, total, pdf_base, spread=0):
+    # Paper n of a topic is submitted n days before 2025-01-01, newest first,
+    # and only the papers inside the query's date filter match
+    day0 = datetime(2025, 1, 1)
+    offset = _topic_offset(query, spread)
+    first, last = offset, offset + total - 1
+    window = _date_range(query)
+    if window is not None:
+        first = max(first, -((window[1] - day0) // timedelta(days=1)))
+        last = min(last, (day0 - window[0]) // timedelta(days=1))
+    matches = max(last - first + 1, 0)
+    end = min(start + max_results, matches)
+    parts = [ATOM_HEADER.format(total=matches, start=start, count=max(end - start, 0))]
+    for n in range(first + start, first + end):
+        date = (day0 - timedelta(days=n)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        parts.append(ATOM_ENTRY.format(
+            arxiv_id=f"2501.{n:05d}",
+            date=date,
+            title=escape(f"Paper {n}"),
+            summary=escape(f"Abstract of paper {n}. " * 40),
+            n=n,
+            pdf_base=pdf_base
+        ))
+    parts.append("</feed>\n")
+    return "".join(parts).encode()
+
+
+def _make_handler(settings):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body, content_type):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/api/query":
+                settings.count("arxiv_queries")
+                args = parse_qs(url.query)
+                max_results = int(args.get("max_results", ["10"])[0])
+                time.sleep(settings.arxiv_latency + settings.arxiv_seconds_per_result * max_results)
+                body = _atom_feed(
+                    args.get("search_query", [""])[0],
+                    int(args.get("start", ["0"])[0]),
+                    max_results,
+                    settings.arxiv_total,
+                    settings.pdf_base,
+                    settings.arxiv_topic_spread
+                )
+                self._send(200, body, "application/atom+xml")
+            elif url.path.startswith("/pdf/"):
+                settings.count("pdf_downloads")
+                time.sleep(settings.pdf_latency)
+                paper = url.path.rsplit("/", 1)[-1]
+                sentence = f"Section text of {paper} about attention, retrieval and long context. "
+                body = make_pdf([f"Page {page}. " + sentence * 8 for page in range(settings.pdf_pages)])
+                self._send(200, body, "application/pdf")
+            elif url.path == "/api/tags":
+                body = json.dumps({"models": [{"name": "research_assistant:latest"}]}).encode()
+                self._send(200, body, "application/json")
+            else:
+                self._send(404, b"not found", "text/plain")
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/api/generate":
+                self._send(404, b"not found", "text/plain")
+                return
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if not request.get("prompt"):
+                # A request without a prompt only loads the model
+                body = {"model": request.get("model"), "response": "", "done": True, "done_reason": "load"}
+                self._send(200, json.dumps(body).encode(), "application/json")
+                return
+            settings.count("ollama_generations")
+            n_tokens = min(settings.response_tokens,
+                           request.get("options", {}).get("num_predict", settings.response_tokens))
+            prompt_tokens = len(request.get("prompt", "")) // 4
+            context = request.get("context") or []
+            prefill = settings.prefill_latency
+            if settings.prefill_tokens_per_second:
+                prefill += prompt_tokens / settings.prefill_tokens_per_second
+            time.sleep(prefill)
+            final = {
+                "model": request.get("model"),
+                "done": True,
+                "prompt_eval_count": prompt_tokens,
+                "eval_count": n_tokens,
+                "eval_duration": int(n_tokens / settings.tokens_per_second * 1e9),
+                "context": context + list(range(prompt_tokens + n_tokens))
+            }
+            if not request.get("stream", True):
+                time.sleep(n_tokens / settings.tokens_per_second)
+                final["response"] = " ".join(f"tok{i}" for i in range(n_tokens))
+                try:
+                    self._send(200, json.dumps(final).encode(), "application/json")
+                except (BrokenPipeError, ConnectionResetError):
+                    settings.count("ollama_abandoned")
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for i in range(n_tokens):
+                    time.sleep(1 / settings.tokens_per_second)
+                    self._chunk(json.dumps({"response": f"tok{i} ", "done": False}) + "\n")
+                final["response"] = ""
+                self._chunk(json.dumps(final) + "\n")
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                # The client closed the stream; a real Ollama stops generating here
+                settings.count("ollama_abandoned")
+
+        def _chunk(self, text):
+            data = text.encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+class FakeUpstreams:
+    """Serve fake arXiv (``/api/query``, ``/pdf/<id>``) and Ollama (``/api/*``) on one port."""
+
+    def __init__(self, settings=None):
+        self.settings = settings or UpstreamSettings()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(self.settings))
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.settings.pdf_base = self.url + "/pdf"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class _RedisHandler(socketserver.StreamRequestHandler):
+    protocol = 2  # RESP version, switched by HELLO
+
+    def _read_command(self):
+        # Clients send every command as a RESP array of bulk strings
+        header = self.rfile.readline()
+        if not header.startswith(b"*"):
+            return None
+        args = []
+        for _ in range(int(header[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        while (args := self._read_command()) is not None:
+            self.wfile.write(self.server.fake.execute(args, self))
+            self.wfile.flush()
+
+
+def _resp(value, protocol=2):
+    if value is None:
+        return b"_\r\n" if protocol == 3 else b"$-1\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(_resp(item) for item in value)
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class FakeRedis:
+    """The Redis commands RedisCache uses (GET, SET with PX/EX/NX, DEL, SCAN),
+    kept in a dict, so several app processes can share a cache in benchmarks
+    without a Redis server. ``commands`` counts the commands served."""
+
+    def __init__(self):
+        self._data = {}  # key -> (value, expires_at or None)
+        self._lock = threading.Lock()
+        self.commands = 0
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _RedisHandler)
+        self.server.daemon_threads = True
+        self.server.fake = self
+        self.url = f"redis://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] < time.time():
+            del self._data[key]
+            return None
+        return entry
+
+    def execute(self, args, connection):
+        command = args[0].upper()
+        with self._lock:
+            self.commands += 1
+            if command == b"GET":
+                entry = self._live(args[1])
+                return _resp(entry[0] if entry else None, connection.protocol)
+            if command == b"SET":
+                options = [arg.upper() for arg in args[3:]]
+                expires_at = None
+                for unit, scale in ((b"EX", 1), (b"PX", 1000)):
+                    if unit in options:
+                        expires_at = time.time() + int(options[options.index(unit) + 1]) / scale
+                if b"NX" in options and self._live(args[1]) is not None:
+                    return _resp(None, connection.protocol)
+                self._data[args[1]] = (args[2], expires_at)
+                return b"+OK\r\n"
+            if command == b"DEL":
+                return _resp(sum(self._data.pop(key, None) is not None for key in args[1:]))
+            if command == b"SCAN":
+                pattern = args[args.index(b"MATCH") + 1].decode() if b"MATCH" in args else "*"
+                keys = [key for key in list(self._data) if self._live(key) and fnmatch.fnmatchcase(key.decode(), pattern)]
+                return _resp([b"0", keys])
+            if command == b"HELLO":
+                # The handshake redis-py starts with; RESP3 replies with a map
+                connection.protocol = int(args[1]) if len(args) > 1 else 2
+                fields = [b"server", b"redis", b"version", b"7.0.0", b"proto", connection.protocol]
+                header = b"%3\r\n" if connection.protocol == 3 else b"*6\r\n"
+                return header + b"".join(_resp(field) for field in fields)
+            if command in (b"PING", b"CLIENT", b"SELECT"):
+                return b"+PONG\r\n" if command == b"PING" else b"+OK\r\n"
+            return b"-ERR unknown command '%s'\r\n" % command
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
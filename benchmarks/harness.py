@@ -0,0 +1,94 @@
+"""Helpers shared by the benchmarks: latency summaries, a throwaway config
+pointing at the fake upstreams, an in-thread uvicorn server and JSON results
+tagged with the commit they were measured on.
+"""
+import json
+import os
+import socket
+import subprocess
+import threading
+import time
+from datetime import datetime
+
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies):
+    return {
+        "count": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2)
+    }
+
+
+def write_config(upstream_url, data_path, overrides=None):
+    """Write a config.yml for the app that talks to the fakes and keeps every
+    cache and store inside ``data_path``."""
+    with open(os.path.join(ROOT, "config.yml")) as f:
+        config = yaml.safe_load(f)
+    config["llm_url"] = upstream_url
+    config["arxiv_url"] = upstream_url + "/api/query"
+    config["data_path"] = os.path.join(data_path, "papers")
+    config["cache"]["path"] = os.path.join(data_path, "cache.sqlite")
+    config["embedding"]["cache_path"] = os.path.join(data_path, "embeddings.sqlite")
+    config["paper_store"]["path"] = os.path.join(data_path, "papers.sqlite")
+    config["vector_store"]["path"] = os.path.join(data_path, "vectors")
+    for section, values in (overrides or {}).items():
+        if isinstance(values, dict):
+            config.setdefault(section, {}).update(values)
+        else:
+            config[section] = values
+    path = os.path.join(data_path, "config.yml")
+    with open(path, "w") as f:
+        yaml.safe_dump(config, f)
+    return path
+
+
+def start_server(app):
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_results(name, results, path=None):
+    """Write ``results`` as JSON, by default to benchmarks/results/<name>-<commit>.json."""
+    commit = git_commit()
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{name}-{commit}.json")
+    with open(path, "w") as f:
+        json.dump({
+            "benchmark": name,
+            "commit": commit,
+            "measured_at": datetime.now().isoformat(timespec="seconds"),
+            "results": results
+        }, f, indent=2)
+    return path
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class TopicAnswers:
+    def __init__(self, fingerprint: str, dimension: int):
+        self.fingerprint = fingerprint
+        self.vectors = np.zeros((0, dimension), dtype=np.float32)
+        self.entries: List[Dict] = []
+
+
+class SemanticAnswerCache:
+    """Reuse chat answers for questions that mean the same thing.
+
+    Answers are grouped by topic and stored with the embedding of the
+    question they answered. A new question hits when its cosine similarity
+    to a stored one reaches ``threshold`` and the topic's paper-set
+    fingerprint is unchanged; a different fingerprint drops all answers for
+    that topic, since they were generated from different papers.
+    """
+
+    def __init__(self, embed: Callable[[str], np.ndarray], threshold: float = 0.92,
+                 ttl_seconds: float = 3600, max_topics: int = 256,
+                 max_entries_per_topic: int = 64):
+        self.embed = embed
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_topics = max_topics
+        self.max_entries_per_topic = max_entries_per_topic
+        self.enabled = True
+        self._topics: "OrderedDict[str, TopicAnswers]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0, "expirations": 0}
+
+    async def embed_question(self, question: str) -> Optional[np.ndarray]:
+        """Embed ``question``, or return None (and stop caching) if the embedder is unavailable."""
+        if not self.enabled:
+            return None
+        try:
+            vector = await asyncio.to_thread(self.embed, question.strip().lower())
+        except Exception as e:
+            logger.warning("Answer cache disabled, embedder unavailable: %s", e)
+            self.enabled = False
+            return None
+        return np.asarray(vector, dtype=np.float32)
+
+    def lookup(self, topic: str, fingerprint: str, vector: np.ndarray) -> Optional[Dict]:
+        answers = self._topics.get(topic)
+        if answers is not None and answers.fingerprint != fingerprint:
+            del self._topics[topic]
+            self._stats["invalidations"] += 1
+            answers = None
+        if answers is None or not answers.entries:
+            self._stats["misses"] += 1
+            return None
+
+        self._topics.move_to_end(topic)
+        self._drop_expired(answers)
+        if answers.entries:
+            similarities = answers.vectors @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                self._stats["hits"] += 1
+                return {**answers.entries[best], "similarity": round(float(similarities[best]), 4)}
+        self._stats["misses"] += 1
+        return None
+
+    def store(self, topic: str, fingerprint: str, vector: np.ndarray, question: str,
+              response: str, sources: List[Dict]):
+        answers = self._topics.get(topic)
+        if answers is None or answers.fingerprint != fingerprint:
+            answers = self._topics[topic] = TopicAnswers(fingerprint, vector.shape[0])
+        self._topics.move_to_end(topic)
+
+        answers.vectors = np.vstack([answers.vectors, vector[None, :]])
+        answers.entries.append({
+            "question": question,
+            "response": response,
+            "sources": sources,
+            "expires_at": time.time() + self.ttl_seconds
+        })
+        overflow = len(answers.entries) - self.max_entries_per_topic
+        if overflow > 0:
+            answers.vectors = answers.vectors[overflow:]
+            answers.entries = answers.entries[overflow:]
+            self._stats["evictions"] += overflow
+        while len(self._topics) > self.max_topics:
+            _, evicted = self._topics.popitem(last=False)
+            self._stats["evictions"] += len(evicted.entries)
+
+    def _drop_expired(self, answers: TopicAnswers):
+        now = time.time()
+        keep = [i for i, entry in enumerate(answers.entries) if entry["expires_at"] >= now]
+        if len(keep) != len(answers.entries):
+            self._stats["expirations"] += len(answers.entries) - len(keep)
+            answers.vectors = answers.vectors[keep]
+            answers.entries = [answers.entries[i] for i in keep]
+
+    def stats(self) -> Dict:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "topics": len(self._topics),
+            "size": sum(len(answers.entries) for answers in self._topics.values()),
+            **self._stats,
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0
+        }
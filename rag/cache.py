@@ -0,0 +1,362 @@
+import asyncio
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+try:
+    import redis
+except ImportError:  # optional, only needed for cache.backend: redis
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def as_dict(self, size: int, max_entries: int) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "max_entries": max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+class Cache:
+    """``aget``/``aset``/``aadd``/``adelete``/``astats`` are the same calls
+    for async code: on a shared backend they do file or network I/O (stats
+    counts the entries), so they run in a worker thread instead of on the
+    event loop."""
+
+    shared = False
+
+    async def _call(self, method, *args, **kwargs):
+        if self.shared:
+            return await asyncio.to_thread(method, *args, **kwargs)
+        return method(*args, **kwargs)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        return await self._call(self.get, key)
+
+    async def aset(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        await self._call(self.set, key, value, ttl_seconds)
+
+    async def aadd(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> bool:
+        return await self._call(self.add, key, value, ttl_seconds)
+
+    async def adelete(self, key: str) -> bool:
+        return await self._call(self.delete, key)
+
+    async def astats(self) -> Dict:
+        return await self._call(self.stats)
+
+
+class MemoryCache(Cache):
+    """In-process LRU cache with a per-entry TTL."""
+
+    # Seen by this process only; every uvicorn worker has its own
+    shared = False
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 6 * 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                self._stats.expirations += 1
+                self._stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        with self._lock:
+            self._put(key, value, ttl_seconds)
+
+    def add(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> bool:
+        """Set ``key`` only if it is absent or expired; False if it is there."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] >= time.time():
+                return False
+            self._put(key, value, ttl_seconds)
+            return True
+
+    def _put(self, key: str, value: Any, ttl_seconds: Optional[float]):
+        self._entries[key] = (time.time() + (ttl_seconds or self.ttl_seconds), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        return self._stats.as_dict(len(self), self.max_entries)
+
+
+class SQLiteCache(Cache):
+    """LRU/TTL cache persisted in a SQLite file so it survives restarts.
+
+    Values are pickled. Several caches can share one file as long as they
+    use different ``namespace`` values (one table each), and so can several
+    processes: the file is in WAL mode, so uvicorn workers pointed at the
+    same path read concurrently and wait (``busy_timeout``) for each other's
+    writes instead of failing. A hit only records its access time if the
+    last one is older than ``touch_seconds``, so hot keys are not a write
+    on every lookup.
+    """
+
+    shared = True
+
+    def __init__(self, path: str, namespace: str, max_entries: int = 512,
+                 ttl_seconds: float = 6 * 3600, busy_timeout: float = 5.0, touch_seconds: float = 60):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.touch_seconds = touch_seconds
+        self._table = f"cache_{namespace}"
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=busy_timeout)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # A lost write costs a cache miss, so commits skip the fsync
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table} ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self._table}_accessed "
+                f"ON {self._table} (accessed_at)"
+            )
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                f"SELECT value, expires_at, accessed_at FROM {self._table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._stats.misses += 1
+                return None
+            if row[1] < now:
+                self._conn.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+                self._stats.expirations += 1
+                self._stats.misses += 1
+                return None
+            if now - row[2] > self.touch_seconds:
+                self._conn.execute(
+                    f"UPDATE {self._table} SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+            self._stats.hits += 1
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        now = time.time()
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self._table} VALUES (?, ?, ?, ?)",
+                (key, blob, now + (ttl_seconds or self.ttl_seconds), now)
+            )
+            self._evict()
+
+    def add(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> bool:
+        """Set ``key`` only if it is absent or expired; False if it is there.
+
+        Atomic across processes, so it can serve as a lock between workers.
+        """
+        now = time.time()
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self._table} WHERE key = ? AND expires_at < ?", (key, now))
+            added = self._conn.execute(
+                f"INSERT OR IGNORE INTO {self._table} VALUES (?, ?, ?, ?)",
+                (key, blob, now + (ttl_seconds or self.ttl_seconds), now)
+            ).rowcount == 1
+            if added:
+                self._evict()
+        return added
+
+    def _evict(self):
+        overflow = self._count() - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                f"DELETE FROM {self._table} WHERE key IN ("
+                f"SELECT key FROM {self._table} ORDER BY accessed_at LIMIT ?)",
+                (overflow,)
+            )
+            self._stats.evictions += overflow
+
+    def delete(self, key: str) -> bool:
+        with self._lock, self._conn:
+            return self._conn.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,)).rowcount > 0
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self._table}")
+
+    def _count(self) -> int:
+        return self._conn.execute(f"SELECT COUNT(*) FROM {self._table}").fetchone()[0]
+
+    def __len__(self):
+        with self._lock:
+            return self._count()
+
+    def stats(self) -> Dict:
+        return self._stats.as_dict(len(self), self.max_entries)
+
+
+class RedisCache(Cache):
+    """TTL cache on a Redis server, shared by every worker and host using it.
+
+    Values are pickled under ``research_assistant:<namespace>:<key>``.
+    Entries expire after their TTL; the LRU bound is Redis's own (run it
+    with ``maxmemory`` and ``maxmemory-policy allkeys-lru``), so
+    ``max_entries`` is only reported. If the server cannot be reached,
+    lookups miss and writes are dropped, with a warning: searches slow
+    down, they do not fail.
+    """
+
+    shared = True
+
+    def __init__(self, url: str, namespace: str, max_entries: int = 512,
+                 ttl_seconds: float = 6 * 3600, socket_timeout: float = 1.0):
+        if redis is None:
+            raise RuntimeError("cache.backend is redis but the redis package is not installed (pip install redis)")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._prefix = f"research_assistant:{namespace}:"
+        self._client = redis.Redis.from_url(url, socket_timeout=socket_timeout,
+                                            socket_connect_timeout=socket_timeout)
+        self._stats = CacheStats()
+
+    def _ttl_ms(self, ttl_seconds: Optional[float]) -> int:
+        return max(int((ttl_seconds or self.ttl_seconds) * 1000), 1)
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            blob = self._client.get(self._prefix + key)
+        except redis.RedisError as e:
+            logger.warning("Redis cache unavailable, treating %s as a miss: %s", key, e)
+            blob = None
+        if blob is None:
+            self._stats.misses += 1
+            return None
+        self._stats.hits += 1
+        return pickle.loads(blob)
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            self._client.set(self._prefix + key, blob, px=self._ttl_ms(ttl_seconds))
+        except redis.RedisError as e:
+            logger.warning("Redis cache unavailable, %s not cached: %s", key, e)
+
+    def add(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> bool:
+        """Set ``key`` only if it is absent; False if it is there.
+
+        Atomic (SET NX), so it can serve as a lock between workers. With the
+        server down it returns True: each worker then goes ahead on its own.
+        """
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            return bool(self._client.set(self._prefix + key, blob, px=self._ttl_ms(ttl_seconds), nx=True))
+        except redis.RedisError as e:
+            logger.warning("Redis cache unavailable, not locking %s: %s", key, e)
+            return True
+
+    def delete(self, key: str) -> bool:
+        try:
+            return self._client.delete(self._prefix + key) > 0
+        except redis.RedisError as e:
+            logger.warning("Redis cache unavailable, %s not deleted: %s", key, e)
+            return False
+
+    def _keys(self):
+        return self._client.scan_iter(match=self._prefix + "*", count=1000)
+
+    def clear(self):
+        keys = list(self._keys())
+        if keys:
+            self._client.delete(*keys)
+
+    def __len__(self):
+        try:
+            return sum(1 for _ in self._keys())
+        except redis.RedisError:
+            return 0
+
+    def stats(self) -> Dict:
+        return self._stats.as_dict(len(self), self.max_entries)
+
+
+def make_cache(config: Dict, namespace: str, max_entries: Optional[int] = None,
+               ttl_seconds: Optional[float] = None):
+    """Build the cache backend selected by the ``cache`` section of config.yml.
+
+    ``max_entries`` and ``ttl_seconds`` override that section's values for
+    caches that need other bounds (chat sessions, locks).
+    """
+    cache_config = config.get("cache", {})
+    max_entries = max_entries or cache_config.get("max_entries", 512)
+    ttl_seconds = ttl_seconds or cache_config.get("ttl_seconds", 6 * 3600)
+    backend = cache_config.get("backend", "memory")
+
+    if backend == "memory":
+        return MemoryCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    if backend == "sqlite":
+        return SQLiteCache(
+            cache_config.get("path", "./cache/cache.sqlite"),
+            namespace,
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds
+        )
+    if backend == "redis":
+        return RedisCache(
+            cache_config.get("redis_url", "redis://localhost:6379"),
+            namespace,
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds
+        )
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -0,0 +1,192 @@
+import os
+import time
+import uuid
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from rag.retriever import estimate_tokens
+
+
+class ChatSession:
+    """One conversation about a topic.
+
+    ``context`` holds the token array Ollama returned for the last turn: the
+    papers prompt, every question and every answer so far. Sending it back
+    with the next question lets Ollama reuse its KV cache for that prefix
+    and prefill only the new tokens. ``papers`` and ``history`` are kept so
+    the conversation can be rebuilt as text when there is no usable context.
+    """
+
+    def __init__(self, topic: str, years: Optional[int]):
+        self.id = uuid.uuid4().hex
+        self.topic = topic
+        self.years = years
+        self.papers: Optional[str] = None
+        self.sources: List[Dict] = []
+        self.history: List[Tuple[str, str]] = []
+        self.context: Optional[array] = None
+        self.created_at = self.last_used = time.monotonic()
+        self.busy_since: Optional[float] = None
+
+    def context_tokens(self) -> Optional[List[int]]:
+        return self.context.tolist() if self.context is not None else None
+
+    def record_turn(self, question: str, answer: str, context: Optional[List[int]]):
+        self.history.append((question, answer))
+        # 4 bytes a token instead of a Python int object per token
+        self.context = array("i", context) if context else None
+
+    def history_text(self, token_budget: int) -> str:
+        """The most recent turns, oldest first, that fit into ``token_budget``."""
+        turns, used = [], 0
+        for question, answer in reversed(self.history):
+            turn = f"User: {question}\nAssistant: {answer}"
+            used += estimate_tokens(turn)
+            if used > token_budget:
+                break
+            turns.append(turn)
+        return "\n\n".join(reversed(turns))
+
+    def summary(self) -> Dict:
+        return {
+            "session_id": self.id,
+            "topic": self.topic,
+            "years": self.years,
+            "turns": len(self.history),
+            "context_tokens": len(self.context) if self.context is not None else 0,
+            "history": [{"question": question, "answer": answer} for question, answer in self.history],
+            "sources": self.sources
+        }
+
+
+class ChatSessions:
+    """Sessions by id, dropped after ``idle_seconds`` without a turn or when
+    more than ``max_sessions`` exist (least recently used first)."""
+
+    shared = False
+
+    def __init__(self, max_sessions: int = 1000, idle_seconds: float = 1800,
+                 turn_timeout: float = 300):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        # A turn that never reported back (e.g. a stream that was never
+        # started) stops blocking its session after this long
+        self.turn_timeout = turn_timeout
+        self.enabled = True
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._stats = {"created": 0, "expired": 0, "evicted": 0}
+
+    def create(self, topic: str, years: Optional[int]) -> ChatSession:
+        self._drop_idle()
+        session = ChatSession(topic, years)
+        self._sessions[session.id] = session
+        self._stats["created"] += 1
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self._stats["evicted"] += 1
+        return session
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        self._drop_idle()
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.last_used = time.monotonic()
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def delete(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    def _busy(self, session: ChatSession) -> bool:
+        return session.busy_since is not None and time.monotonic() - session.busy_since < self.turn_timeout
+
+    def begin_turn(self, session: ChatSession) -> bool:
+        """Mark ``session`` busy; False if another turn is still running."""
+        if self._busy(session):
+            return False
+        session.busy_since = session.last_used = time.monotonic()
+        return True
+
+    def end_turn(self, session: ChatSession):
+        session.busy_since = None
+        session.last_used = time.monotonic()
+
+    def _drop_idle(self):
+        # Sessions are kept in last-used order, so the idle ones are at the front
+        cutoff = time.monotonic() - self.idle_seconds
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_used >= cutoff or self._busy(session):
+                break
+            self._sessions.popitem(last=False)
+            self._stats["expired"] += 1
+
+    def stats(self) -> Dict:
+        return {
+            "size": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "context_tokens": sum(len(s.context) for s in self._sessions.values() if s.context is not None),
+            **self._stats
+        }
+
+
+class SharedChatSessions:
+    """ChatSessions kept in a shared cache (``cache.backend`` sqlite or redis).
+
+    With several uvicorn workers a follow-up can land on any of them, so the
+    session is read from the store on every message and written back when
+    the turn ends; the store's TTL (``idle_seconds``, reset by each turn)
+    and LRU bound replace the in-process expiry. Whether a turn is running
+    is a lock entry in ``locks``, which expires after ``turn_timeout``.
+    """
+
+    shared = True
+
+    def __init__(self, store, locks, max_sessions: int = 1000, turn_timeout: float = 300):
+        self.store = store
+        self.locks = locks
+        self.max_sessions = max_sessions
+        self.turn_timeout = turn_timeout
+        self.enabled = True
+        self._stats = {"created": 0}
+
+    def create(self, topic: str, years: Optional[int]) -> ChatSession:
+        session = ChatSession(topic, years)
+        self.store.set(session.id, session)
+        self._stats["created"] += 1
+        return session
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        return self.store.get(session_id)
+
+    def delete(self, session_id: str) -> bool:
+        return self.store.delete(session_id)
+
+    def begin_turn(self, session: ChatSession) -> bool:
+        """Mark ``session`` busy; False if another turn is still running, on any worker."""
+        if not self.locks.add(f"turn:{session.id}", os.getpid(), ttl_seconds=self.turn_timeout):
+            return False
+        # The previous turn may have ended on another worker after this copy was read
+        latest = self.store.get(session.id)
+        if latest is not None:
+            session.__dict__.update(latest.__dict__)
+        session.busy_since = session.last_used = time.monotonic()
+        return True
+
+    def end_turn(self, session: ChatSession):
+        session.busy_since = None
+        session.last_used = time.monotonic()
+        self.store.set(session.id, session)
+        self.locks.delete(f"turn:{session.id}")
+
+    def stats(self) -> Dict:
+        store = self.store.stats()
+        return {
+            "size": store["size"],
+            "max_sessions": self.max_sessions,
+            "shared": True,
+            **self._stats,
+            "expired": store["expirations"],
+            "evicted": store["evictions"]
+        }
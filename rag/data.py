@@ -1,35 +1,32 @@
-from llama_index.core import VectorStoreIndex, SimpleDirectoryReader, Settings
-from llama_index.core import StorageContext
-from llama_index.vector_stores.qdrant import QdrantVectorStore
-from llama_index.embeddings.langchain import LangchainEmbedding
-from langchain_community.embeddings import HuggingFaceEmbeddings
-import qdrant_client
+from llama_index.core import VectorStoreIndex, Settings
+import logging
 import yaml
 from datetime import datetime, timedelta
 import arxiv
-from tqdm import tqdm
 import os
+from rag.downloader import PaperDownloader, paper_record
+from rag.paper_store import PaperStore
+from rag.embeddings import CachedEmbedding, get_embedding_service
+from rag.ingest import Ingestor
+from rag.vector_store import build_vector_store
+
+logger = logging.getLogger(__name__)
 
 class RAG:
     def __init__(self, config_file, llm):
         self.config = config_file
-        self.qdrant_client = qdrant_client.QdrantClient(
-            url=self.config['qdrant_url']
-        )
         self.llm = llm  # ollama llm
    
     def load_embedder(self):
-        embed_model = LangchainEmbedding(
-            HuggingFaceEmbeddings(model_name=self.config['embedding_model'])
-        )
-        return embed_model
+        # The model is loaded once per process and shared by every caller
+        return CachedEmbedding(get_embedding_service(self.config))
 
     def _create_data_folder(self, download_path):
         if not os.path.exists(download_path):
             os.makedirs(download_path)
-            print("Output folder created")
+            logger.info("Output folder created")
         else:
-            print("Output folder exists")
+            logger.debug("Output folder exists")
 
     def download_papers(self, topic, download_path, max_results=10, years=5):
         """Download papers from arXiv based on topic and time range"""
@@ -44,6 +41,7 @@ class RAG:
         query = f"{topic} AND {date_filter}"
         
         client = arxiv.Client()
+        client.query_url_format = self.config.get("arxiv_url", "https://export.arxiv.org/api/query") + "?{}"
         search = arxiv.Search(
             query=query,
             max_results=max_results,
@@ -51,59 +49,53 @@ class RAG:
             sort_order=arxiv.SortOrder.Descending
         )
 
-        print(f"\nFetching papers about '{topic}' from the last {years} years...")
+        logger.info("Fetching papers about '%s' from the last %d years...", topic, years)
         try:
-            results = list(client.results(search))
-            for paper in tqdm(results):
-                try:
-                    # Create a clean filename
-                    clean_title = "".join(c for c in paper.title if c.isalnum() or c.isspace())[:50]
-                    filename = f"{paper.published.strftime('%Y%m%d')}_{clean_title}.pdf"
-                    
-                    # Download PDF
-                    paper.download_pdf(dirpath=download_path, filename=filename)
-                    
-                    # Save metadata
-                    metadata_file = os.path.join(download_path, f"{filename[:-4]}_metadata.txt")
-                    with open(metadata_file, "w", encoding="utf-8") as f:
-                        f.write(f"Title: {paper.title}\n")
-                        f.write(f"Authors: {', '.join(str(author) for author in paper.authors)}\n")
-                        f.write(f"Published: {paper.published}\n")
-                        f.write(f"URL: {paper.pdf_url}\n")
-                        f.write(f"Abstract: {paper.summary}\n")
-                    
-                    print(f"\nDownloaded: {paper.title}")
-                    
-                except Exception as e:
-                    print(f"\nError downloading {paper.title}: {str(e)}")
-                    continue
-                    
+            results = [paper_record(paper) for paper in client.results(search)]
         except Exception as e:
-            print(f"Error searching for papers: {str(e)}")
+            logger.error("Error searching for papers: %s", e)
+            return
 
-    def qdrant_index(self):
-        client = qdrant_client.QdrantClient(url=self.config["qdrant_url"])
-        qdrant_vector_store = QdrantVectorStore(
-            client=client, collection_name=self.config['collection_name']
+        PaperStore(self.config["paper_store"]["path"]).upsert_papers(results, topic)
+
+        rate_limit = self.config["rate_limit"]
+        downloader = PaperDownloader(
+            download_path,
+            max_concurrent=rate_limit["max_concurrent"],
+            delay_seconds=rate_limit["delay_seconds"]
         )
-        
+        return downloader.download(results)
+
+    def _vector_store(self):
+        # Qdrant or the embedded memmap index, per vector_store.backend
+        return build_vector_store(self.config)
+
+    def ingest(self):
+        """Embed new or changed PDFs from the data folder into the vector store.
+
+        Files already ingested with the same content are skipped, and the
+        points of files removed from the folder are deleted.
+        """
+        Settings.llm = self.llm
+        ingestor = Ingestor(self.config, self._vector_store(), self.load_embedder())
+        stats = ingestor.ingest()
+        logger.info(
+            "Ingestion finished in %ss: %d added, %d updated, %d removed, %d unchanged, %d failed (%d chunks embedded)",
+            stats["seconds"], stats["added"], stats["updated"], stats["removed"],
+            stats["unchanged"], stats["failed"], stats["chunks"]
+        )
+        return stats
+
+    def qdrant_index(self):
         Settings.llm = self.llm
         Settings.embed_model = self.load_embedder()
         Settings.chunk_size = self.config["chunk_size"]
         
-        storage_context = StorageContext.from_defaults(
-            vector_store=qdrant_vector_store
-        )
-        
         try:
-            documents = SimpleDirectoryReader(self.config["data_path"]).load_data()
-            index = VectorStoreIndex.from_documents(
-                documents,
-                storage_context=storage_context
-            )
-            return index
+            self.ingest()
+            return VectorStoreIndex.from_vector_store(self._vector_store())
         except Exception as e:
-            print(f"Error creating index: {str(e)}")
+            logger.error("Error creating index: %s", e)
             return None
 
 if __name__ == "__main__":
@@ -135,6 +127,7 @@ if __name__ == "__main__":
     )
     
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     
     # Load config
     config_file = "config.yml"
@@ -155,7 +148,7 @@ if __name__ == "__main__":
     
     # Ingest if requested
     if args.ingest:
-        print("\nLoading Embedder...")
+        logger.info("Loading embedder...")
         from llama_index.llms.ollama import Ollama
         llm = Ollama(model=config["llm_name"], base_url=config["llm_url"])
         rag.llm = llm
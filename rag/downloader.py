@@ -0,0 +1,200 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = ".downloads.json"
+
+
+def paper_record(paper) -> Dict:
+    """Flatten an ``arxiv.Result`` into the dict the downloader works with."""
+    return {
+        "arxiv_id": paper.get_short_id(),
+        "title": paper.title,
+        "authors": [str(author) for author in paper.authors],
+        "published": paper.published,
+        "url": paper.pdf_url,
+        "abstract": paper.summary
+    }
+
+
+def paper_filename(paper: Dict) -> str:
+    clean_title = "".join(c for c in paper["title"] if c.isalnum() or c.isspace())[:50]
+    return f"{paper['published'].strftime('%Y%m%d')}_{clean_title}.pdf"
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def looks_complete_pdf(path: str) -> bool:
+    with open(path, "rb") as f:
+        if f.read(5) != b"%PDF-":
+            return False
+        f.seek(max(os.path.getsize(path) - 1024, 0))
+        return b"%%EOF" in f.read()
+
+
+def load_download_metadata(download_path: str) -> Dict[str, Dict]:
+    """Map each downloaded PDF's file name to the paper metadata recorded for it."""
+    path = os.path.join(download_path, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    return {entry["file"]: {"arxiv_id": arxiv_id, **entry} for arxiv_id, entry in entries.items()}
+
+
+class RateLimiter:
+    """Space request starts at least ``delay_seconds`` apart across threads."""
+
+    def __init__(self, delay_seconds: float):
+        self.delay_seconds = delay_seconds
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.delay_seconds
+        if start > now:
+            time.sleep(start - now)
+
+
+class PaperDownloader:
+    """Download arXiv PDFs with a bounded worker pool.
+
+    Papers are tracked by arXiv ID in ``.downloads.json`` together with the
+    file's SHA-256, so papers already on disk are skipped. Each PDF is
+    written to ``<name>.part`` and renamed into place only once complete; an
+    interrupted ``.part`` file is resumed with an HTTP range request.
+    """
+
+    def __init__(self, download_path: str, max_concurrent: int = 3,
+                 delay_seconds: float = 3, timeout: float = 60):
+        self.download_path = download_path
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter(delay_seconds)
+        self.manifest_path = os.path.join(download_path, MANIFEST_NAME)
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _is_downloaded(self, paper: Dict) -> bool:
+        entry = self.manifest.get(paper["arxiv_id"])
+        if entry is None:
+            return False
+        path = os.path.join(self.download_path, entry["file"])
+        return os.path.exists(path) and file_sha256(path) == entry["sha256"]
+
+    def _fetch(self, url: str, path: str) -> int:
+        """Download ``url`` to ``path`` via a resumable ``.part`` file; return bytes received."""
+        part_path = path + ".part"
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        self.rate_limiter.wait()
+        with self._session().get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            # 416 means the .part file already holds the whole PDF
+            if response.status_code != 416:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    offset = 0
+                received = 0
+                with open(part_path, "ab" if offset else "wb") as f:
+                    for block in response.iter_content(chunk_size=1 << 16):
+                        f.write(block)
+                        received += len(block)
+                expected = response.headers.get("Content-Length")
+                if expected is not None and received != int(expected):
+                    raise IOError(f"incomplete download ({received} of {expected} bytes)")
+                offset += received
+
+        os.replace(part_path, path)
+        return offset
+
+    def _download_one(self, paper: Dict) -> Dict:
+        filename = paper_filename(paper)
+        path = os.path.join(self.download_path, filename)
+        received = 0
+        # A file from before the manifest existed is adopted if it is whole
+        if not (os.path.exists(path) and looks_complete_pdf(path)):
+            received = self._fetch(paper["url"], path)
+        return {"file": filename, "sha256": file_sha256(path), "bytes": received}
+
+    def download(self, papers: List[Dict]) -> Dict:
+        from tqdm import tqdm
+
+        os.makedirs(self.download_path, exist_ok=True)
+        pending = [paper for paper in papers if not self._is_downloaded(paper)]
+        stats = {"requested": len(papers), "skipped": len(papers) - len(pending),
+                 "downloaded": 0, "failed": 0, "bytes": 0}
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="download") as pool:
+            futures = {pool.submit(self._download_one, paper): paper for paper in pending}
+            for future in tqdm(as_completed(futures), total=len(futures), unit="paper"):
+                paper = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error("Error downloading %s: %s", paper["title"], e)
+                    stats["failed"] += 1
+                    continue
+
+                self.manifest[paper["arxiv_id"]] = {
+                    "file": result["file"],
+                    "sha256": result["sha256"],
+                    "title": paper["title"],
+                    "authors": paper["authors"],
+                    "published": paper["published"].isoformat(),
+                    "url": paper["url"],
+                    "abstract": paper["abstract"],
+                    "downloaded_at": datetime.now().isoformat(timespec="seconds")
+                }
+                self._save_manifest()
+                stats["downloaded"] += 1
+                stats["bytes"] += result["bytes"]
+
+        seconds = time.perf_counter() - start
+        stats["seconds"] = round(seconds, 2)
+        stats["papers_per_second"] = round(stats["downloaded"] / seconds, 2) if seconds else 0.0
+        stats["mb_per_second"] = round(stats["bytes"] / seconds / 1e6, 2) if seconds else 0.0
+        logger.info(
+            "Downloaded %d papers (%.1f MB) in %ss, %s MB/s; %d already on disk, %d failed",
+            stats["downloaded"], stats["bytes"] / 1e6, stats["seconds"], stats["mb_per_second"],
+            stats["skipped"], stats["failed"]
+        )
+        # Every requested paper that is now on disk, downloaded this run or not
+        stats["papers"] = [
+            {**paper, "file": os.path.join(self.download_path, self.manifest[paper["arxiv_id"]]["file"])}
+            for paper in papers if paper["arxiv_id"] in self.manifest
+        ]
+        return stats
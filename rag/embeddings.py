@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+
+
+class EmbeddingCache:
+    """Embedding vectors on disk, keyed by (model name, SHA-256 of the text)."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, chunk_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, chunk_hash))"
+            )
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            for i in range(0, len(hashes), 500):
+                batch = hashes[i:i + 500]
+                rows = self._conn.execute(
+                    "SELECT chunk_hash, vector FROM embeddings WHERE model = ? "
+                    f"AND chunk_hash IN ({','.join('?' * len(batch))})",
+                    [model, *batch]
+                )
+                for chunk_hash, blob in rows:
+                    found[chunk_hash] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, np.ndarray]):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+                [(model, h, v.astype(np.float32).tobytes()) for h, v in vectors.items()]
+            )
+
+
+class EmbeddingService:
+    """Loads a sentence-transformers model once and embeds text in batches.
+
+    Texts are grouped into batches of similar token length so little compute
+    is wasted on padding, large jobs can be spread over a pool of worker
+    processes, and every vector is cached on disk so a chunk that has been
+    embedded before is never encoded again.
+    """
+
+    def __init__(self, model_name: str, cache_path: Optional[str] = None,
+                 batch_tokens: int = 16384, workers: int = 1,
+                 min_multiprocess_texts: int = 256):
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        self.batch_tokens = batch_tokens
+        self.workers = workers or os.cpu_count() or 1
+        self.min_multiprocess_texts = min_multiprocess_texts
+        self.cache = EmbeddingCache(cache_path) if cache_path else None
+        self.stats = {"requested": 0, "cache_hits": 0, "encoded": 0, "encode_seconds": 0.0}
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _token_batches(self, texts: List[str]) -> List[List[int]]:
+        max_length = self.model.max_seq_length
+        lengths = [
+            min(len(ids), max_length)
+            for ids in self.model.tokenizer(texts, add_special_tokens=True)["input_ids"]
+        ]
+        batches, batch = [], []
+        for i in sorted(range(len(texts)), key=lengths.__getitem__):
+            # Every text in a batch is padded to the longest one, which is the
+            # current text since indices are visited shortest first
+            if batch and lengths[i] * (len(batch) + 1) > self.batch_tokens:
+                batches.append(batch)
+                batch = []
+            batch.append(i)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        if self.workers > 1 and len(texts) >= self.min_multiprocess_texts:
+            if self._pool is None:
+                self._pool = self.model.start_multi_process_pool(["cpu"] * self.workers)
+            return self.model.encode_multi_process(
+                texts, self._pool, normalize_embeddings=True
+            )
+
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for batch in self._token_batches(texts):
+            vectors[batch] = self.model.encode(
+                [texts[i] for i in batch],
+                batch_size=len(batch),
+                normalize_embeddings=True,
+                convert_to_numpy=True
+            )
+        return vectors
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        hashes = [hashlib.sha256(text.encode("utf-8")).hexdigest() for text in texts]
+        cached = self.cache.get_many(self.model_name, list(set(hashes))) if self.cache else {}
+        missing = list(dict.fromkeys(h for h in hashes if h not in cached))
+
+        if missing:
+            text_by_hash = dict(zip(hashes, texts))
+            start = time.perf_counter()
+            with self._lock:
+                encoded = self._encode([text_by_hash[h] for h in missing])
+            self.stats["encode_seconds"] += time.perf_counter() - start
+            new_vectors = dict(zip(missing, encoded))
+            if self.cache:
+                self.cache.put_many(self.model_name, new_vectors)
+            cached.update(new_vectors)
+
+        self.stats["requested"] += len(texts)
+        self.stats["encoded"] += len(missing)
+        self.stats["cache_hits"] += len(texts) - len(missing)
+        return np.stack([cached[h] for h in hashes]) if texts else np.zeros((0, self.dimension), dtype=np.float32)
+
+    def close(self):
+        if self._pool is not None:
+            self.model.stop_multi_process_pool(self._pool)
+            self._pool = None
+
+
+_services: Dict[str, EmbeddingService] = {}
+_services_lock = threading.Lock()
+
+
+def get_embedding_service(config: Dict) -> EmbeddingService:
+    """Return the process-wide service for ``config['embedding_model']``."""
+    model_name = config["embedding_model"]
+    with _services_lock:
+        if model_name not in _services:
+            embedding = config.get("embedding", {})
+            _services[model_name] = EmbeddingService(
+                model_name,
+                cache_path=embedding.get("cache_path"),
+                batch_tokens=embedding.get("batch_tokens", 16384),
+                workers=embedding.get("workers", 1)
+            )
+        return _services[model_name]
+
+
+class CachedEmbedding(BaseEmbedding):
+    """llama_index embedding backed by an EmbeddingService."""
+
+    _service: EmbeddingService = PrivateAttr()
+
+    def __init__(self, service: EmbeddingService, **kwargs):
+        # The service does its own token-aware batching, so hand it as many
+        # texts per call as llama_index allows
+        super().__init__(model_name=service.model_name, embed_batch_size=2048, **kwargs)
+        self._service = service
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._service.embed([query])[0].tolist()
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return await asyncio.to_thread(self._get_query_embedding, query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._service.embed([text])[0].tolist()
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._service.embed(texts).tolist()
@@ -1,14 +1,13 @@
 # rag/fetch_papers.py
 from datetime import datetime, timedelta
-from llama_index.core import VectorStoreIndex, SimpleDirectoryReader, Settings
-from llama_index.vector_stores.qdrant import QdrantVectorStore
-from llama_index.embeddings.langchain import LangchainEmbedding
-from langchain_community.embeddings import HuggingFaceEmbeddings
 import arxiv
+import logging
 import os
 import yaml
-import qdrant_client
-from tqdm import tqdm
+from rag.downloader import PaperDownloader, paper_record
+from rag.paper_store import PaperStore
+
+logger = logging.getLogger(__name__)
 
 class ResearchPaperFetcher:
     def __init__(self, config_file):
@@ -19,9 +18,9 @@ class ResearchPaperFetcher:
     def _create_data_folder(self):
         if not os.path.exists(self.config["data_path"]):
             os.makedirs(self.config["data_path"])
-            print("Data folder created")
+            logger.info("Data folder created")
         else:
-            print("Data folder exists")
+            logger.debug("Data folder exists")
 
     def fetch_papers(self, topic, max_results=10, years=5):
         # Calculate date range
@@ -40,45 +39,22 @@ class ResearchPaperFetcher:
             sort_order=arxiv.SortOrder.Descending
         )
 
-        print(f"Fetching papers about '{topic}' from the last {years} years...")
-        papers = []
+        logger.info("Fetching papers about '%s' from the last %d years...", topic, years)
         try:
-            results = list(client.results(search))
-            for paper in tqdm(results):
-                try:
-                    # Create a more structured filename
-                    clean_title = "".join(c for c in paper.title if c.isalnum() or c.isspace())[:50]
-                    filename = f"{paper.published.strftime('%Y%m%d')}_{clean_title}.pdf"
-                    filepath = os.path.join(self.config["data_path"], filename)
-                    
-                    # Download the paper
-                    paper.download_pdf(dirpath=self.config["data_path"], filename=filename)
-                    
-                    # Save metadata
-                    metadata_file = os.path.join(self.config["data_path"], f"{filename[:-4]}_metadata.txt")
-                    with open(metadata_file, "w", encoding="utf-8") as f:
-                        f.write(f"Title: {paper.title}\n")
-                        f.write(f"Authors: {', '.join(str(author) for author in paper.authors)}\n")
-                        f.write(f"Published: {paper.published}\n")
-                        f.write(f"URL: {paper.pdf_url}\n")
-                        f.write(f"Abstract: {paper.summary}\n")
-                    
-                    papers.append({
-                        'title': paper.title,
-                        'published': paper.published,
-                        'file': filepath
-                    })
-                    
-                    print(f"\nDownloaded: {paper.title}")
-                    
-                except Exception as e:
-                    print(f"\nError downloading {paper.title}: {str(e)}")
-                    continue
-                    
+            results = [paper_record(paper) for paper in client.results(search)]
         except Exception as e:
-            print(f"Error searching for papers: {str(e)}")
-            
-        return papers
+            logger.error("Error searching for papers: %s", e)
+            return []
+
+        PaperStore(self.config["paper_store"]["path"]).upsert_papers(results, topic)
+
+        rate_limit = self.config["rate_limit"]
+        downloader = PaperDownloader(
+            self.config["data_path"],
+            max_concurrent=rate_limit["max_concurrent"],
+            delay_seconds=rate_limit["delay_seconds"]
+        )
+        return downloader.download(results)["papers"]
 
 if __name__ == "__main__":
     import argparse
@@ -89,6 +65,7 @@ if __name__ == "__main__":
     parser.add_argument('--max', type=int, default=10, help='Maximum number of papers to fetch')
     
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     
     fetcher = ResearchPaperFetcher("config.yml")
     papers = fetcher.fetch_papers(
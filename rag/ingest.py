@@ -0,0 +1,351 @@
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from llama_index.core import SimpleDirectoryReader
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.schema import MetadataMode, NodeRelationship, RelatedNodeInfo
+
+from rag.downloader import file_sha256, load_download_metadata
+from rag.paper_store import PaperStore
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = ".ingest_manifest.json"
+
+# Stable namespace so a given (file hash, chunk number) always maps to the
+# same Qdrant point id and re-ingesting a file overwrites instead of duplicating
+CHUNK_NAMESPACE = uuid.UUID("5b0f7a52-4f7e-4c3c-9a0e-7d5a5f1d2c11")
+
+# Bookkeeping fields stored with every chunk that shouldn't be embedded or
+# shown to the LLM
+HIDDEN_METADATA = ["file_hash", "file_path", "file_type", "file_size",
+                   "creation_date", "last_modified_date", "arxiv_id", "url",
+                   "published", "authors", "topic"]
+
+# Marks the end of the stream on the pipeline's queues
+_DONE = object()
+
+_splitters: Dict[int, SentenceSplitter] = {}
+
+
+def parse_pdf(path: str, file_hash: str, metadata: Dict, chunk_size: int) -> List:
+    """Parse one PDF and split it into nodes with stable ids.
+
+    Runs in the ingestion worker processes, so it takes everything it needs
+    as arguments and returns plain picklable nodes without embeddings.
+    """
+    splitter = _splitters.get(chunk_size)
+    if splitter is None:
+        splitter = _splitters[chunk_size] = SentenceSplitter(chunk_size=chunk_size)
+
+    documents = SimpleDirectoryReader(input_files=[path]).load_data()
+    for document in documents:
+        document.metadata.update(metadata)
+        document.excluded_embed_metadata_keys = HIDDEN_METADATA
+        document.excluded_llm_metadata_keys = HIDDEN_METADATA
+
+    nodes = splitter.get_nodes_from_documents(documents)
+    for i, node in enumerate(nodes):
+        node.id_ = str(uuid.uuid5(CHUNK_NAMESPACE, f"{file_hash}:{i}"))
+        node.relationships = {
+            NodeRelationship.SOURCE: RelatedNodeInfo(node_id=file_hash)
+        }
+    return nodes
+
+
+def read_paper_metadata(pdf_path: str) -> Dict:
+    """Read the ``*_metadata.txt`` sidecar that older downloads wrote next to a PDF."""
+    sidecar = pdf_path[:-4] + "_metadata.txt"
+    metadata = {}
+    if not os.path.exists(sidecar):
+        return metadata
+    with open(sidecar, encoding="utf-8") as f:
+        for line in f:
+            key, _, value = line.partition(": ")
+            if key == "Title":
+                metadata["title"] = value.strip()
+            elif key == "Authors":
+                metadata["authors"] = value.strip()
+            elif key == "Published":
+                published = datetime.fromisoformat(value.strip())
+                metadata["published"] = int(published.strftime("%Y%m%d"))
+            elif key == "URL":
+                metadata["url"] = value.strip()
+                metadata["arxiv_id"] = value.strip().rsplit("/", 1)[-1]
+    return metadata
+
+
+class IngestionManifest:
+    """Record of what has been ingested, keyed by file name.
+
+    Each entry keeps the file's content hash plus its size and mtime, so an
+    unchanged file is recognised without re-reading it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def content_hash(self, file_name: str, path: str) -> str:
+        stat = os.stat(path)
+        entry = self.entries.get(file_name)
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            return entry["sha256"]
+        return file_sha256(path)
+
+
+class PendingFile:
+    """A new or changed PDF on its way through the ingestion pipeline."""
+
+    def __init__(self, file_name: str, path: str, file_hash: str, previous: Optional[Dict]):
+        self.file_name = file_name
+        self.path = path
+        self.file_hash = file_hash
+        self.previous = previous
+        self.nodes: List = []
+        self.error: Optional[Exception] = None
+
+
+class Ingestor:
+    """Incrementally sync the PDFs in ``data_path`` into a vector store.
+
+    Only new or changed PDFs are parsed, chunked and embedded. Chunks are
+    tagged with their file's content hash as the llama_index ``ref_doc_id``,
+    so a changed or deleted file's old points are removed with a single
+    ``vector_store.delete`` call.
+
+    Ingestion is a streaming pipeline: a pool of worker processes parses
+    and chunks PDFs, one thread embeds their chunks in batches and another
+    upserts them into the vector store. The stages are joined by bounded
+    queues and only a few files are parsed ahead of the embedder, so memory
+    stays flat however large the corpus is.
+    """
+
+    def __init__(self, config: Dict, vector_store, embed_model):
+        self.data_path = config["data_path"]
+        self.vector_store = vector_store
+        self.embed_model = embed_model
+        self.chunk_size = config["chunk_size"]
+        settings = config.get("ingest", {})
+        self.workers = settings.get("workers", 0) or os.cpu_count() or 1
+        self.parse_ahead = settings.get("parse_ahead") or 2 * self.workers
+        self.embed_batch = settings.get("embed_batch_chunks", 256)
+        self.upsert_batch = settings.get("upsert_batch_chunks", 256)
+        self.queue_size = settings.get("queue_size", 4)
+        # Starting the pool costs a few seconds, not worth it for a handful of files
+        self.min_pool_files = 8
+        self.manifest = IngestionManifest(os.path.join(self.data_path, MANIFEST_NAME))
+        self.downloads = load_download_metadata(self.data_path)
+        self.store = PaperStore(config["paper_store"]["path"])
+
+    def _pdf_files(self) -> Dict[str, str]:
+        return {
+            name: os.path.join(self.data_path, name)
+            for name in sorted(os.listdir(self.data_path))
+            if name.lower().endswith(".pdf")
+        }
+
+    def paper_metadata(self, path: str) -> Dict:
+        download = self.downloads.get(os.path.basename(path))
+        if download is None:
+            return read_paper_metadata(path)
+        return {
+            "title": download["title"],
+            "authors": ", ".join(download["authors"]),
+            "published": int(datetime.fromisoformat(download["published"]).strftime("%Y%m%d")),
+            "url": download["url"],
+            "arxiv_id": download["arxiv_id"],
+            # Every topic the paper was found under, for filtered retrieval
+            "topic": self.store.paper_topics(download["arxiv_id"])
+        }
+
+    def file_metadata(self, path: str, file_hash: str, extra_metadata: Optional[Dict] = None) -> Dict:
+        return {"file_hash": file_hash, **self.paper_metadata(path), **(extra_metadata or {})}
+
+    def build_nodes(self, path: str, file_hash: str, extra_metadata: Optional[Dict] = None) -> List:
+        return parse_pdf(path, file_hash, self.file_metadata(path, file_hash, extra_metadata), self.chunk_size)
+
+    def embed_nodes(self, nodes: List) -> List:
+        texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes]
+        embeddings = self.embed_model.get_text_embedding_batch(texts)
+        for node, embedding in zip(nodes, embeddings):
+            node.embedding = embedding
+        return nodes
+
+    def parsed_files(self, pending: List[PendingFile]) -> Iterator[PendingFile]:
+        """Yield ``pending`` with their nodes, in the order parsing finishes.
+
+        At most ``parse_ahead`` files are submitted to the pool at a time,
+        so parsed-but-not-embedded chunks don't pile up in memory.
+        """
+        if self.workers <= 1 or len(pending) < self.min_pool_files:
+            for item in pending:
+                try:
+                    item.nodes = self.build_nodes(item.path, item.file_hash)
+                except Exception as e:
+                    item.error = e
+                yield item
+            return
+
+        # Spawned rather than forked: the parent may have torch and SQLite
+        # threads running, which don't survive a fork
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(min(self.workers, len(pending)), mp_context=context) as pool:
+            remaining = iter(pending)
+            running = {}
+            while True:
+                while len(running) < self.parse_ahead:
+                    item = next(remaining, None)
+                    if item is None:
+                        break
+                    metadata = self.file_metadata(item.path, item.file_hash)
+                    running[pool.submit(parse_pdf, item.path, item.file_hash, metadata, self.chunk_size)] = item
+                if not running:
+                    return
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = running.pop(future)
+                    try:
+                        item.nodes = future.result()
+                    except Exception as e:
+                        item.error = e
+                    yield item
+
+    def _parse_stage(self, pending: List[PendingFile], parsed: queue.Queue, stop: threading.Event):
+        try:
+            for item in self.parsed_files(pending):
+                if stop.is_set():
+                    return
+                parsed.put(item)
+        finally:
+            parsed.put(_DONE)
+
+    def _embed_stage(self, parsed: queue.Queue, embedded: queue.Queue, stop: threading.Event):
+        # Chunks from several small files are embedded together so every
+        # encode call gets a full batch
+        batch: List[PendingFile] = []
+        chunks = 0
+
+        def flush():
+            nodes = [node for item in batch if item.error is None for node in item.nodes]
+            try:
+                for i in range(0, len(nodes), self.embed_batch):
+                    self.embed_nodes(nodes[i:i + self.embed_batch])
+            except Exception as e:
+                for item in batch:
+                    item.error = item.error or e
+            for item in batch:
+                embedded.put(item)
+            batch.clear()
+
+        try:
+            while not stop.is_set():
+                item = parsed.get()
+                if item is _DONE:
+                    break
+                batch.append(item)
+                chunks += len(item.nodes)
+                if chunks >= self.embed_batch:
+                    flush()
+                    chunks = 0
+            if batch and not stop.is_set():
+                flush()
+        finally:
+            embedded.put(_DONE)
+
+    def _upsert(self, item: PendingFile, stats: Dict):
+        if item.error is not None:
+            logger.error("Error ingesting %s: %s", item.file_name, item.error)
+            stats["failed"] += 1
+            return
+        try:
+            if item.previous:
+                self.vector_store.delete(item.previous["sha256"])
+            for i in range(0, len(item.nodes), self.upsert_batch):
+                self.vector_store.add(item.nodes[i:i + self.upsert_batch])
+        except Exception as e:
+            logger.error("Error ingesting %s: %s", item.file_name, e)
+            stats["failed"] += 1
+            return
+
+        stat = os.stat(item.path)
+        self.manifest.entries[item.file_name] = {
+            "sha256": item.file_hash,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "chunks": len(item.nodes),
+            "ingested_at": datetime.now().isoformat(timespec="seconds")
+        }
+        self.manifest.save()
+        stats["updated" if item.previous else "added"] += 1
+        stats["chunks"] += len(item.nodes)
+        logger.info("Ingested: %s (%d chunks)", item.file_name, len(item.nodes))
+
+    def ingest(self) -> Dict:
+        start = time.perf_counter()
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0, "failed": 0, "chunks": 0}
+        files = self._pdf_files()
+
+        for file_name in [name for name in self.manifest.entries if name not in files]:
+            self.vector_store.delete(self.manifest.entries[file_name]["sha256"])
+            del self.manifest.entries[file_name]
+            self.manifest.save()
+            stats["removed"] += 1
+            logger.info("Removed: %s", file_name)
+
+        pending = []
+        for file_name, path in files.items():
+            file_hash = self.manifest.content_hash(file_name, path)
+            previous = self.manifest.entries.get(file_name)
+            if previous and previous["sha256"] == file_hash:
+                stats["unchanged"] += 1
+                continue
+            pending.append(PendingFile(file_name, path, file_hash, previous))
+
+        if pending:
+            parsed: queue.Queue = queue.Queue(maxsize=self.queue_size)
+            embedded: queue.Queue = queue.Queue(maxsize=self.queue_size)
+            stop = threading.Event()
+            stages = [
+                threading.Thread(target=self._parse_stage, args=(pending, parsed, stop), daemon=True),
+                threading.Thread(target=self._embed_stage, args=(parsed, embedded, stop), daemon=True)
+            ]
+            for stage in stages:
+                stage.start()
+            try:
+                # Upserts and manifest updates stay on the calling thread
+                while True:
+                    item = embedded.get()
+                    if item is _DONE:
+                        break
+                    self._upsert(item, stats)
+            finally:
+                stop.set()
+                # Keep draining so stages blocked on a full queue can exit
+                while any(stage.is_alive() for stage in stages):
+                    for q in (parsed, embedded):
+                        while not q.empty():
+                            q.get_nowait()
+                    for stage in stages:
+                        stage.join(0.05)
+
+        stats["seconds"] = round(time.perf_counter() - start, 2)
+        return stats
@@ -0,0 +1,161 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from rag.metrics import REGISTRY
+
+# Lower runs first; interactive chats use "normal", bulk jobs "low"
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+WAIT_SECONDS = REGISTRY.histogram(
+    "research_assistant_llm_queue_wait_seconds",
+    "Time generations waited for a model slot, by priority",
+    ["priority"]
+)
+REJECTED = REGISTRY.counter(
+    "research_assistant_llm_rejected_total",
+    "Generations turned away by the scheduler: queue_full, or deadline "
+    "(would not have started in time)",
+    ["reason"]
+)
+
+
+class SchedulerError(Exception):
+    status_code = 503
+
+    def __init__(self, detail: str, retry_after: float = 1):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = max(1, round(retry_after))
+
+
+class QueueFull(SchedulerError):
+    status_code = 429
+
+
+class DeadlineExceeded(SchedulerError):
+    status_code = 503
+
+
+class LLMScheduler:
+    """Admission control in front of the model.
+
+    At most ``max_concurrent`` generations run at once and at most
+    ``max_queue`` wait for a slot, served by priority and then in arrival
+    order. A request is turned away straight away when the queue is full or
+    when, at the recent time per generation, it would not start before its
+    deadline; a waiting request gives up its place when its deadline passes
+    or its caller is cancelled (the client went away).
+    """
+
+    def __init__(self, max_concurrent: int = 3, max_queue: int = 16):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.queued = 0
+        # Moving average of how long a generation holds a slot
+        self.service_seconds: Optional[float] = None
+        self._waiters: List[list] = []  # heap of [priority, seq, future]
+        self._seq = itertools.count()
+
+    def estimated_wait(self, priority: int) -> float:
+        if self.in_flight < self.max_concurrent and not self.queued:
+            return 0.0
+        ahead = sum(1 for p, _, future in self._waiters if p <= priority and not future.done())
+        return (ahead + 1) / self.max_concurrent * (self.service_seconds or 0.0)
+
+    def admit(self, priority: int = PRIORITIES["normal"], deadline: Optional[float] = None):
+        """Raise QueueFull or DeadlineExceeded if a request should be turned away now.
+
+        ``deadline`` is a time.monotonic() value.
+        """
+        if self.in_flight < self.max_concurrent and not self.queued:
+            return
+        wait = self.estimated_wait(priority)
+        if self.queued >= self.max_queue:
+            REJECTED.inc(reason="queue_full")
+            raise QueueFull("The model is busy, too many requests are waiting. Please retry shortly.", wait)
+        if deadline is not None and time.monotonic() + wait > deadline:
+            REJECTED.inc(reason="deadline")
+            raise DeadlineExceeded("The model is busy and could not start this request in time.", wait)
+
+    async def acquire(self, priority: int = PRIORITIES["normal"], deadline: Optional[float] = None):
+        self.admit(priority, deadline)
+        label = priority_name(priority)
+        start = time.monotonic()
+        if self.in_flight < self.max_concurrent and not self.queued:
+            self.in_flight += 1
+            WAIT_SECONDS.observe(0.0, priority=label)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, [priority, next(self._seq), future])
+        self.queued += 1
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+        try:
+            done, _ = await asyncio.wait({future}, timeout=timeout)
+        except asyncio.CancelledError:
+            self._abandon(future)
+            raise
+        if not done:
+            self._abandon(future)
+            REJECTED.inc(reason="deadline")
+            raise DeadlineExceeded("The model is busy and could not start this request in time.")
+        WAIT_SECONDS.observe(time.monotonic() - start, priority=label)
+
+    def release(self, service_seconds: Optional[float] = None):
+        if service_seconds is not None:
+            self.service_seconds = service_seconds if self.service_seconds is None \
+                else 0.8 * self.service_seconds + 0.2 * service_seconds
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # The slot passes straight to the next waiter
+                self.queued -= 1
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def _abandon(self, future: asyncio.Future):
+        if future.done():
+            # Granted just as the caller gave up: hand the slot on
+            self.release()
+            return
+        future.cancel()
+        self.queued -= 1
+        if len(self._waiters) > 2 * self.max_queue:
+            self._waiters = [entry for entry in self._waiters if not entry[2].done()]
+            heapq.heapify(self._waiters)
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITIES["normal"], deadline: Optional[float] = None):
+        await self.acquire(priority, deadline)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+
+    def queue_depth(self) -> Dict[str, int]:
+        depth = {name: 0 for name in PRIORITIES}
+        for priority, _, future in self._waiters:
+            if not future.done():
+                depth[priority_name(priority)] += 1
+        return depth
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrent": self.max_concurrent,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "queue_depth": self.queue_depth(),
+            "service_seconds": round(self.service_seconds, 3) if self.service_seconds is not None else None
+        }
+
+
+def priority_name(priority: int) -> str:
+    return next((name for name, value in PRIORITIES.items() if value == priority), str(priority))
@@ -0,0 +1,289 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    row INTEGER PRIMARY KEY,
+    node_id TEXT UNIQUE NOT NULL,
+    ref_doc_id TEXT,
+    arxiv_id TEXT,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_ref_doc_id ON chunks (ref_doc_id);
+CREATE INDEX IF NOT EXISTS chunks_arxiv_id ON chunks (arxiv_id);
+
+CREATE TABLE IF NOT EXISTS chunk_topics (
+    row INTEGER NOT NULL,
+    topic TEXT NOT NULL,
+    PRIMARY KEY (topic, row)
+);
+CREATE INDEX IF NOT EXISTS chunk_topics_row ON chunk_topics (row);
+
+-- Rows of deleted chunks, reused by the next add
+CREATE TABLE IF NOT EXISTS free_rows (row INTEGER PRIMARY KEY);
+
+CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+# Per-row columns kept as memmaps next to the vectors, so filtering and
+# scoring never touch SQLite
+COLUMNS = {"published": np.int32, "alive": np.uint8, "list": np.int32}
+
+
+class MemmapIndex:
+    """Vectors in a memory-mapped float32 file, metadata in SQLite.
+
+    Opening the index maps the files without reading them, so it starts
+    instantly, and every process that opens the same directory (e.g. each
+    uvicorn worker) shares the vectors through the OS page cache. Search is
+    exact by default; with ``ivf_lists`` set, the vectors are clustered with
+    k-means and only the ``ivf_probes`` closest clusters are scanned.
+
+    One process writes at a time (the ingestor); readers pick up its changes
+    on their next search.
+    """
+
+    def __init__(self, path: str, dimension: int, ivf_lists: int = 0, ivf_probes: int = 8):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.dimension = dimension
+        self.ivf_lists = ivf_lists
+        self.ivf_probes = ivf_probes
+        self._conn = sqlite3.connect(os.path.join(path, "meta.sqlite"), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.execute("INSERT OR IGNORE INTO info VALUES ('dimension', ?)", (dimension,))
+        stored = self._info("dimension")
+        if stored != dimension:
+            raise ValueError(
+                f"Vector index at {path} holds {stored}-dim vectors but the embedder "
+                f"produces {dimension}; delete the directory and re-run ingestion"
+            )
+        self._capacity = 0
+        self._ivf_version = 0
+        self._centroids = None
+        self._arrays: Dict[str, np.memmap] = {}
+
+    def _info(self, key: str, default: int = 0) -> int:
+        row = self._conn.execute("SELECT value FROM info WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_info(self, key: str, value: int):
+        self._conn.execute("INSERT OR REPLACE INTO info VALUES (?, ?)", (key, value))
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.bin")
+
+    def _map(self, capacity: int):
+        self._arrays = {}
+        if capacity:
+            self._arrays["vectors"] = np.memmap(self._file("vectors"), dtype=np.float32, mode="r+",
+                                                shape=(capacity, self.dimension))
+            for name, dtype in COLUMNS.items():
+                self._arrays[name] = np.memmap(self._file(name), dtype=dtype, mode="r+", shape=(capacity,))
+        self._capacity = capacity
+
+    def _refresh(self) -> int:
+        """Remap after another process grew the files or retrained the clusters; return the row count."""
+        capacity = self._info("capacity")
+        if capacity != self._capacity:
+            self._map(capacity)
+        version = self._info("ivf_version")
+        if version != self._ivf_version:
+            self._centroids = np.load(os.path.join(self.path, "centroids.npy")) if version else None
+            self._ivf_version = version
+        return self._info("rows")
+
+    def _reserve(self, rows: int):
+        if rows <= self._capacity:
+            return
+        capacity = max(1024, self._capacity)
+        while capacity < rows:
+            capacity *= 2
+        for name, dtype in {"vectors": np.float32, **COLUMNS}.items():
+            width = self.dimension if name == "vectors" else 1
+            with open(self._file(name), "ab") as f:
+                f.truncate(capacity * width * np.dtype(dtype).itemsize)
+        self._map(capacity)
+        self._set_info("capacity", capacity)
+
+    def _flush(self):
+        for array in self._arrays.values():
+            array.flush()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def add(self, records: List[Dict]):
+        """Insert or overwrite chunks.
+
+        Each record has ``id``, ``vector``, ``payload`` (a JSON string) and
+        optionally ``ref_doc_id``, ``published`` (YYYYMMDD), ``arxiv_id`` and
+        ``topics``.
+        """
+        if not records:
+            return
+        vectors = np.asarray([record["vector"] for record in records], dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+        with self._lock, self._conn:
+            rows_used = self._refresh()
+            existing = {}
+            ids = [record["id"] for record in records]
+            for i in range(0, len(ids), 500):
+                batch = ids[i:i + 500]
+                existing.update(self._conn.execute(
+                    f"SELECT node_id, row FROM chunks WHERE node_id IN ({','.join('?' * len(batch))})", batch
+                ).fetchall())
+
+            needed = len([i for i in dict.fromkeys(ids) if i not in existing])
+            free = [row for (row,) in self._conn.execute("SELECT row FROM free_rows LIMIT ?", (needed,))]
+            self._conn.executemany("DELETE FROM free_rows WHERE row = ?", [(row,) for row in free])
+            fresh = list(range(rows_used, rows_used + needed - len(free)))
+            new_rows = iter(free + fresh)
+            rows = []
+            for node_id in ids:
+                if node_id not in existing:
+                    existing[node_id] = next(new_rows)
+                rows.append(existing[node_id])
+            self._reserve(rows_used + len(fresh))
+
+            rows = np.asarray(rows)
+            self._arrays["vectors"][rows] = vectors
+            self._arrays["published"][rows] = [record.get("published") or 0 for record in records]
+            self._arrays["list"][rows] = self._assign(vectors)
+            self._arrays["alive"][rows] = 1
+
+            self._conn.executemany("DELETE FROM chunk_topics WHERE row = ?", [(int(row),) for row in rows])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?)",
+                [(int(row), record["id"], record.get("ref_doc_id"), record.get("arxiv_id"), record["payload"])
+                 for row, record in zip(rows, records)]
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO chunk_topics VALUES (?, ?)",
+                [(int(row), topic) for row, record in zip(rows, records) for topic in record.get("topics") or []]
+            )
+            self._flush()
+            self._set_info("rows", rows_used + len(fresh))
+
+        if self.ivf_lists and self._needs_training():
+            self.train()
+
+    def delete(self, ref_doc_id: str):
+        with self._lock, self._conn:
+            self._refresh()
+            rows = [row for (row,) in self._conn.execute("SELECT row FROM chunks WHERE ref_doc_id = ?", (ref_doc_id,))]
+            if not rows:
+                return
+            self._arrays["alive"][rows] = 0
+            self._flush()
+            self._conn.executemany("DELETE FROM chunks WHERE row = ?", [(row,) for row in rows])
+            self._conn.executemany("DELETE FROM chunk_topics WHERE row = ?", [(row,) for row in rows])
+            self._conn.executemany("INSERT OR IGNORE INTO free_rows VALUES (?)", [(row,) for row in rows])
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        if self._centroids is None:
+            return np.full(len(vectors), -1, dtype=np.int32)
+        return np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+
+    def _needs_training(self) -> bool:
+        # Recluster once the index has doubled since the clusters were built;
+        # k-means wants a few dozen points per cluster to be worth it
+        live = len(self)
+        return live >= self.ivf_lists * 39 and live >= 2 * self._info("ivf_trained")
+
+    def train(self, iterations: int = 10, sample_size: int = 64, seed: int = 0):
+        """Cluster the vectors with spherical k-means and assign every row to a cluster."""
+        with self._lock, self._conn:
+            rows_used = self._refresh()
+            alive = np.flatnonzero(self._arrays["alive"][:rows_used])
+            if len(alive) < self.ivf_lists:
+                return
+            rng = np.random.default_rng(seed)
+            sample = np.sort(rng.choice(alive, min(len(alive), self.ivf_lists * sample_size), replace=False))
+            points = np.asarray(self._arrays["vectors"][sample])
+            centroids = points[rng.choice(len(points), self.ivf_lists, replace=False)]
+            for _ in range(iterations):
+                labels = np.argmax(points @ centroids.T, axis=1)
+                order = np.argsort(labels, kind="stable")
+                clusters, starts = np.unique(labels[order], return_index=True)
+                # Empty clusters keep their previous centroid
+                centroids[clusters] = np.add.reduceat(points[order], starts, axis=0)
+                centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+            self._centroids = centroids.astype(np.float32)
+            for start in range(0, rows_used, 65536):
+                block = np.asarray(self._arrays["vectors"][start:start + 65536])
+                self._arrays["list"][start:start + len(block)] = self._assign(block)
+            self._flush()
+
+            tmp_path = os.path.join(self.path, "centroids.tmp.npy")
+            np.save(tmp_path, self._centroids)
+            os.replace(tmp_path, os.path.join(self.path, "centroids.npy"))
+            self._ivf_version = self._info("ivf_version") + 1
+            self._set_info("ivf_version", self._ivf_version)
+            self._set_info("ivf_trained", len(alive))
+
+    def _rows_matching(self, arxiv_ids: Optional[List[str]], topics: Optional[List[str]]) -> np.ndarray:
+        sql, params = "SELECT row FROM chunks WHERE 1", []
+        if arxiv_ids is not None:
+            sql += f" AND arxiv_id IN ({','.join('?' * len(arxiv_ids))})"
+            params += arxiv_ids
+        if topics is not None:
+            sql += f" AND row IN (SELECT row FROM chunk_topics WHERE topic IN ({','.join('?' * len(topics))}))"
+            params += topics
+        return np.asarray([row for (row,) in self._conn.execute(sql, params)], dtype=np.int64)
+
+    def search(self, vector, top_k: int, start: Optional[int] = None, end: Optional[int] = None,
+               arxiv_ids: Optional[List[str]] = None, topics: Optional[List[str]] = None,
+               exact: bool = False) -> List[Tuple[str, float, Dict]]:
+        """Return ``(node_id, cosine similarity, payload)`` for the best ``top_k`` chunks.
+
+        ``start``/``end`` bound the published date (YYYYMMDD, inclusive);
+        ``arxiv_ids`` and ``topics`` keep chunks matching any of the values.
+        """
+        query = np.asarray(vector, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        with self._lock:
+            rows_used = self._refresh()
+            if not rows_used:
+                return []
+            mask = self._arrays["alive"][:rows_used].astype(bool)
+            if start is not None:
+                mask &= self._arrays["published"][:rows_used] >= start
+            if end is not None:
+                mask &= self._arrays["published"][:rows_used] <= end
+            if arxiv_ids is not None or topics is not None:
+                matching = np.zeros(rows_used, dtype=bool)
+                matching[self._rows_matching(arxiv_ids, topics)] = True
+                mask &= matching
+            if self._centroids is not None and not exact:
+                probes = np.argsort(self._centroids @ query)[-self.ivf_probes:]
+                # Rows added after the last training that landed in no cluster are always scanned
+                mask &= np.isin(self._arrays["list"][:rows_used], np.append(probes, -1))
+
+            candidates = np.flatnonzero(mask)
+            if not len(candidates):
+                return []
+            if len(candidates) > rows_used // 2:
+                scores = (self._arrays["vectors"][:rows_used] @ query)[candidates]
+            else:
+                scores = self._arrays["vectors"][candidates] @ query
+            best = np.argpartition(-scores, min(top_k, len(scores)) - 1)[:top_k]
+            best = best[np.argsort(-scores[best])]
+
+            rows = [int(candidates[i]) for i in best]
+            chunks = {
+                row: (node_id, payload) for row, node_id, payload in self._conn.execute(
+                    f"SELECT row, node_id, payload FROM chunks WHERE row IN ({','.join('?' * len(rows))})", rows
+                )
+            }
+        return [(chunks[row][0], float(scores[i]), json.loads(chunks[row][1])) for row, i in zip(rows, best)]
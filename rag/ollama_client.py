@@ -0,0 +1,185 @@
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from rag.llm_scheduler import PRIORITIES, LLMScheduler
+from rag.metrics import REGISTRY
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "research_assistant_ollama_request_seconds",
+    "Wall time of Ollama generations, including the wait for a free slot",
+    ["mode"]
+)
+FIRST_TOKEN_SECONDS = REGISTRY.histogram(
+    "research_assistant_ollama_first_token_seconds",
+    "Time from sending a streaming generation (once it has a slot) to its first token"
+)
+# Ollama's own timings from the final response: model load, prompt prefill
+# (prompt_eval) and token generation (eval)
+PHASE_SECONDS = REGISTRY.histogram(
+    "research_assistant_ollama_phase_seconds",
+    "Ollama-reported load, prompt_eval and eval durations",
+    ["phase"]
+)
+TOKENS = REGISTRY.counter(
+    "research_assistant_ollama_tokens_total",
+    "Prompt tokens evaluated and tokens generated by Ollama",
+    ["kind"]
+)
+TOKENS_PER_SECOND = REGISTRY.histogram(
+    "research_assistant_ollama_tokens_per_second",
+    "Generation speed reported by Ollama (eval_count / eval_duration)",
+    buckets=(1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200, 400)
+)
+
+
+class OllamaError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class OllamaClient:
+    """Async client for the Ollama HTTP API.
+
+    A single instance is shared by the whole app so connections to Ollama are
+    kept alive and reused between requests instead of being re-opened by every
+    chat call. Generations go through ``scheduler``, which bounds how many
+    run and wait at once; by default ``max_concurrent`` run and up to 16 wait.
+    """
+
+    def __init__(self, base_url: str, model: str, timeout: float = 240,
+                 max_connections: int = 10, max_concurrent: int = 3,
+                 keep_alive: Optional[str] = None, scheduler: Optional[LLMScheduler] = None):
+        self.model = model
+        # How long Ollama keeps the model loaded after a request ("30m", "-1"
+        # for forever); None leaves Ollama's own default of five minutes
+        self.keep_alive = keep_alive
+        self.scheduler = scheduler or LLMScheduler(max_concurrent)
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(timeout, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            )
+        )
+
+    def _payload(self, prompt: str, stream: bool, options: Optional[Dict],
+                 context: Optional[List[int]] = None) -> Dict:
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": options or {}
+        }
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        if context:
+            # Tokens of an earlier exchange (the ``context`` Ollama returned);
+            # the prompt continues that conversation
+            payload["context"] = context
+        return payload
+
+    @staticmethod
+    def _record(final: Dict):
+        for phase in ("load", "prompt_eval", "eval"):
+            if final.get(f"{phase}_duration"):
+                PHASE_SECONDS.observe(final[f"{phase}_duration"] / 1e9, phase=phase)
+        TOKENS.inc(final.get("prompt_eval_count", 0), kind="prompt")
+        TOKENS.inc(final.get("eval_count", 0), kind="generated")
+        if final.get("eval_count") and final.get("eval_duration"):
+            TOKENS_PER_SECOND.observe(final["eval_count"] / (final["eval_duration"] / 1e9))
+
+    async def generate(self, prompt: str, options: Optional[Dict] = None,
+                       context: Optional[List[int]] = None, priority: int = PRIORITIES["normal"],
+                       deadline: Optional[float] = None) -> Dict:
+        """Generate a complete answer.
+
+        ``deadline`` (a time.monotonic() value) bounds the wait for a slot
+        and the generation itself; the scheduler raises QueueFull or
+        DeadlineExceeded if it can't start in time, and a generation still
+        running at the deadline raises TimeoutError. Cancelling the call
+        closes the connection, which makes Ollama stop generating.
+        """
+        with REQUEST_SECONDS.time(mode="generate"):
+            async with self.scheduler.slot(priority, deadline):
+                post = self._client.post(
+                    "/api/generate",
+                    json=self._payload(prompt, False, options, context)
+                )
+                if deadline is None:
+                    response = await post
+                else:
+                    response = await asyncio.wait_for(post, max(deadline - time.monotonic(), 0))
+        if response.status_code != 200:
+            raise OllamaError(response.status_code, response.text)
+        data = response.json()
+        self._record(data)
+        return data
+
+    async def stream(self, prompt: str, options: Optional[Dict] = None,
+                     context: Optional[List[int]] = None, priority: int = PRIORITIES["normal"],
+                     deadline: Optional[float] = None) -> AsyncIterator[Dict]:
+        """Yield the NDJSON chunks of a streaming generation as Ollama emits them.
+
+        Scheduling and ``deadline`` work as in generate(). Closing the
+        iterator early (the client disconnected) closes the upstream
+        connection and Ollama stops generating.
+        """
+        start = time.perf_counter()
+        try:
+            async with self.scheduler.slot(priority, deadline):
+                sent = time.perf_counter()
+                first_token = True
+                async with self._client.stream(
+                    "POST",
+                    "/api/generate",
+                    json=self._payload(prompt, True, options, context)
+                ) as response:
+                    if response.status_code != 200:
+                        body = await response.aread()
+                        raise OllamaError(response.status_code, body.decode(errors="replace"))
+                    async for line in response.aiter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if "error" in chunk:
+                            raise OllamaError(500, chunk["error"])
+                        if first_token and chunk.get("response"):
+                            FIRST_TOKEN_SECONDS.observe(time.perf_counter() - sent)
+                            first_token = False
+                        if chunk.get("done"):
+                            self._record(chunk)
+                        elif deadline is not None and time.monotonic() > deadline:
+                            raise TimeoutError("Generation ran past its deadline")
+                        yield chunk
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - start, mode="stream")
+
+    async def load(self) -> Dict:
+        """Load the model into memory without generating anything.
+
+        Ollama treats a generate request without a prompt as a load, so the
+        first real chat doesn't pay for reading the weights from disk.
+        """
+        payload = {"model": self.model, "stream": False}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        response = await self._client.post("/api/generate", json=payload)
+        if response.status_code != 200:
+            raise OllamaError(response.status_code, response.text)
+        return response.json()
+
+    async def tags(self, timeout: float = 5) -> Dict:
+        response = await self._client.get("/api/tags", timeout=timeout)
+        if response.status_code != 200:
+            raise OllamaError(response.status_code, response.text)
+        return response.json()
+
+    async def aclose(self):
+        await self._client.aclose()
@@ -0,0 +1,139 @@
+import asyncio
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from rag.cache import CacheStats
+from rag.paper_store import PaperStore, to_timestamp
+
+
+class Paper:
+    """One paper's metadata, read-only and shared by everything that lists it.
+
+    ``published`` is kept as a Unix timestamp (``published_ts``) and author
+    names are interned. ``paper["title"]`` style access still works, and
+    ``paper["published"]`` still returns a datetime, so a record can stand in
+    for the dicts PaperStore and the arXiv client build.
+    """
+
+    __slots__ = ("arxiv_id", "title", "authors", "published_ts", "url", "abstract")
+
+    def __init__(self, arxiv_id: str, title: str, authors: tuple, published_ts: int,
+                 url: Optional[str], abstract: Optional[str]):
+        self.arxiv_id = sys.intern(arxiv_id)
+        self.title = title
+        self.authors = tuple(sys.intern(author) for author in authors)
+        self.published_ts = published_ts
+        self.url = url
+        self.abstract = abstract
+
+    @classmethod
+    def from_dict(cls, paper: Dict) -> "Paper":
+        published = paper["published"]
+        return cls(paper["arxiv_id"], paper["title"], paper["authors"],
+                   published if isinstance(published, int) else to_timestamp(published),
+                   paper.get("url"), paper.get("abstract"))
+
+    @property
+    def published(self) -> datetime:
+        return datetime.fromtimestamp(self.published_ts, tz=timezone.utc)
+
+    def _fields(self) -> tuple:
+        return self.arxiv_id, self.title, self.authors, self.published_ts, self.url, self.abstract
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Paper) and self._fields() == other._fields()
+
+    def __hash__(self) -> int:
+        return hash(self.arxiv_id)
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__ and key != "published":
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __repr__(self) -> str:
+        return f"Paper({self.arxiv_id!r}, {self.title[:40]!r})"
+
+
+class PaperRecords:
+    """Every paper held in memory once, keyed by arXiv ID.
+
+    Topic caches keep tuples of IDs and resolve them here, so a paper that
+    matches 50 topics costs one record instead of 50 dicts. Records not used
+    recently are dropped past ``max_papers`` and reloaded from the paper
+    store when a cached topic asks for them again.
+    """
+
+    def __init__(self, store: PaperStore, max_papers: int = 20000):
+        self.store = store
+        self.max_papers = max_papers
+        self._records: "OrderedDict[str, Paper]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+    def add(self, papers: Iterable[Union[Dict, Paper]]) -> List[Paper]:
+        """Return the shared record for each paper, adding or refreshing it."""
+        records = []
+        with self._lock:
+            for paper in papers:
+                record = paper if isinstance(paper, Paper) else Paper.from_dict(paper)
+                existing = self._records.get(record.arxiv_id)
+                if existing is not None and existing == record:
+                    record = existing
+                else:
+                    self._records[record.arxiv_id] = record
+                self._records.move_to_end(record.arxiv_id)
+                records.append(record)
+            self._evict()
+        return records
+
+    def resolve(self, arxiv_ids: Iterable[str]) -> List[Paper]:
+        """Records for ``arxiv_ids`` in order; IDs the store no longer has are skipped."""
+        arxiv_ids = list(arxiv_ids)
+        found, missing = self._lookup(arxiv_ids)
+        if missing:
+            found.update((paper.arxiv_id, paper) for paper in self.add(self.store.get_many(missing)))
+        return [found[arxiv_id] for arxiv_id in arxiv_ids if arxiv_id in found]
+
+    async def aresolve(self, arxiv_ids: Iterable[str]) -> List[Paper]:
+        """resolve() for async code: the paper store is only read, in a
+        worker thread, for the IDs not held in memory."""
+        arxiv_ids = list(arxiv_ids)
+        found, missing = self._lookup(arxiv_ids)
+        if missing:
+            papers = await asyncio.to_thread(self.store.get_many, missing)
+            found.update((paper.arxiv_id, paper) for paper in self.add(papers))
+        return [found[arxiv_id] for arxiv_id in arxiv_ids if arxiv_id in found]
+
+    def _lookup(self, arxiv_ids: List[str]) -> Tuple[Dict[str, Paper], List[str]]:
+        with self._lock:
+            found = {}
+            for arxiv_id in arxiv_ids:
+                record = self._records.get(arxiv_id)
+                if record is not None:
+                    self._records.move_to_end(arxiv_id)
+                    found[arxiv_id] = record
+            self._stats.hits += len(found)
+            missing = [arxiv_id for arxiv_id in arxiv_ids if arxiv_id not in found]
+            self._stats.misses += len(missing)
+        return found, missing
+
+    def _evict(self):
+        while len(self._records) > self.max_papers:
+            self._records.popitem(last=False)
+            self._stats.evictions += 1
+
+    def __len__(self):
+        return len(self._records)
+
+    def stats(self) -> Dict:
+        return self._stats.as_dict(len(self), self.max_papers)
@@ -0,0 +1,299 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    arxiv_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    authors TEXT NOT NULL,
+    published INTEGER NOT NULL,
+    url TEXT,
+    abstract TEXT,
+    updated_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS papers_published ON papers (published);
+
+CREATE TABLE IF NOT EXISTS paper_authors (
+    arxiv_id TEXT NOT NULL,
+    author TEXT NOT NULL COLLATE NOCASE,
+    PRIMARY KEY (arxiv_id, author)
+);
+CREATE INDEX IF NOT EXISTS paper_authors_author ON paper_authors (author);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+    title, abstract, content='papers', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS papers_ai AFTER INSERT ON papers BEGIN
+    INSERT INTO papers_fts (rowid, title, abstract) VALUES (new.rowid, new.title, new.abstract);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_ad AFTER DELETE ON papers BEGIN
+    INSERT INTO papers_fts (papers_fts, rowid, title, abstract) VALUES ('delete', old.rowid, old.title, old.abstract);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_au AFTER UPDATE ON papers BEGIN
+    INSERT INTO papers_fts (papers_fts, rowid, title, abstract) VALUES ('delete', old.rowid, old.title, old.abstract);
+    INSERT INTO papers_fts (rowid, title, abstract) VALUES (new.rowid, new.title, new.abstract);
+END;
+
+CREATE TABLE IF NOT EXISTS topic_papers (
+    topic TEXT NOT NULL,
+    arxiv_id TEXT NOT NULL,
+    PRIMARY KEY (topic, arxiv_id)
+);
+
+-- The submittedDate interval [start, end] for which every arXiv match of
+-- the topic is in topic_papers
+CREATE TABLE IF NOT EXISTS topic_coverage (
+    topic TEXT PRIMARY KEY,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL
+);
+
+-- Topics kept fresh by rag/sync.py; high_water_mark is the submittedDate
+-- up to which the topic has been synced
+CREATE TABLE IF NOT EXISTS tracked_topics (
+    topic TEXT PRIMARY KEY,
+    years INTEGER NOT NULL,
+    high_water_mark INTEGER,
+    last_synced_at INTEGER,
+    last_new_papers INTEGER
+);
+
+-- One summary per paper and model, shared by every topic the paper is in
+CREATE TABLE IF NOT EXISTS paper_summaries (
+    arxiv_id TEXT NOT NULL,
+    model TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    created_at INTEGER NOT NULL,
+    PRIMARY KEY (arxiv_id, model)
+);
+"""
+
+PAPER_COLUMNS = "p.arxiv_id, p.title, p.authors, p.published, p.url, p.abstract"
+
+
+def to_timestamp(value: datetime) -> int:
+    return int(value.timestamp())
+
+
+def _row_to_paper(row) -> Dict:
+    return {
+        "arxiv_id": row[0],
+        "title": row[1],
+        "authors": json.loads(row[2]),
+        "published": datetime.fromtimestamp(row[3], tz=timezone.utc),
+        "url": row[4],
+        "abstract": row[5]
+    }
+
+
+def fts_query(text: str) -> str:
+    # Quote every term so user input can't be read as FTS5 syntax
+    terms = ["".join(c for c in word if c.isalnum()) for word in text.split()]
+    return " ".join(f'"{term}"' for term in terms if term)
+
+
+class PaperStore:
+    """Local arXiv metadata: papers by ID, date and author, plus FTS5 search.
+
+    It also remembers which papers matched each topic and over which date
+    range that list is complete, so a search can be answered locally and
+    only the uncovered part of the range has to be requested from arXiv.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def upsert_papers(self, papers: List[Dict], topic: Optional[str] = None):
+        now = int(time.time())
+        with self._lock, self._conn:
+            for paper in papers:
+                self._conn.execute(
+                    "INSERT INTO papers VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (arxiv_id) DO UPDATE SET title = excluded.title, "
+                    "authors = excluded.authors, published = excluded.published, "
+                    "url = excluded.url, abstract = excluded.abstract, "
+                    "updated_at = excluded.updated_at",
+                    (paper["arxiv_id"], paper["title"], json.dumps(paper["authors"]),
+                     to_timestamp(paper["published"]), paper["url"], paper["abstract"], now)
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO paper_authors VALUES (?, ?)",
+                    [(paper["arxiv_id"], author) for author in paper["authors"]]
+                )
+            if topic is not None:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO topic_papers VALUES (?, ?)",
+                    [(topic, paper["arxiv_id"]) for paper in papers]
+                )
+
+    def get(self, arxiv_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {PAPER_COLUMNS} FROM papers p WHERE p.arxiv_id = ?", (arxiv_id,)
+            ).fetchone()
+        return _row_to_paper(row) if row else None
+
+    def get_many(self, arxiv_ids: List[str]) -> List[Dict]:
+        papers = []
+        with self._lock:
+            for i in range(0, len(arxiv_ids), 500):
+                batch = arxiv_ids[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT {PAPER_COLUMNS} FROM papers p "
+                    f"WHERE p.arxiv_id IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                papers += [_row_to_paper(row) for row in rows]
+        return papers
+
+    def paper_topics(self, arxiv_id: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT topic FROM topic_papers WHERE arxiv_id = ? ORDER BY topic", (arxiv_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def coverage(self, topic: str) -> Optional[Tuple[int, int]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT start, end FROM topic_coverage WHERE topic = ?", (topic,)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def add_coverage(self, topic: str, start: int, end: int):
+        """Record that [start, end] is now complete, merging with what was covered."""
+        current = self.coverage(topic)
+        if current and start <= current[1] and end >= current[0]:
+            start, end = min(start, current[0]), max(end, current[1])
+        elif current and current[1] > end:
+            # A disjoint, older interval never replaces the newer one
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO topic_coverage VALUES (?, ?, ?)", (topic, start, end)
+            )
+
+    def topic_papers(self, topic: str, start: int, end: int, limit: int,
+                     before: Optional[Tuple[int, str]] = None) -> List[Dict]:
+        """Newest first; ``before`` is the (published, arxiv_id) of the last
+        paper of the previous page."""
+        sql = (
+            f"SELECT {PAPER_COLUMNS} FROM topic_papers t JOIN papers p USING (arxiv_id) "
+            "WHERE t.topic = ? AND p.published BETWEEN ? AND ?"
+        )
+        params = [topic, start, end]
+        if before is not None:
+            sql += " AND (p.published < ? OR (p.published = ? AND p.arxiv_id < ?))"
+            params += [before[0], before[0], before[1]]
+        sql += " ORDER BY p.published DESC, p.arxiv_id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [_row_to_paper(row) for row in rows]
+
+    def search(self, text: str, start: Optional[int] = None, end: Optional[int] = None,
+               author: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        """Full-text search over titles and abstracts, best match first."""
+        query = fts_query(text)
+        if not query:
+            return []
+        sql = (
+            f"SELECT {PAPER_COLUMNS} FROM papers_fts f JOIN papers p ON p.rowid = f.rowid "
+            "WHERE papers_fts MATCH ?"
+        )
+        params = [query]
+        if start is not None:
+            sql += " AND p.published >= ?"
+            params.append(start)
+        if end is not None:
+            sql += " AND p.published <= ?"
+            params.append(end)
+        if author:
+            sql += " AND p.arxiv_id IN (SELECT arxiv_id FROM paper_authors WHERE author = ?)"
+            params.append(author)
+        sql += " ORDER BY f.rank LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [_row_to_paper(row) for row in rows]
+
+    def by_author(self, author: str, limit: int = 50) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {PAPER_COLUMNS} FROM paper_authors a JOIN papers p USING (arxiv_id) "
+                "WHERE a.author = ? ORDER BY p.published DESC LIMIT ?",
+                (author, limit)
+            ).fetchall()
+        return [_row_to_paper(row) for row in rows]
+
+    def known_topic_papers(self, topic: str, arxiv_ids: List[str]) -> set:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT arxiv_id FROM topic_papers WHERE topic = ? "
+                f"AND arxiv_id IN ({','.join('?' * len(arxiv_ids))})",
+                [topic, *arxiv_ids]
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def track_topic(self, topic: str, years: int):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO tracked_topics (topic, years) VALUES (?, ?) "
+                "ON CONFLICT (topic) DO UPDATE SET years = excluded.years",
+                (topic, years)
+            )
+
+    def untrack_topic(self, topic: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM tracked_topics WHERE topic = ?", (topic,))
+
+    def tracked_topics(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT topic, years, high_water_mark, last_synced_at, last_new_papers "
+                "FROM tracked_topics ORDER BY topic"
+            ).fetchall()
+        return [
+            dict(zip(("topic", "years", "high_water_mark", "last_synced_at", "last_new_papers"), row))
+            for row in rows
+        ]
+
+    def mark_synced(self, topic: str, high_water_mark: int, new_papers: int):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE tracked_topics SET high_water_mark = ?, last_synced_at = ?, "
+                "last_new_papers = ? WHERE topic = ?",
+                (high_water_mark, int(time.time()), new_papers, topic)
+            )
+
+    def summaries(self, arxiv_ids: List[str], model: str) -> Dict[str, str]:
+        found = {}
+        with self._lock:
+            for i in range(0, len(arxiv_ids), 500):
+                batch = arxiv_ids[i:i + 500]
+                rows = self._conn.execute(
+                    "SELECT arxiv_id, summary FROM paper_summaries WHERE model = ? "
+                    f"AND arxiv_id IN ({','.join('?' * len(batch))})",
+                    [model, *batch]
+                )
+                found.update(rows)
+        return found
+
+    def put_summary(self, arxiv_id: str, model: str, summary: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO paper_summaries VALUES (?, ?, ?, ?)",
+                (arxiv_id, model, summary, int(time.time()))
+            )
@@ -0,0 +1,118 @@
+import logging
+from typing import Dict, Optional
+
+from qdrant_client.http import models as rest
+from qdrant_client.http.exceptions import UnexpectedResponse
+
+logger = logging.getLogger(__name__)
+
+# Payload fields used in search filters. doc_id is the ref_doc_id llama_index
+# stores with every chunk; the ingestor deletes a file's chunks by it
+PAYLOAD_INDEXES = {
+    "published": rest.PayloadSchemaType.INTEGER,
+    "arxiv_id": rest.PayloadSchemaType.KEYWORD,
+    "topic": rest.PayloadSchemaType.KEYWORD,
+    "doc_id": rest.PayloadSchemaType.KEYWORD,
+}
+
+
+def collection_info(client, name: str) -> Optional[rest.CollectionInfo]:
+    """The collection's info, or None if it does not exist.
+
+    Works on qdrant-client 1.7, which has no collection_exists(): a missing
+    collection is a 404 from a server and a ValueError in local mode.
+    """
+    try:
+        return client.get_collection(name)
+    except UnexpectedResponse as e:
+        if e.status_code == 404:
+            return None
+        raise
+    except ValueError:
+        return None
+
+
+class QdrantCollection:
+    """Create the chunk collection with the settings in ``config["qdrant"]``
+    and bring an existing collection in line with them.
+
+    Quantized vectors are kept in RAM for the HNSW search while the float32
+    originals can live on disk and are only read to rescore the top hits,
+    which is what keeps memory per chunk low.
+    """
+
+    def __init__(self, client, config: Dict):
+        settings = config.get("qdrant", {})
+        self.client = client
+        self.name = config["collection_name"]
+        self.quantization = settings.get("quantization", "int8")
+        self.quantile = settings.get("quantile", 0.99)
+        self.vectors_on_disk = settings.get("vectors_on_disk", True)
+        self.payload_on_disk = settings.get("payload_on_disk", True)
+        self.hnsw_m = settings.get("hnsw_m", 16)
+        self.hnsw_ef_construct = settings.get("hnsw_ef_construct", 100)
+        self.hnsw_on_disk = settings.get("hnsw_on_disk", False)
+
+    def quantization_config(self) -> Optional[rest.QuantizationConfig]:
+        if self.quantization == "int8":
+            return rest.ScalarQuantization(scalar=rest.ScalarQuantizationConfig(
+                type=rest.ScalarType.INT8, quantile=self.quantile, always_ram=True
+            ))
+        if self.quantization == "binary":
+            return rest.BinaryQuantization(binary=rest.BinaryQuantizationConfig(always_ram=True))
+        if self.quantization in (None, "none"):
+            return None
+        raise ValueError(f"Unknown quantization '{self.quantization}', expected int8, binary or none")
+
+    def hnsw_config(self) -> rest.HnswConfigDiff:
+        return rest.HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct, on_disk=self.hnsw_on_disk)
+
+    def ensure(self, dimension: int) -> str:
+        """Create or migrate the collection; return "created", "migrated" or "unchanged"."""
+        info = collection_info(self.client, self.name)
+        if info is None:
+            self.client.create_collection(
+                collection_name=self.name,
+                vectors_config=rest.VectorParams(
+                    size=dimension, distance=rest.Distance.COSINE, on_disk=self.vectors_on_disk
+                ),
+                hnsw_config=self.hnsw_config(),
+                quantization_config=self.quantization_config(),
+                on_disk_payload=self.payload_on_disk
+            )
+            self._create_payload_indexes({})
+            logger.info("Created collection '%s' (%d dims, quantization: %s)", self.name, dimension, self.quantization)
+            return "created"
+
+        vectors = info.config.params.vectors
+        if vectors.size != dimension:
+            raise ValueError(
+                f"Collection '{self.name}' holds {vectors.size}-dim vectors but the embedder "
+                f"produces {dimension}; delete the collection and re-run ingestion"
+            )
+
+        changes = {}
+        if bool(vectors.on_disk) != self.vectors_on_disk:
+            changes["vectors_config"] = {"": rest.VectorParamsDiff(on_disk=self.vectors_on_disk)}
+        hnsw = info.config.hnsw_config
+        if (hnsw.m, hnsw.ef_construct, bool(hnsw.on_disk)) != (self.hnsw_m, self.hnsw_ef_construct, self.hnsw_on_disk):
+            changes["hnsw_config"] = self.hnsw_config()
+        if info.config.quantization_config != self.quantization_config():
+            changes["quantization_config"] = self.quantization_config() or rest.Disabled.DISABLED
+        missing = self._create_payload_indexes(info.payload_schema or {})
+
+        if changes:
+            # Qdrant rebuilds the affected segments in the background
+            self.client.update_collection(collection_name=self.name, **changes)
+        if changes or missing:
+            logger.info("Migrated collection '%s': %s", self.name, ", ".join([*changes, *missing]))
+            return "migrated"
+        return "unchanged"
+
+    def _create_payload_indexes(self, existing: Dict):
+        missing = [field for field in PAYLOAD_INDEXES if field not in existing]
+        for field in missing:
+            self.client.create_payload_index(
+                collection_name=self.name, field_name=field, field_schema=PAYLOAD_INDEXES[field]
+            )
+        return missing
@@ -1,58 +1,45 @@
 from llama_index.core import (
     VectorStoreIndex,
-    SimpleDirectoryReader,
     Settings,
-    StorageContext
 )
-from llama_index.vector_stores.qdrant import QdrantVectorStore
-from llama_index.embeddings.langchain import LangchainEmbedding
-from langchain_community.embeddings import HuggingFaceEmbeddings  # Updated import
-import qdrant_client
+import logging
 import yaml
+from rag.embeddings import CachedEmbedding, get_embedding_service
+from rag.ingest import Ingestor
+from rag.vector_store import build_vector_store
+
+logger = logging.getLogger(__name__)
 
 class RAG:
     def __init__(self, config_file, llm):
         self.config = config_file
-        self.qdrant_client = qdrant_client.QdrantClient(
-            url=self.config['qdrant_url']
-        )
         self.llm = llm  # ollama llm
    
     def load_embedder(self):
-        embed_model = LangchainEmbedding(
-            HuggingFaceEmbeddings(model_name=self.config['embedding_model'])
-        )
-        return embed_model
+        # The model is loaded once per process and shared by every caller
+        return CachedEmbedding(get_embedding_service(self.config))
 
     def qdrant_index(self):
-        client = qdrant_client.QdrantClient(url=self.config["qdrant_url"])
-        qdrant_vector_store = QdrantVectorStore(
-            client=client, 
-            collection_name=self.config['collection_name']
-        )
+        # Qdrant or the embedded memmap index, per vector_store.backend
+        vector_store = build_vector_store(self.config)
 
         # Use Settings instead of ServiceContext
         Settings.llm = self.llm
         Settings.embed_model = self.load_embedder()
         Settings.chunk_size = self.config["chunk_size"]
 
-        # Create storage context
-        storage_context = StorageContext.from_defaults(
-            vector_store=qdrant_vector_store
-        )
-
         try:
             # Try to load existing index
             index = VectorStoreIndex.from_vector_store(
-                vector_store=qdrant_vector_store,
+                vector_store=vector_store,
             )
         except Exception as e:
-            print(f"Creating new index: {str(e)}")
-            # If loading fails, create new index from documents
-            documents = SimpleDirectoryReader(self.config["data_path"]).load_data()
-            index = VectorStoreIndex.from_documents(
-                documents,
-                storage_context=storage_context
+            logger.info("Creating new index: %s", e)
+            # If loading fails, embed the data folder (only files not yet
+            # ingested) and load the index from the populated store
+            Ingestor(self.config, vector_store, Settings.embed_model).ingest()
+            index = VectorStoreIndex.from_vector_store(
+                vector_store=vector_store,
             )
 
-        return index
\ No newline at end of file
+        return index
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English text with llama-style
+    # tokenizers; good enough to keep prompts inside num_ctx
+    return len(text) // 4 + 1
+
+
+def pack_sources(sources: List[Dict], token_budget: int) -> Tuple[str, List[Dict]]:
+    """Number sources in order and keep as many as fit into ``token_budget``.
+
+    Each source needs ``title`` and ``text``; everything else is passed
+    through to the citation list returned to the client.
+    """
+    blocks, cited, used = [], [], 0
+    for source in sources:
+        location = ", ".join(
+            part for part in (source.get("file"), source.get("section")) if part
+        )
+        header = f"[{len(cited) + 1}] {source['title']}" + (f" ({location})" if location else "")
+        block = f"{header}\n{source['text'].strip()}\n"
+        cost = estimate_tokens(block)
+        if used + cost > token_budget:
+            if cited:
+                break
+            # Always keep the best source, trimmed to the budget
+            block = block[:token_budget * 4]
+            cost = token_budget
+        blocks.append(block)
+        cited.append({k: v for k, v in source.items() if k != "text"} | {"id": len(cited) + 1})
+        used += cost
+
+    return "Available research papers:\n\n" + "\n".join(blocks), cited
+
+
+def chunk_filters(start: Optional[int] = None, end: Optional[int] = None,
+                  arxiv_ids: Optional[List[str]] = None):
+    """Metadata filters on the chunks' ``published`` date (YYYYMMDD) and paper.
+
+    The Qdrant vector store turns these into a payload filter, so the
+    restriction is applied inside the HNSW search rather than on its results.
+    """
+    from llama_index.core.vector_stores import FilterOperator, MetadataFilter, MetadataFilters
+
+    filters = []
+    if arxiv_ids is not None:
+        filters.append(MetadataFilter(key="arxiv_id", value=list(arxiv_ids), operator=FilterOperator.IN))
+    if start is not None:
+        filters.append(MetadataFilter(key="published", value=start, operator=FilterOperator.GTE))
+    if end is not None:
+        filters.append(MetadataFilter(key="published", value=end, operator=FilterOperator.LTE))
+    return MetadataFilters(filters=filters) if filters else None
+
+
+class ContextRetriever:
+    """Top-k chunk retrieval from the vector index built by rag/rag.py."""
+
+    def __init__(self, config: Dict):
+        retrieval = config.get("retrieval", {})
+        self.config = config
+        self.enabled = retrieval.get("enabled", True)
+        self.top_k = retrieval.get("top_k", 8)
+        self.min_score = retrieval.get("min_score", 0.35)
+        self.token_budget = retrieval.get("token_budget", 1500)
+        self._index = None
+        self._lock = threading.Lock()
+        self._retry_at = 0.0
+
+    def _get_index(self):
+        with self._lock:
+            if self._index is None:
+                from rag.rag import RAG
+
+                self._index = RAG(self.config, llm=None).qdrant_index()
+            return self._index
+
+    def _retrieve(self, query: str, start: Optional[int], end: Optional[int],
+                  arxiv_ids: Optional[List[str]]) -> List[Dict]:
+        chunks = []
+        retriever = self._get_index().as_retriever(
+            similarity_top_k=self.top_k, filters=chunk_filters(start, end, arxiv_ids)
+        )
+        for result in retriever.retrieve(query):
+            if result.score is not None and result.score < self.min_score:
+                continue
+            metadata = result.node.metadata
+            file_name = metadata.get("file_name", "")
+            chunks.append({
+                "title": metadata.get("title") or os.path.splitext(file_name)[0],
+                "file": file_name,
+                "section": f"page {metadata['page_label']}" if metadata.get("page_label") else None,
+                "score": round(result.score, 4) if result.score is not None else None,
+                "text": result.node.get_content()
+            })
+        return chunks
+
+    def index_version(self) -> str:
+        """Changes whenever an ingest adds, replaces or removes chunks: the
+        ingest manifest is rewritten after every file. Empty when retrieval
+        is off or nothing was ingested."""
+        if not self.enabled:
+            return ""
+        from rag.ingest import MANIFEST_NAME
+
+        try:
+            stat = os.stat(os.path.join(self.config["data_path"], MANIFEST_NAME))
+        except OSError:
+            return ""
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    async def warm_up(self):
+        """Load the index (and with it the embedding model) ahead of the first chat."""
+        if self.enabled:
+            await asyncio.to_thread(self._get_index)
+
+    async def retrieve(self, query: str, start: Optional[int] = None,
+                       end: Optional[int] = None, arxiv_ids: Optional[List[str]] = None) -> List[Dict]:
+        """Return the relevant chunks for ``query``, best first, optionally
+        only from papers published between ``start`` and ``end`` (YYYYMMDD)
+        and only from the papers in ``arxiv_ids``.
+
+        The embedder and Qdrant client are synchronous, so the lookup runs in
+        a worker thread. Any failure (Qdrant down, empty collection) yields an
+        empty list and the caller falls back to paper abstracts.
+        """
+        if not self.enabled or time.monotonic() < self._retry_at or arxiv_ids == []:
+            return []
+        try:
+            return await asyncio.to_thread(self._retrieve, query, start, end, arxiv_ids)
+        except Exception as e:
+            logger.warning("Vector retrieval unavailable: %s", e)
+            # Don't pay for another index load on every chat while it's down
+            self._retry_at = time.monotonic() + 60
+            return []
@@ -0,0 +1,19 @@
+"""JSON encoding for API responses: orjson when it is installed, else the json module."""
+import json
+
+try:
+    import orjson
+except ImportError:  # optional, roughly 5-10x faster on paper lists
+    orjson = None
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY if orjson else 0
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=_OPTIONS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def ndjson_line(obj) -> bytes:
+    return dumps(obj) + b"\n"
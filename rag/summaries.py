@@ -0,0 +1,280 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from rag.llm_scheduler import PRIORITIES, QueueFull
+from rag.metrics import REGISTRY
+from rag.paper_store import PaperStore
+from rag.retriever import estimate_tokens
+from rag.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+PAPER_SUMMARIES = REGISTRY.counter(
+    "research_assistant_paper_summaries_total",
+    "Per-paper summaries used by summary jobs: cached (summarized before, "
+    "under any topic) or generated",
+    ["source"]
+)
+
+PAPER_PROMPT = """Summarize the research contribution of this paper in 3 to 5 sentences: the problem, the approach and the main results. Use only the information below.
+
+Title: {title}
+Authors: {authors}
+Published: {published}
+Abstract: {abstract}
+
+Summary:"""
+
+REDUCE_PROMPT = """Below are summaries of research papers on "{topic}", each starting with its bracketed number. Merge them into one shorter summary of their contributions, grouped by theme. Keep the bracketed numbers as citations, e.g. [3].
+
+{summaries}
+
+Merged summary:"""
+
+FINAL_PROMPT = """You are writing a review of the research on "{topic}" from the past {years} years. It is based on the paper summaries below; cite papers by their bracketed numbers, e.g. [2].
+
+{summaries}
+
+Write:
+1. The main research contributions, grouped by theme, point by point with specific details.
+2. How the field developed over this period.
+3. Open problems and promising directions for future work."""
+
+
+class SummaryJob:
+    def __init__(self, topic: str, years: int, max_papers: int):
+        self.id = uuid.uuid4().hex
+        self.topic = topic
+        self.years = years
+        self.max_papers = max_papers
+        self.status = "queued"  # queued, running, done or failed
+        self.stage: Optional[str] = None  # papers, map, reduce or final
+        self.progress = {"papers": 0, "summarized": 0, "cached": 0, "failed": 0, "reduce_rounds": 0}
+        self.summary: Optional[str] = None
+        self.sources: List[Dict] = []
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "topic": self.topic,
+            "years": self.years,
+            "max_papers": self.max_papers,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "summary": self.summary,
+            "sources": self.sources,
+            "error": self.error,
+            "seconds": round((self.finished_at or time.time()) - self.created_at, 2)
+        }
+
+
+class Summarizer:
+    """Map-reduce summaries of a topic's papers, run as background jobs.
+
+    Map: each paper is summarized on its own and the summary is kept in the
+    paper store under its arXiv ID and the model name, so a paper that turns
+    up under many topics, or in a later job, is summarized once. Reduce: the
+    summaries are merged in groups that fit ``token_budget``, round after
+    round, until they fit a single final prompt. Every generation runs at
+    "low" priority so interactive chats go first.
+
+    With a ``job_store`` (a shared cache), each job's status is written
+    there as it progresses, so it can be polled through any worker.
+    """
+
+    def __init__(self, ollama, store: PaperStore, fetch_papers: Callable[..., Awaitable[List[Dict]]],
+                 options: Dict, map_concurrency: int = 2, token_budget: int = 2500,
+                 summary_tokens: int = 256, final_tokens: int = 1200, max_jobs: int = 100,
+                 job_store=None):
+        self.ollama = ollama
+        self.store = store
+        self.fetch_papers = fetch_papers
+        self.options = options
+        self.map_concurrency = map_concurrency
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.final_tokens = final_tokens
+        self.max_jobs = max_jobs
+        self.job_store = job_store
+        self._jobs: "OrderedDict[str, SummaryJob]" = OrderedDict()
+        # Two jobs summarizing the same paper at once share one generation
+        self._inflight = SingleFlight()
+
+    async def start(self, topic: str, years: int, max_papers: int) -> SummaryJob:
+        for job in self._jobs.values():
+            if job.status in ("queued", "running") and (job.topic, job.years, job.max_papers) == (topic, years, max_papers):
+                return job
+        job = SummaryJob(topic, years, max_papers)
+        self._jobs[job.id] = job
+        await self._publish(job)
+        job.task = asyncio.create_task(self._run(job))
+        finished = [job_id for job_id, old in self._jobs.items() if old.finished_at is not None]
+        for job_id in finished[:max(len(self._jobs) - self.max_jobs, 0)]:
+            del self._jobs[job_id]
+        return job
+
+    def get(self, job_id: str) -> Optional[SummaryJob]:
+        return self._jobs.get(job_id)
+
+    async def status(self, job_id: str) -> Optional[Dict]:
+        """The job's to_dict(), whichever worker runs it (if there is a job_store)."""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        return await self.job_store.aget(job_id) if self.job_store is not None else None
+
+    async def _publish(self, job: SummaryJob):
+        if self.job_store is not None:
+            await self.job_store.aset(job.id, job.to_dict())
+
+    def close(self):
+        for job in self._jobs.values():
+            if job.task is not None:
+                job.task.cancel()
+
+    async def _generate(self, prompt: str, num_predict: int) -> str:
+        options = {**self.options, "num_predict": num_predict}
+        while True:
+            try:
+                data = await self.ollama.generate(prompt, options, priority=PRIORITIES["low"])
+                return data.get("response", "").strip()
+            except QueueFull as e:
+                # Chats have filled the queue; a background job can wait
+                await asyncio.sleep(e.retry_after)
+
+    async def _summarize_paper(self, paper: Dict) -> str:
+        model = self.ollama.model
+        cached = await asyncio.to_thread(self.store.summaries, [paper["arxiv_id"]], model)
+        if paper["arxiv_id"] in cached:
+            return cached[paper["arxiv_id"]]
+        summary = await self._generate(PAPER_PROMPT.format(
+            title=paper["title"],
+            authors=", ".join(paper["authors"]),
+            published=paper["published"].strftime("%Y-%m-%d"),
+            abstract=paper.get("abstract", "")
+        ), self.summary_tokens)
+        if summary:
+            await asyncio.to_thread(self.store.put_summary, paper["arxiv_id"], model, summary)
+        return summary
+
+    async def _map(self, job: SummaryJob, papers: List[Dict]) -> List[Optional[str]]:
+        cached = await asyncio.to_thread(self.store.summaries, [p["arxiv_id"] for p in papers], self.ollama.model)
+        semaphore = asyncio.Semaphore(self.map_concurrency)
+
+        async def summarize(paper: Dict) -> Optional[str]:
+            if paper["arxiv_id"] in cached:
+                job.progress["cached"] += 1
+                PAPER_SUMMARIES.inc(source="cached")
+                return cached[paper["arxiv_id"]]
+            async with semaphore:
+                try:
+                    summary = await self._inflight.do(
+                        f"{paper['arxiv_id']}|{self.ollama.model}",
+                        lambda: self._summarize_paper(paper)
+                    )
+                except Exception as e:
+                    logger.warning("Could not summarize %s: %s", paper["arxiv_id"], e)
+                    job.progress["failed"] += 1
+                    return None
+            job.progress["summarized"] += 1
+            PAPER_SUMMARIES.inc(source="generated")
+            await self._publish(job)
+            return summary or None
+
+        return await asyncio.gather(*(summarize(paper) for paper in papers))
+
+    def _groups(self, entries: List[str]) -> List[List[str]]:
+        groups, group, used = [], [], 0
+        for entry in entries:
+            tokens = estimate_tokens(entry)
+            if group and used + tokens > self.token_budget:
+                groups.append(group)
+                group, used = [], 0
+            group.append(entry)
+            used += tokens
+        if group:
+            groups.append(group)
+        return groups
+
+    async def _reduce(self, job: SummaryJob, entries: List[str]) -> List[str]:
+        # An entry may use at most half the budget, so every group holds at
+        # least two and each round shrinks the list
+        limit = self.token_budget // 2 * 4
+        entries = [entry if len(entry) <= limit else entry[:limit] for entry in entries]
+        semaphore = asyncio.Semaphore(self.map_concurrency)
+
+        async def merge(group: List[str]) -> str:
+            if len(group) == 1:
+                return group[0]
+            async with semaphore:
+                return await self._generate(
+                    REDUCE_PROMPT.format(topic=job.topic, summaries="\n\n".join(group)),
+                    self.token_budget // 4
+                )
+
+        while sum(estimate_tokens(entry) for entry in entries) > self.token_budget:
+            job.progress["reduce_rounds"] += 1
+            entries = [entry for entry in await asyncio.gather(*(merge(g) for g in self._groups(entries))) if entry]
+        return entries
+
+    async def _run(self, job: SummaryJob):
+        job.status = "running"
+        try:
+            job.stage = "papers"
+            await self._publish(job)
+            papers = await self.fetch_papers(job.topic, max_results=job.max_papers, years=job.years)
+            job.progress["papers"] = len(papers)
+            if not papers:
+                raise ValueError(f"No papers found for {job.topic!r}")
+
+            job.stage = "map"
+            await self._publish(job)
+            summaries = await self._map(job, papers)
+            entries, job.sources = [], []
+            for paper, summary in zip(papers, summaries):
+                if summary is None:
+                    continue
+                number = len(entries) + 1
+                entries.append(f"[{number}] {paper['title']} ({paper['published'].year}): {summary}")
+                job.sources.append({"number": number, "title": paper["title"], "url": paper["url"],
+                                    "arxiv_id": paper["arxiv_id"]})
+            if not entries:
+                raise RuntimeError("No paper could be summarized")
+
+            job.stage = "reduce"
+            await self._publish(job)
+            entries = await self._reduce(job, entries)
+
+            job.stage = "final"
+            await self._publish(job)
+            job.summary = await self._generate(
+                FINAL_PROMPT.format(topic=job.topic, years=job.years, summaries="\n\n".join(entries)),
+                self.final_tokens
+            )
+            job.status = "done"
+        except asyncio.CancelledError:
+            job.status, job.error = "failed", "cancelled"
+            raise
+        except Exception as e:
+            logger.error("Summary job %s for %r failed: %s", job.id, job.topic, e)
+            job.status, job.error = "failed", str(e)
+        finally:
+            job.finished_at = time.time()
+            await self._publish(job)
+            logger.info("Summary job %s for %r %s in %.1fs: %s", job.id, job.topic, job.status,
+                        job.finished_at - job.created_at, job.progress)
+
+    def stats(self) -> Dict:
+        statuses = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        for job in self._jobs.values():
+            statuses[job.status] += 1
+        return {"jobs": statuses, "paper_summaries": self._inflight.stats()}
@@ -0,0 +1,150 @@
+"""Keep tracked topics fresh by fetching only what arXiv added since the last sync.
+
+    python -m rag.sync --add "long context LLMs" --years 5
+    python -m rag.sync                 # sync every tracked topic once
+    python -m rag.sync --interval 60   # ...and again every 60 minutes
+"""
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import arxiv
+import yaml
+
+from rag.downloader import PaperDownloader, paper_record
+from rag.paper_store import PaperStore, to_timestamp
+
+logger = logging.getLogger(__name__)
+
+
+class TopicSync:
+    """Delta sync of tracked topics into the paper store and vector index.
+
+    Each topic has a high-water mark: the submittedDate it has been synced
+    up to. A sync asks arXiv only for papers submitted after that mark
+    (minus a small overlap for papers arXiv indexes late), so its cost grows
+    with the number of new papers, not with the topic's history.
+    """
+
+    def __init__(self, config: Dict):
+        self.config = config
+        sync = config.get("sync", {})
+        self.overlap = timedelta(hours=sync.get("overlap_hours", 48))
+        self.max_new = sync.get("max_new_per_topic", 500)
+        self.download = sync.get("download", True)
+        self.store = PaperStore(config["paper_store"]["path"])
+        self.client = arxiv.Client(page_size=100, delay_seconds=config["rate_limit"]["delay_seconds"], num_retries=5)
+        self.client.query_url_format = config.get("arxiv_url", "https://export.arxiv.org/api/query") + "?{}"
+        for topic in sync.get("topics", []):
+            self.store.track_topic(topic, sync.get("years", 5))
+
+    def _search(self, topic: str, since: datetime, until: datetime) -> List[Dict]:
+        date_filter = f"submittedDate:[{since.strftime('%Y%m%d%H%M')} TO {until.strftime('%Y%m%d%H%M')}]"
+        search = arxiv.Search(
+            query=f"{topic} AND {date_filter}",
+            max_results=self.max_new,
+            sort_by=arxiv.SortCriterion.SubmittedDate,
+            sort_order=arxiv.SortOrder.Descending
+        )
+        return [paper_record(paper) for paper in self.client.results(search)]
+
+    def sync_topic(self, topic: Dict) -> Dict:
+        now = datetime.now(timezone.utc)
+        if topic["high_water_mark"] is None:
+            since = now - timedelta(days=topic["years"] * 365)
+        else:
+            since = datetime.fromtimestamp(topic["high_water_mark"], tz=timezone.utc) - self.overlap
+
+        # Results come newest first, at most max_new per query: while a query
+        # is capped, continue below its oldest paper until [since, now] is covered
+        fetched, new_papers, seen = 0, [], set()
+        until, complete = now, False
+        while True:
+            page = self._search(topic["topic"], since, until)
+            # The upper bound is inclusive, so the previous query's oldest papers come back
+            papers = [paper for paper in page if paper["arxiv_id"] not in seen]
+            if papers:
+                seen.update(paper["arxiv_id"] for paper in papers)
+                known = self.store.known_topic_papers(topic["topic"], [p["arxiv_id"] for p in papers])
+                new_papers += [paper for paper in papers if paper["arxiv_id"] not in known]
+                self.store.upsert_papers(papers, topic["topic"])
+                fetched += len(papers)
+            if len(page) < self.max_new:
+                complete = True
+                break
+            oldest = min(paper["published"] for paper in page)
+            if oldest >= until:
+                logger.warning("%s: more than %d papers submitted at %s, not all fetched",
+                               topic["topic"], self.max_new, until)
+                break
+            until = oldest
+
+        covered_from = since if complete else until
+        self.store.add_coverage(topic["topic"], to_timestamp(covered_from), to_timestamp(now))
+        # An incomplete sync keeps the old mark, so the next one fetches the gap again
+        high_water_mark = to_timestamp(now) if complete else topic["high_water_mark"]
+        self.store.mark_synced(topic["topic"], high_water_mark, len(new_papers))
+        return {"topic": topic["topic"], "fetched": fetched, "new": new_papers}
+
+    def sync_all(self) -> Dict:
+        start = time.perf_counter()
+        new_papers, results = [], []
+        for topic in self.store.tracked_topics():
+            try:
+                result = self.sync_topic(topic)
+            except Exception as e:
+                logger.error("Error syncing '%s': %s", topic["topic"], e)
+                continue
+            logger.info("%s: %d new of %d fetched", result["topic"], len(result["new"]), result["fetched"])
+            new_papers.extend(result["new"])
+            results.append({"topic": result["topic"], "fetched": result["fetched"], "new": len(result["new"])})
+
+        if self.download and new_papers:
+            rate_limit = self.config["rate_limit"]
+            PaperDownloader(
+                self.config["data_path"],
+                max_concurrent=rate_limit["max_concurrent"],
+                delay_seconds=rate_limit["delay_seconds"]
+            ).download(list({p["arxiv_id"]: p for p in new_papers}.values()))
+
+            # Only the PDFs that just arrived are parsed and embedded
+            from rag.data import RAG
+            RAG(self.config, llm=None).ingest()
+
+        return {"topics": results, "seconds": round(time.perf_counter() - start, 2)}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Delta-sync tracked arXiv topics")
+    parser.add_argument("--add", type=str, help="Start tracking a topic")
+    parser.add_argument("--remove", type=str, help="Stop tracking a topic")
+    parser.add_argument("--years", type=int, default=5, help="History to backfill for a new topic")
+    parser.add_argument("--list", action="store_true", help="List tracked topics and exit")
+    parser.add_argument("--interval", type=float, help="Minutes between syncs; runs once if omitted")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    with open("config.yml", "r") as conf:
+        config = yaml.safe_load(conf)
+    sync = TopicSync(config)
+
+    if args.add:
+        sync.store.track_topic(args.add, args.years)
+    if args.remove:
+        sync.store.untrack_topic(args.remove)
+    if args.list:
+        for topic in sync.store.tracked_topics():
+            synced = topic["last_synced_at"]
+            synced = datetime.fromtimestamp(synced).strftime("%Y-%m-%d %H:%M") if synced else "never"
+            print(f"- {topic['topic']} (last {topic['years']} years, synced {synced}, "
+                  f"{topic['last_new_papers'] or 0} new last time)")
+    elif not args.remove:
+        while True:
+            stats = sync.sync_all()
+            print(f"Synced {len(stats['topics'])} topics in {stats['seconds']}s")
+            if args.interval is None:
+                break
+            time.sleep(args.interval * 60)
@@ -0,0 +1,121 @@
+import json
+from typing import Any, Dict, List
+
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    FilterCondition,
+    FilterOperator,
+    MetadataFilters,
+    VectorStoreQuery,
+    VectorStoreQueryResult,
+)
+from llama_index.core.vector_stores.utils import metadata_dict_to_node, node_to_metadata_dict
+
+from rag.embeddings import get_embedding_service
+from rag.memmap_index import MemmapIndex
+
+
+def search_conditions(filters: MetadataFilters) -> Dict:
+    """Translate llama_index metadata filters into ``MemmapIndex.search`` arguments.
+
+    Only what the app filters on is supported: ranges on ``published`` and
+    value lists on ``arxiv_id`` and ``topic``, combined with AND.
+    """
+    conditions = {}
+    if filters is None:
+        return conditions
+    if filters.condition == FilterCondition.OR and len(filters.filters) > 1:
+        raise ValueError("The memmap vector store only supports AND-combined filters")
+    for f in filters.filters:
+        if isinstance(f, MetadataFilters):
+            raise ValueError("The memmap vector store doesn't support nested filters")
+        if f.key == "published" and f.operator in (FilterOperator.GTE, FilterOperator.GT, FilterOperator.EQ):
+            start = f.value + 1 if f.operator == FilterOperator.GT else f.value
+            conditions["start"] = max(conditions.get("start", start), start)
+        if f.key == "published" and f.operator in (FilterOperator.LTE, FilterOperator.LT, FilterOperator.EQ):
+            end = f.value - 1 if f.operator == FilterOperator.LT else f.value
+            conditions["end"] = min(conditions.get("end", end), end)
+        elif f.key in ("arxiv_id", "topic") and f.operator in (FilterOperator.EQ, FilterOperator.IN,
+                                                               FilterOperator.CONTAINS, FilterOperator.ANY):
+            values = f.value if isinstance(f.value, list) else [f.value]
+            conditions["arxiv_ids" if f.key == "arxiv_id" else "topics"] = values
+        elif f.key != "published":
+            raise ValueError(f"The memmap vector store can't filter on {f.key} {f.operator.value}")
+    return conditions
+
+
+class MemmapVectorStore(BasePydanticVectorStore):
+    """llama_index vector store over a ``MemmapIndex`` (no server needed)."""
+
+    stores_text: bool = True
+    _index: MemmapIndex = PrivateAttr()
+
+    def __init__(self, index: MemmapIndex, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._index = index
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "MemmapVectorStore"
+
+    @property
+    def client(self) -> MemmapIndex:
+        return self._index
+
+    def add(self, nodes: List[BaseNode], **add_kwargs: Any) -> List[str]:
+        self._index.add([
+            {
+                "id": node.node_id,
+                "vector": node.get_embedding(),
+                "payload": json.dumps(node_to_metadata_dict(node, remove_text=False, flat_metadata=False)),
+                "ref_doc_id": node.ref_doc_id,
+                "published": node.metadata.get("published"),
+                "arxiv_id": node.metadata.get("arxiv_id"),
+                "topics": node.metadata.get("topic")
+            }
+            for node in nodes
+        ])
+        return [node.node_id for node in nodes]
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        self._index.delete(ref_doc_id)
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        hits = self._index.search(
+            query.query_embedding, query.similarity_top_k, **search_conditions(query.filters)
+        )
+        return VectorStoreQueryResult(
+            nodes=[metadata_dict_to_node(payload) for _, _, payload in hits],
+            similarities=[score for _, score, _ in hits],
+            ids=[node_id for node_id, _, _ in hits]
+        )
+
+
+def build_vector_store(config: Dict):
+    """The vector store selected by ``vector_store.backend`` in config.yml."""
+    settings = config.get("vector_store", {})
+    backend = settings.get("backend", "qdrant")
+    dimension = get_embedding_service(config).dimension
+
+    if backend == "qdrant":
+        import qdrant_client
+        from llama_index.vector_stores.qdrant import QdrantVectorStore
+        from rag.qdrant_collection import QdrantCollection
+
+        client = qdrant_client.QdrantClient(url=config["qdrant_url"])
+        # Create or migrate the collection (quantization, HNSW, payload
+        # indexes) before llama_index gets a chance to create a default one
+        QdrantCollection(client, config).ensure(dimension)
+        return QdrantVectorStore(client=client, collection_name=config["collection_name"])
+
+    if backend == "memmap":
+        return MemmapVectorStore(MemmapIndex(
+            settings.get("path", "./cache/vectors"),
+            dimension,
+            ivf_lists=settings.get("ivf_lists", 0),
+            ivf_probes=settings.get("ivf_probes", 8)
+        ))
+
+    raise ValueError(f"Unknown vector_store.backend '{backend}', expected qdrant or memmap")
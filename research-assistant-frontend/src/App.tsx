@@ -13,7 +13,7 @@ import {
 import SearchBar from './components/SearchBar';
 import PapersList from './components/PapersList';
 import ChatInterface from './components/ChatInterface';
-import { searchPapers, chatWithAssistant } from './services/api';
+import { searchPapers, streamChatWithAssistant } from './services/api';
 import { Paper, Message } from './types';
 import Navbar from './components/Navbar';
 
@@ -30,6 +30,8 @@ const App: React.FC = () => {
   const [isChatting, setIsChatting] = useState(false);
   const [messages, setMessages] = useState<Message[]>([]);
   const [currentTopic, setCurrentTopic] = useState<string>('');
+  // Chat session id per topic, sent with follow-ups
+  const [sessions, setSessions] = useState<Record<string, string>>({});
   const [error, setError] = useState<string | null>(null);
 
   const handleSearch = async (topic: string, maxResults: number, years: number) => {
@@ -40,6 +42,12 @@ const App: React.FC = () => {
       setCurrentTopic(topic);
       setSelectedPapers([]);
       setMessages([]);
+      // A new search starts a new conversation
+      setSessions((prev) => {
+        const next = { ...prev };
+        delete next[topic];
+        return next;
+      });
     } catch (error) {
       setError('Failed to fetch papers. Please try again.');
     } finally {
@@ -67,11 +75,23 @@ const App: React.FC = () => {
     setIsChatting(true);
 
     try {
-      const response = await chatWithAssistant(currentTopic, message);
-      setMessages((prev) => [
-        ...prev,
-        { content: response.response, sender: 'assistant' },
-      ]);
+      let started = false;
+      const topic = currentTopic;
+      const sessionId = await streamChatWithAssistant(topic, message, (token) => {
+        if (!started) {
+          started = true;
+          setIsChatting(false);
+          setMessages((prev) => [...prev, { content: token, sender: 'assistant' }]);
+          return;
+        }
+        setMessages((prev) => {
+          const last = prev[prev.length - 1];
+          return [...prev.slice(0, -1), { ...last, content: last.content + token }];
+        });
+      }, sessions[topic]);
+      if (sessionId) {
+        setSessions((prev) => ({ ...prev, [topic]: sessionId }));
+      }
     } catch (error) {
       setError('Failed to send message. Please try again.');
     } finally {
@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { SearchResponse, ChatResponse } from '../types';
+import { SearchResponse, ChatResponse, ChatStreamChunk } from '../types';
 
 const API_URL = 'http://localhost:8000'; // Make sure this matches your FastAPI server port
 
@@ -19,6 +19,51 @@ export const chatWithAssistant = async (topic: string, message: string): Promise
   }
 };
 
+// Resolves with the chat session's id; pass it back with the next message so
+// the backend answers the follow-up from the same papers and conversation
+export const streamChatWithAssistant = async (
+  topic: string,
+  message: string,
+  onToken: (token: string) => void,
+  sessionId?: string
+): Promise<string | undefined> => {
+  const response = await fetch(`${API_URL}/api/chat/${topic}`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify(sessionId ? { message, stream: true, session_id: sessionId } : { message, stream: true }),
+  });
+  if (response.status === 404 && sessionId) {
+    // The session expired: start a new one
+    return streamChatWithAssistant(topic, message, onToken);
+  }
+  if (!response.ok || !response.body) {
+    throw new Error('Failed to send message. Please try again.');
+  }
+
+  // The backend sends one JSON object per line as tokens are generated
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let session: string | undefined;
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    buffer = lines.pop() ?? '';
+    for (const line of lines) {
+      if (!line.trim()) continue;
+      const chunk: ChatStreamChunk = JSON.parse(line);
+      if (chunk.error) throw new Error(chunk.error);
+      if (chunk.token) onToken(chunk.token);
+      if (chunk.session_id) session = chunk.session_id;
+    }
+  }
+  return session;
+};
+
 export const searchPapers = async (
   topic: string,
   maxResults: number = 10,
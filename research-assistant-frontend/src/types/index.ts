@@ -18,7 +18,26 @@ export interface SearchResponse {
   total_papers: number;
 }
 
+export interface Source {
+  id: number;
+  title: string;
+  url?: string;
+  file?: string;
+  section?: string;
+  score?: number;
+}
+
 export interface ChatResponse {
   status: string;
   response: string;
+  sources?: Source[];
+  session_id?: string;
+}
+
+export interface ChatStreamChunk {
+  token?: string;
+  done?: boolean;
+  sources?: Source[];
+  error?: string;
+  session_id?: string;
 }
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""fetch_many against the fake arXiv from benchmarks/fake_upstreams.py.
+
+    python -m pytest tests
+"""
+import asyncio
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
+
+import app  # noqa: E402
+from fake_upstreams import FakeUpstreams, UpstreamSettings  # noqa: E402
+from harness import write_config  # noqa: E402
+
+
+def fetch_many(fetcher, searches):
+    async def collect():
+        return {index: (papers, cached) async for index, papers, cached in fetcher.fetch_many(searches)}
+    return asyncio.run(collect())
+
+
+def test_failed_fetch_is_not_cached(tmp_path, monkeypatch):
+    settings = UpstreamSettings(arxiv_latency=0)
+    with FakeUpstreams(settings) as upstreams:
+        fetcher = app.ResearchPaperFetcher(write_config(upstreams.url, str(tmp_path), {
+            "retrieval": {"enabled": False},
+            "rate_limit": {"delay_seconds": 0}
+        }))
+        searches = [("llm", 10, 2), ("llm", 20, 2)]
+
+        async def arxiv_down(*args, **kwargs):
+            raise RuntimeError("arXiv is down")
+
+        monkeypatch.setattr(fetcher, "_query_arxiv", arxiv_down)
+        results = fetch_many(fetcher, searches)
+        assert results == {0: ([], False), 1: ([], False)}
+
+        # arXiv is back: the failure was not cached, both searches fetch again
+        monkeypatch.undo()
+        results = fetch_many(fetcher, searches)
+        assert [len(results[i][0]) for i in range(2)] == [10, 20]
+        assert not any(cached for _, cached in results.values())
+        assert settings.counters["arxiv_queries"] > 0
+
+        results = fetch_many(fetcher, searches)
+        assert all(cached for _, cached in results.values())